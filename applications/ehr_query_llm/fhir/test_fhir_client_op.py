@@ -0,0 +1,310 @@
+# SPDX-FileCopyrightText: Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from operators.ehr_query_llm.fhir.ehr_query import FHIRQuery
+from operators.ehr_query_llm.fhir_client_op import FhirClientOperator, fhir_client_op
+
+NUM_PATIENTS = 8
+NUM_PAGES = 5
+PAGE_SIZE = 10
+LATENCY = 0.04  # seconds per request, to emulate a remote FHIR server
+
+
+class StubFhirServer(ThreadingHTTPServer):
+    """A local FHIR server stub serving patients and their paged $everything resources."""
+
+    daemon_threads = True
+
+    def __init__(self, num_patients=NUM_PATIENTS, num_pages=NUM_PAGES, latency=LATENCY):
+        super().__init__(("127.0.0.1", 0), StubFhirHandler)
+        self.num_patients = num_patients
+        self.num_pages = num_pages
+        self.latency = latency
+        self.client_ports = set()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def reset_peak_in_flight(self):
+        with self.lock:
+            self.peak_in_flight = 0
+
+    @property
+    def endpoint(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubFhirHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, to let the client reuse its connections
+    disable_nagle_algorithm = True  # Do not delay the small responses on kept-alive connections
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.client_ports.add(self.client_address[1])
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        try:
+            time.sleep(server.latency)
+            self._respond()
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _respond(self):
+        server = self.server
+
+        url = urlparse(self.path)
+        if url.path == "/Patient":
+            body = {
+                "entry": [
+                    {
+                        "fullUrl": f"{server.endpoint}/Patient/{i}",
+                        "resource": {"resourceType": "Patient", "id": str(i)},
+                    }
+                    for i in range(server.num_patients)
+                ]
+            }
+        else:
+            patient_id = url.path.split("/")[2]
+            page = int(parse_qs(url.query).get("page", ["0"])[0])
+            body = {
+                "entry": [
+                    {"resource": {"resourceType": "Observation", "id": f"{patient_id}-{page}-{i}"}}
+                    for i in range(PAGE_SIZE)
+                ]
+            }
+            if page + 1 < server.num_pages:
+                next_url = f"{server.endpoint}/Patient/{patient_id}/$everything?page={page + 1}"
+                body["link"] = [{"relation": "next", "url": next_url}]
+
+        content = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/fhir+json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RequestInput:
+    """Returns each request once, then no message, as an optional input does."""
+
+    def __init__(self, *requests):
+        self._requests = list(requests)
+
+    def receive(self, port):
+        assert port == "request"
+        return self._requests.pop(0) if self._requests else None
+
+
+class RecordingOutput:
+    """Records the emitted messages.
+
+    As Holoscan only delivers the messages of a compute call once it returns, emitting more messages
+    than the capacity of an output queue within a call fails, like a full DOUBLE_BUFFER.
+    """
+
+    def __init__(self, capacities=None):
+        self.emitted = []
+        self.emitted_per_compute = []
+        self._capacities = capacities or {}
+
+    def start_compute(self):
+        self.emitted_per_compute.append([])
+
+    def emit(self, msg, port):
+        if not self.emitted_per_compute:
+            self.start_compute()
+        current = self.emitted_per_compute[-1]
+        capacity = self._capacities.get(port)
+        if capacity is not None and sum(p == port for _, p in current) >= capacity:
+            raise RuntimeError(f"Output queue of port {port} is full")
+        current.append((msg, port))
+        self.emitted.append((msg, port))
+
+    def get(self, port):
+        return [msg for msg, msg_port in self.emitted if msg_port == port]
+
+
+@pytest.fixture
+def fhir_server():
+    def _factory(**kwargs):
+        server = StubFhirServer(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    servers = []
+    yield _factory
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def query_patients(op, request_id="test"):
+    request = FHIRQuery(request_id=request_id, patient_name="John Doe", resources_to_retrieve=[])
+    op_output = RecordingOutput()
+    start = time.perf_counter()
+    op.compute(RequestInput(request.to_json()), op_output, None)
+    return op_output, time.perf_counter() - start
+
+
+def stream_patients(op, op_output, request_ids=("test",), timeout=30):
+    """Calls compute until the responses of all requests are emitted, as the scheduler polls the
+    operator. All requests are received by the first compute calls."""
+    requests = [
+        FHIRQuery(request_id=request_id, patient_name="John Doe", resources_to_retrieve=[])
+        for request_id in request_ids
+    ]
+    op_input = RequestInput(*(request.to_json() for request in requests))
+    deadline = time.monotonic() + timeout
+    while len(op_output.get("out")) < len(requests):
+        assert time.monotonic() < deadline, "Timed out waiting for the response"
+        op_output.start_compute()
+        op.compute(op_input, op_output, None)
+    return op_output
+
+
+def expected_ids(patient_id, num_pages=NUM_PAGES):
+    return [f"{patient_id}-{page}-{i}" for page in range(num_pages) for i in range(PAGE_SIZE)]
+
+
+def test_fhir_client_op_fetches_all_pages(fragment, fhir_server):
+    server = fhir_server()
+    op = FhirClientOperator(fragment, fhir_endpoint=server.endpoint, max_concurrency=4)
+    op_output, _ = query_patients(op)
+
+    (response,) = op_output.get("out")
+    assert response.request_id == "test"
+    assert list(response.patient_resources) == [str(i) for i in range(NUM_PATIENTS)]
+    for patient_id, resources in response.patient_resources.items():
+        assert [entry["resource"]["id"] for entry in resources] == expected_ids(patient_id)
+    assert not op_output.get("batch")
+    # Connections are pooled and reused across pages and patients
+    assert len(server.client_ports) <= 4 + 1
+
+
+def test_fhir_client_op_follows_pages_iteratively(fragment, fhir_server):
+    num_pages = 1200  # More pages than the default recursion limit
+    server = fhir_server(num_patients=1, num_pages=num_pages, latency=0)
+    op = FhirClientOperator(fragment, fhir_endpoint=server.endpoint)
+    op_output, _ = query_patients(op)
+
+    (response,) = op_output.get("out")
+    assert len(response.patient_resources["0"]) == num_pages * PAGE_SIZE
+
+
+def test_fhir_client_op_streaming(fragment, fhir_server):
+    num_pages = 10
+    batch_queue_capacity = 4
+    server = fhir_server(num_patients=3, num_pages=num_pages, latency=0.005)
+    op = FhirClientOperator(
+        fragment,
+        fhir_endpoint=server.endpoint,
+        streaming=True,
+        batch_queue_capacity=batch_queue_capacity,
+    )
+    op_output = RecordingOutput(capacities={"batch": batch_queue_capacity, "out": 1})
+    stream_patients(op, op_output)
+
+    # More pages than the queue capacity, emitted one per compute call
+    batches = op_output.get("batch")
+    assert len(batches) == 3 * num_pages > batch_queue_capacity
+    assert all(
+        sum(port == "batch" for _, port in emitted) <= 1
+        for emitted in op_output.emitted_per_compute
+    )
+    # The complete response is emitted after the last page
+    assert op_output.emitted_per_compute[-1][-1][1] == "out"
+
+    streamed = {}
+    for batch in batches:
+        ((patient_id, entries),) = batch.patient_resources.items()
+        streamed.setdefault(patient_id, []).extend(entries)
+    (response,) = op_output.get("out")
+    assert streamed == response.patient_resources
+    for patient_id, resources in response.patient_resources.items():
+        assert [entry["resource"]["id"] for entry in resources] == expected_ids(
+            patient_id, num_pages
+        )
+
+
+def test_fhir_client_op_streaming_is_throttled(fragment, monkeypatch):
+    periods = []
+    monkeypatch.setattr(
+        fhir_client_op, "PeriodicCondition", lambda fragment, period: periods.append(period)
+    )
+    FhirClientOperator(fragment, streaming=False)
+    assert not periods
+    # The polled request input does not schedule compute, a periodic condition does
+    FhirClientOperator(fragment, streaming=True, poll_period=0.05)
+    assert periods == [timedelta(milliseconds=50)]
+    with pytest.raises(ValueError, match="poll_period"):
+        FhirClientOperator(fragment, streaming=True, poll_period=0)
+
+
+def test_fhir_client_op_streaming_batch_overflow_keeps_response(fragment, fhir_server):
+    server = fhir_server(num_patients=2, num_pages=3, latency=0)
+    op = FhirClientOperator(fragment, fhir_endpoint=server.endpoint, streaming=True)
+    # A batch queue that is always full: every page is dropped from the batch output
+    op_output = RecordingOutput(capacities={"batch": 0})
+    stream_patients(op, op_output)
+
+    assert not op_output.get("batch")
+    (response,) = op_output.get("out")
+    for patient_id, resources in response.patient_resources.items():
+        assert [entry["resource"]["id"] for entry in resources] == expected_ids(patient_id, 3)
+
+
+def test_fhir_client_op_streaming_queues_requests(fragment, fhir_server):
+    server = fhir_server(num_patients=2, num_pages=2, latency=0)
+    op = FhirClientOperator(fragment, fhir_endpoint=server.endpoint, streaming=True)
+    op_output = RecordingOutput()
+    # The second request arrives while the pages of the first one are being fetched
+    stream_patients(op, op_output, request_ids=("first", "second"))
+    assert [response.request_id for response in op_output.get("out")] == ["first", "second"]
+    op.stop()
+
+
+def test_fhir_client_op_fetches_patients_concurrently(fragment, fhir_server):
+    server = fhir_server()
+    sequential_op = FhirClientOperator(fragment, fhir_endpoint=server.endpoint, max_concurrency=1)
+    concurrent_op = FhirClientOperator(
+        fragment, fhir_endpoint=server.endpoint, max_concurrency=NUM_PATIENTS
+    )
+
+    sequential_output, _ = query_patients(sequential_op)
+    assert server.peak_in_flight == 1
+    server.reset_peak_in_flight()
+    concurrent_output, _ = query_patients(concurrent_op)
+    # The pages of several patients were requested at the same time
+    assert server.peak_in_flight > 1
+
+    assert (
+        sequential_output.get("out")[0].patient_resources
+        == concurrent_output.get("out")[0].patient_resources
+    )
@@ -0,0 +1,220 @@
+# SPDX-FileCopyrightText: Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+import pytest
+
+from operators.ehr_query_llm.fhir.ehr_response import FHIRQueryResponse
+from operators.ehr_query_llm.fhir.resource_sanitizer import FHIRResourceSanitizer
+from operators.ehr_query_llm.fhir_resource_sanitizer_op import FhirResourceSanitizerOp
+
+SUBJECT = {"reference": "urn:uuid:patient-1"}
+
+
+def coding(code, display=None, system="http://loinc.org"):
+    return {"system": system, "code": code, **({"display": display} if display else {})}
+
+
+PATIENT = {
+    "resourceType": "Patient",
+    "id": "patient-1",
+    "name": [{"prefix": ["Mr."], "family": "Doe", "given": ["John", "Paul"]}],
+    "birthDate": "1970-04-12",
+    "gender": "male",
+    "maritalStatus": {"coding": [coding("M", "Married")], "text": "M"},
+}
+OBSERVATION_QUANTITY = {
+    "resourceType": "Observation",
+    "id": "observation-quantity",
+    "status": "final",
+    "category": [{"coding": [coding("vital-signs", "Vital signs")]}],
+    "code": {"coding": [coding("8867-4", "Heart rate")], "text": "Heart rate"},
+    "subject": SUBJECT,
+    # in UTC, which the validated model formats as +00:00
+    "effectiveDateTime": "2020-01-01T10:00:00Z",
+    "valueQuantity": {"value": 72.5, "unit": "/min"},
+}
+OBSERVATION_CODEABLE_CONCEPT = {
+    "resourceType": "Observation",
+    "id": "observation-codeable-concept",
+    "status": "final",
+    "category": [{"coding": [coding("social-history")]}],
+    "code": {"coding": [coding("72166-2", "Tobacco smoking status")]},
+    "subject": SUBJECT,
+    "effectiveDateTime": "2020-01-01T10:00:00.250-05:00",
+    "valueCodeableConcept": {
+        "coding": [coding("266919005", "Never smoked", "http://snomed.info/sct")],
+        "text": "Never smoked",
+    },
+}
+OBSERVATION_COMPONENTS = {
+    "resourceType": "Observation",
+    "id": "observation-components",
+    "status": "final",
+    "code": {"coding": [coding("85354-9", "Blood pressure panel")]},
+    "subject": SUBJECT,
+    "effectiveDateTime": "2020-01-01",
+    "component": [
+        {
+            "code": {"coding": [coding("8480-6", "Systolic blood pressure")]},
+            "valueQuantity": {"value": 120, "unit": "mm[Hg]"},
+        },
+        {
+            "code": {"coding": [coding("8462-4", "Diastolic blood pressure")]},
+            "valueQuantity": {"value": 80, "unit": "mm[Hg]"},
+        },
+    ],
+}
+CONDITION = {
+    "resourceType": "Condition",
+    "id": "condition-1",
+    "clinicalStatus": {"coding": [coding("resolved", system="http://hl7.org/fhir/cs")]},
+    "verificationStatus": {"coding": [coding("confirmed", "Confirmed")]},
+    "category": [{"coding": [coding("encounter-diagnosis", "Encounter Diagnosis")]}],
+    "code": {"coding": [coding("444814009", "Viral sinusitis (disorder)")]},
+    "bodySite": [{"coding": [coding("31389004", "Oropharyngeal structure")]}],
+    "subject": SUBJECT,
+    "onsetDateTime": "2019-02-27T18:22:07Z",
+    "abatementDateTime": "2019-03-13T18:22:07-05:00",
+    "recordedDate": "2019-02-27T18:22:07-05:00",
+    "note": [{"text": "Resolved without treatment"}],
+}
+ENCOUNTER = {
+    "resourceType": "Encounter",
+    "id": "encounter-1",
+    "status": "finished",
+    "class": coding("AMB", system="http://terminology.hl7.org/CodeSystem/v3-ActCode"),
+    "type": [{"coding": [coding("185345009", "Encounter for symptom")]}],
+    "subject": SUBJECT,
+    "participant": [
+        {"type": [{"text": "primary performer"}], "individual": {"display": "Dr. Smith"}}
+    ],
+    "period": {"start": "2019-02-27T18:22:07Z", "end": "2019-02-27T18:37:07Z"},
+}
+RESOURCES = [
+    PATIENT,
+    OBSERVATION_QUANTITY,
+    OBSERVATION_CODEABLE_CONCEPT,
+    OBSERVATION_COMPONENTS,
+    CONDITION,
+    ENCOUNTER,
+]
+# Sanitized values which are date/time values in the validated models
+DATE_KEYS = {"date", "birth_date", "onset_dateTime", "abatement_dateTime", "recorded_date"}
+
+
+def record(resource):
+    return {"fullUrl": f"urn:uuid:{resource['id']}", "resource": copy.deepcopy(resource)}
+
+
+def parse_dates(sanitized):
+    """Replaces the date/time strings of a sanitized record by their parsed values."""
+    resource = dict(sanitized["resource"])
+    for key in DATE_KEYS & resource.keys():
+        value = resource[key]
+        resource[key] = (
+            date.fromisoformat(value) if len(value) == 10 else datetime.fromisoformat(value)
+        )
+    return {**sanitized, "resource": resource}
+
+
+@pytest.mark.parametrize("resource", RESOURCES, ids=lambda resource: resource["id"])
+def test_sanitize_without_validation_matches_validated(resource):
+    """Test that the raw path extracts the values of the validated path, up to the date format."""
+    validated = FHIRResourceSanitizer.sanitize(record(resource), validate=True)
+    raw = FHIRResourceSanitizer.sanitize(record(resource), validate=False)
+
+    assert validated is not None
+    assert parse_dates(raw) == parse_dates(validated)
+    # Only the formatting of the date/time values may differ
+    for key in validated["resource"].keys() - DATE_KEYS:
+        assert raw["resource"][key] == validated["resource"][key], key
+
+
+def test_sanitize_without_validation_keeps_dates_as_written():
+    validated = FHIRResourceSanitizer.sanitize(record(ENCOUNTER), validate=True)
+    raw = FHIRResourceSanitizer.sanitize(record(ENCOUNTER), validate=False)
+    assert validated["resource"]["date"] == "2019-02-27T18:22:07+00:00"
+    assert raw["resource"]["date"] == "2019-02-27T18:22:07Z"
+
+
+def make_records():
+    """Creates records of supported, unsupported and unknown types, with unique IDs."""
+    records = []
+    for index in range(4):
+        for resource in RESOURCES:
+            records.append(record({**resource, "id": f"{resource['id']}-{index}"}))
+        records.append(record({"resourceType": "Practitioner", "id": f"practitioner-{index}"}))
+        records.append(record({"resourceType": "Basic", "id": f"basic-{index}"}))
+    return records
+
+
+@pytest.mark.parametrize("validate", [True, False])
+@pytest.mark.parametrize("use_executor", [False, True])
+def test_sanitize_records_in_processes(validate, use_executor):
+    """Test that the records sanitized in chunks by worker processes keep the input order."""
+    records = make_records()
+    expected_records, expected_errors = FHIRResourceSanitizer.sanitize_records(records, validate)
+
+    if use_executor:
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            sanitized_records, errors = FHIRResourceSanitizer.sanitize_records(
+                records, validate, num_workers=2, chunk_size=5, executor=executor
+            )
+    else:
+        sanitized_records, errors = FHIRResourceSanitizer.sanitize_records(
+            records, validate, num_workers=2, chunk_size=5
+        )
+
+    assert [item["resource"]["id"] for item in sanitized_records] == [
+        item["resource"]["id"]
+        for item in records
+        if item["resource"]["resourceType"] not in ("Practitioner", "Basic")
+    ]
+    assert sanitized_records == expected_records
+    assert errors == expected_errors == [f"Basic type, id=basic-{index}" for index in range(4)]
+
+
+def test_sanitizer_op_reuses_process_pool(fragment):
+    """Test that the operator sanitizes in one process pool across compute calls."""
+    op = FhirResourceSanitizerOp(fragment, num_workers=2, chunk_size=5)
+    records = make_records()
+    expected_records, _ = FHIRResourceSanitizer.sanitize_records(records)
+
+    class Input:
+        def receive(self, name):
+            return FHIRQueryResponse("request", {"patient-1": records})
+
+    class Output:
+        def __init__(self):
+            self.values = []
+
+        def emit(self, value, name):
+            self.values.append(FHIRQueryResponse.from_json(value))
+
+    op_output = Output()
+    op.compute(Input(), op_output, None)
+    executor = op._executor
+    assert executor is not None
+    op.compute(Input(), op_output, None)
+    assert op._executor is executor
+    op.stop()
+    assert op._executor is None
+
+    for response in op_output.values:
+        assert response.patient_resources == {"patient-1": expected_records}
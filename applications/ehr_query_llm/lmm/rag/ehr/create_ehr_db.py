@@ -15,15 +15,20 @@
 
 # BE SURE TO HAVE FHIR APP RUNNING BEFORE STARTING THIS SCRIPT
 
+import hashlib
 import logging
+import os
 import signal
 import sys
 import time
+from functools import lru_cache
 from threading import Thread
 from typing import Optional
 
 import zmq
+from langchain.embeddings import CacheBackedEmbeddings
 from langchain.schema.document import Document
+from langchain.storage import LocalFileStore
 from langchain_community.embeddings import HuggingFaceBgeEmbeddings
 from langchain_community.vectorstores import Chroma
 
@@ -51,6 +56,19 @@ EHR_FINETUNED_MODEL = "/workspace/volumes/models/bge-large-ehr-finetune"
 CACHE_FOLDER = "/workspace/volumes/models"
 PERSISTENT_FOLDER = "/workspace/holohub/applications/ehr_query_llm/lmm/rag/ehr/db"
 
+# The collection name for the set of docs in the vector database, as read by the EHR agent.
+COLLECTION_NAME = "ehr_rag"
+
+# Embedding settings: the device and the sentence-transformers backend ("torch", "onnx" or
+# "openvino") used to run the model, and the number of documents embedded per batch.
+EMBEDDING_DEVICE = "cuda"
+EMBEDDING_BACKEND = "torch"
+EMBEDDING_BATCH_SIZE = 32
+
+# Embeddings are cached on disk, keyed by the hash of the embedded text, so that unchanged
+# documents are not embedded again across runs.
+EMBEDDING_CACHE_FOLDER = os.path.join(CACHE_FOLDER, "ehr_embedding_cache")
+
 
 def get_ehr_data(
     allow_requested_only: Optional[bool] = True,
@@ -110,23 +128,75 @@ def stop(signum=None, frame=None):
     sys.exit()
 
 
-def create_db(documents):
+@lru_cache(maxsize=4)
+def get_embedding_model(
+    device: str = EMBEDDING_DEVICE,
+    backend: str = EMBEDDING_BACKEND,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+):
     """
-    Creates a Vector DB using the provided documents
+    Returns the EHR embedding model, wrapped with a persistent cache of the computed embeddings.
+
+    The model is only loaded once per process for a given configuration.
     """
-    model_name = EHR_FINETUNED_MODEL
-    model_kwargs = {"device": "cuda"}
-    encode_kwargs = {"normalize_embeddings": True}
+    model_kwargs = {"device": device, "backend": backend}
+    encode_kwargs = {"normalize_embeddings": True, "batch_size": batch_size}
     embedding_model = HuggingFaceBgeEmbeddings(
-        model_name=model_name,
+        model_name=EHR_FINETUNED_MODEL,
         model_kwargs=model_kwargs,
         encode_kwargs=encode_kwargs,
         cache_folder=CACHE_FOLDER,
     )
-    chroma_db = Chroma.from_documents(
-        documents, embedding_model, persist_directory=PERSISTENT_FOLDER
+    # The cached embeddings depend on the model and on the backend running it.
+    namespace = f"{os.path.basename(EHR_FINETUNED_MODEL)}-{backend}"
+    return CacheBackedEmbeddings.from_bytes_store(
+        embedding_model,
+        LocalFileStore(EMBEDDING_CACHE_FOLDER),
+        namespace=namespace,
+        batch_size=batch_size,
+        query_embedding_cache=True,
+    )
+
+
+def get_document_id(document: Document) -> str:
+    """Returns the content hash used as the ID of a document in the vector DB."""
+    return hashlib.sha256(document.page_content.encode("utf-8")).hexdigest()
+
+
+def create_db(
+    documents,
+    device: str = EMBEDDING_DEVICE,
+    backend: str = EMBEDDING_BACKEND,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+):
+    """
+    Creates or incrementally updates the Vector DB using the provided documents.
+
+    Documents are keyed by the hash of their content, so only the documents not yet in the DB
+    are embedded and added, and the documents no longer present are removed.
+    """
+    documents_by_id = {get_document_id(document): document for document in documents}
+
+    chroma_db = Chroma(
+        persist_directory=PERSISTENT_FOLDER,
+        embedding_function=get_embedding_model(device, backend, batch_size),
+        collection_name=COLLECTION_NAME,
+    )
+    existing_ids = set(chroma_db.get(include=[])["ids"])
+
+    stale_ids = [doc_id for doc_id in existing_ids if doc_id not in documents_by_id]
+    if stale_ids:
+        chroma_db.delete(ids=stale_ids)
+
+    new_ids = [doc_id for doc_id in documents_by_id if doc_id not in existing_ids]
+    for start in range(0, len(new_ids), batch_size):
+        batch_ids = new_ids[start : start + batch_size]
+        chroma_db.add_documents([documents_by_id[doc_id] for doc_id in batch_ids], ids=batch_ids)
+
+    logging.info(
+        f"EHR vector db: {len(new_ids)} documents added, {len(stale_ids)} removed, "
+        f"{len(documents_by_id) - len(new_ids)} unchanged."
     )
-    chroma_db.persist()
 
 
 def update_ehr_dict(flattened_ehr, summary, date_str):
@@ -166,13 +236,14 @@ def flatten_ehr(ehr_dict):
             elif resource["resourceType"] == "Observation":
 
                 # Collect stats of entries missing key attributes
-                if "categories" not in [x.lower() for x in resource.keys()]:
+                keys = {key.lower() for key in resource}
+                if "categories" not in keys:
                     num_entry_missing_categories += 1
                     resource["categories"] = ""
                     logging.warning(
                         f"Missing 'categories' attribute in resource entry: {entry.get('fullUrl', '')}"
                     )
-                if "date" not in [x.lower() for x in resource.keys()]:
+                if "date" not in keys:
                     num_entry_no_date += 1
                     resource["date"] = ""
                     logging.warning(
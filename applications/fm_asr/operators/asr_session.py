@@ -0,0 +1,176 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Long-lived bidirectional streaming recognition session.
+
+Audio chunks are queued in a bounded queue and sent exactly once over a single streaming call,
+while a reader thread collects the responses of the call. The session does not depend on the
+Riva client, the streaming call and the requests are created by the callables it is given.
+"""
+
+import queue
+import threading
+from collections import deque
+
+# Marker closing the request stream of a call
+_END_OF_STREAM = object()
+
+
+class _Stream:
+    """A single streaming call, with the queue feeding its requests and its reader thread"""
+
+    def __init__(self, recognize, config_request, max_pending):
+        self.requests = queue.Queue(maxsize=max_pending)
+        self.responses = deque()
+        self.bytes_sent = 0
+        self.closed = False
+        self.error = None
+        self.done = threading.Event()
+        self._recognize = recognize
+        self._config_request = config_request
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+    def _request_iterator(self):
+        # consumed by the sender thread of the call
+        yield self._config_request
+        while True:
+            request = self.requests.get()
+            if request is _END_OF_STREAM:
+                return
+            yield request
+
+    def _read(self):
+        try:
+            for response in self._recognize(self._request_iterator()):
+                self.responses.append(response)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+    def put(self, request, timeout=0.1):
+        """Queues a request, returning False if the call ended before it could be queued"""
+        while not self.done.is_set():
+            try:
+                self.requests.put(request, timeout=timeout)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def close(self):
+        """Ends the request stream, the call finishes once the server sent its last results"""
+        if not self.closed:
+            self.closed = True
+            self.put(_END_OF_STREAM)
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+
+class StreamingAsrSession:
+    """Feeds audio to one streaming recognition call at a time
+
+    Parameters
+    ----------
+    recognize      : callable opening the streaming call, taking an iterator of requests and
+                     returning an iterator of responses, e.g. a gRPC stream-stream method
+    config_request : first request of every call, carrying the streaming configuration
+    audio_request  : callable returning the request carrying a chunk of audio bytes
+    rollover_bytes : number of audio bytes after which the call is closed and the next chunk
+                     starts a new one, None to keep the call open until the session is closed
+    max_pending    : maximum number of audio requests queued but not yet sent
+
+    A call ends on rollover, or when it fails, in which case the error is kept in
+    ``last_error`` and the next chunk reconnects with a new call. ``poll`` returns the responses
+    of the calls in order, and reports the end of each call once all of its responses were
+    returned.
+    """
+
+    def __init__(
+        self, recognize, config_request, audio_request, rollover_bytes=None, max_pending=64
+    ):
+        assert rollover_bytes is None or rollover_bytes > 0
+        assert max_pending > 0
+        self.recognize = recognize
+        self.config_request = config_request
+        self.audio_request = audio_request
+        self.rollover_bytes = rollover_bytes
+        self.max_pending = max_pending
+        self.num_calls = 0
+        self.last_error = None
+        # calls whose responses were not all returned yet, the last one receives new audio
+        self._streams = deque()
+
+    def _current_stream(self):
+        stream = self._streams[-1] if self._streams else None
+        if stream is None or stream.closed or stream.done.is_set():
+            stream = _Stream(self.recognize, self.config_request, self.max_pending)
+            self._streams.append(stream)
+            self.num_calls += 1
+        return stream
+
+    def send(self, audio):
+        """Queues a chunk of audio bytes to be sent once on the current call
+
+        Blocks while the queue of pending requests is full. If the call failed, reconnects once
+        with a new call, and returns False if that call also failed, the chunk is then dropped.
+        """
+        request = self.audio_request(audio)
+        stream = self._current_stream()
+        if not stream.put(request):
+            stream = self._current_stream()
+            if not stream.put(request):
+                return False
+        stream.bytes_sent += len(audio)
+        if self.rollover_bytes is not None and stream.bytes_sent >= self.rollover_bytes:
+            self.rollover()
+        return True
+
+    def rollover(self):
+        """Closes the current call, the next chunk of audio starts a new one"""
+        if self._streams:
+            self._streams[-1].close()
+
+    def poll(self):
+        """Returns the responses received so far without blocking
+
+        Returns
+        -------
+        (responses, ended) where ended is True if the call the responses belong to has ended
+        and all of its responses were returned. The responses of later calls are returned by
+        the next polls.
+        """
+        responses = []
+        if not self._streams:
+            return responses, False
+        stream = self._streams[0]
+        # read the state before draining, so that no response arriving after it is missed
+        ended = stream.done.is_set()
+        while stream.responses:
+            responses.append(stream.responses.popleft())
+        if ended:
+            self._streams.popleft()
+            if stream.error is not None:
+                self.last_error = stream.error
+        return responses, ended
+
+    def close(self, timeout=None):
+        """Closes the current call and waits for its reader thread to finish"""
+        for stream in self._streams:
+            stream.close()
+        for stream in self._streams:
+            stream.join(timeout)
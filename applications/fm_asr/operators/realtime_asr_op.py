@@ -13,7 +13,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from collections import deque
 from copy import deepcopy
 
 import numpy as np
@@ -21,11 +20,17 @@ import nvtx
 import riva.client
 import riva.client.proto.riva_asr_pb2 as rasr
 from holoscan.core import Operator, OperatorSpec
+from operators.asr_session import StreamingAsrSession
 
 
 class RealtimeAsrOp(Operator):
     """
     Execute Riva ASR requests.
+
+    The audio is streamed over a single long-lived StreamingRecognize call, each chunk being
+    sent once. The call is rolled over every `recognize_interval` seconds of audio, and the
+    responses received so far are emitted on every compute, together with a flag set once the
+    responses of a call are complete.
     """
 
     def __init__(self, *args, **kwargs):
@@ -50,12 +55,14 @@ class RealtimeAsrOp(Operator):
             config=deepcopy(self.rasr_config), interim_results=riva_params["interim_transcriptions"]
         )
 
-        # variables to control frequency of gRPC calls
-        self.batch = deque([])
-        self.batch_len = 0
-        self.time_inc = 0.1
-        self.start_t = 0
-        self.curr_t = 0
+        pcm_bytes = np.dtype(np.int16).itemsize
+        self.session = StreamingAsrSession(
+            self._recognize,
+            rasr.StreamingRecognizeRequest(streaming_config=self.streaming_rasr_config),
+            lambda audio: rasr.StreamingRecognizeRequest(audio_content=audio),
+            rollover_bytes=int(self.riva_recog_interval * self.sample_rate) * pcm_bytes,
+            max_pending=riva_params.get("max_pending_requests", 64),
+        )
 
         del kwargs["params"]
         super().__init__(*args, **kwargs)
@@ -67,38 +74,20 @@ class RealtimeAsrOp(Operator):
     @nvtx.annotate("asr_compute", color="green")
     def compute(self, op_input, op_output, context):
         signal = op_input.receive("rx_sig")
-        rasr_req = rasr.StreamingRecognizeRequest(audio_content=signal)
-        self.batch.append(rasr_req)
-        self.batch_len += len(self.batch[-1].audio_content)
+        with nvtx.annotate("asr_send", color="black"):
+            self.session.send(signal)
 
-        asr_responses = None
-        self.curr_t = self._get_audio_length()
-        buff_cleared = False
-        if (
-            self.curr_t - self.start_t
-        ) > self.time_inc:  # need to prevent huge amount of RPC requests
-            self.start_t = self.curr_t
-            with nvtx.annotate("asr_rpc", color="black"):
-                # asynchronous call. latency not realized unless access is attempted.
-                asr_responses = self.asr_service.stub.StreamingRecognize(
-                    self._req_generator(), metadata=self.asr_service.auth.get_auth_metadata()
-                )
-        if self._get_audio_length() >= self.riva_recog_interval:
-            self.batch.clear()
-            self.batch_len = 0
-            self.start_t = 0
-            buff_cleared = True
-        out = (asr_responses, buff_cleared)
+        asr_responses, buff_cleared = self.session.poll()
+        if self.session.last_error is not None:
+            print(f"Riva streaming call failed, reconnecting: {self.session.last_error}")
+            self.session.last_error = None
+        out = (asr_responses or None, buff_cleared)
         op_output.emit(out, "asr_responses")
 
-    def _req_generator(self):
-        yield rasr.StreamingRecognizeRequest(streaming_config=self.streaming_rasr_config)
-        for b in self.batch:
-            yield b
+    def stop(self):
+        self.session.close()
 
-    def _get_audio_length(self):
-        pcm_dtype = np.int16
-        pcm_bytes = np.dtype(pcm_dtype).itemsize
-        num_samples = self.batch_len / pcm_bytes
-        audio_time = num_samples / self.sample_rate
-        return audio_time
+    def _recognize(self, requests):
+        return self.asr_service.stub.StreamingRecognize(
+            requests, metadata=self.asr_service.auth.get_auth_metadata()
+        )
@@ -57,9 +57,10 @@ class TranscriptHandler(threading.Thread):
                         partial_transcript = ""
                         for result in response.results:
                             if result.is_final:
-                                for index, alternative in enumerate(result.alternatives):
-                                    print(alternative.transcript, end="\r")
-                                    self.transcript = alternative.transcript
+                                # a streaming call returns one final result per utterance
+                                transcript = result.alternatives[0].transcript.strip()
+                                self.transcript = f"{self.transcript} {transcript}".strip()
+                                print(self.transcript, end="\r")
                             else:
                                 transcript = result.alternatives[0].transcript
                                 partial_transcript += transcript
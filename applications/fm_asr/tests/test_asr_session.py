@@ -0,0 +1,182 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import threading
+import time
+import unittest
+from concurrent import futures
+
+import grpc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from operators.asr_session import StreamingAsrSession  # noqa: E402
+
+METHOD = "/FakeRecognizer/StreamingRecognize"
+CONFIG_REQUEST = b"config"
+CHUNK_BYTES = 3200  # 0.1 s of 16 kHz PCM16 audio
+
+
+def _identity(data):
+    return data
+
+
+class FakeRecognizer:
+    """Local gRPC server echoing the size of each received audio chunk as a response, and
+    counting the bytes received on each call"""
+
+    def __init__(self, fail_after=None):
+        self.calls = []
+        self.fail_after = fail_after
+        self._lock = threading.Lock()
+        handler = grpc.method_handlers_generic_handler(
+            "FakeRecognizer",
+            {
+                "StreamingRecognize": grpc.stream_stream_rpc_method_handler(
+                    self._recognize, request_deserializer=_identity, response_serializer=_identity
+                )
+            },
+        )
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        self.server.add_generic_rpc_handlers((handler,))
+        port = self.server.add_insecure_port("localhost:0")
+        self.server.start()
+        self.channel = grpc.insecure_channel(f"localhost:{port}")
+        self.stub = self.channel.stream_stream(
+            METHOD, request_serializer=_identity, response_deserializer=_identity
+        )
+
+    def _recognize(self, requests, context):
+        received = []
+        with self._lock:
+            self.calls.append(received)
+        for request in requests:
+            received.append(request)
+            if request == CONFIG_REQUEST:
+                continue
+            if self.fail_after is not None and len(received) > self.fail_after:
+                context.abort(grpc.StatusCode.UNAVAILABLE, "recognizer restarted")
+            yield str(len(request)).encode()
+
+    def bytes_received(self):
+        with self._lock:
+            return sum(len(request) for call in self.calls for request in call)
+
+    def close(self):
+        self.channel.close()
+        self.server.stop(None)
+
+
+class TestStreamingAsrSession(unittest.TestCase):
+    """Test cases for the streaming recognition session against a local fake recognizer"""
+
+    def setUp(self):
+        self.recognizer = FakeRecognizer()
+
+    def tearDown(self):
+        self.recognizer.close()
+
+    def _session(self, recognizer, **kwargs):
+        return StreamingAsrSession(recognizer.stub, CONFIG_REQUEST, bytes, **kwargs)
+
+    def _stream(self, session, num_chunks):
+        for i in range(num_chunks):
+            session.send(bytes([i % 256]) * CHUNK_BYTES)
+        session.close(timeout=10)
+
+    def _poll_all(self, session):
+        responses, num_ended = [], 0
+        while True:
+            polled, ended = session.poll()
+            responses.extend(polled)
+            num_ended += ended
+            if not polled and not ended:
+                return responses, num_ended
+
+    def test_bytes_sent_scale_linearly(self):
+        num_chunks = [10, 20, 40]
+        sent = []
+        for n in num_chunks:
+            recognizer = FakeRecognizer()
+            try:
+                self._stream(self._session(recognizer), n)
+                sent.append(recognizer.bytes_received())
+                self.assertEqual(len(recognizer.calls), 1)
+            finally:
+                recognizer.close()
+        for n, b in zip(num_chunks, sent):
+            self.assertEqual(b, len(CONFIG_REQUEST) + n * CHUNK_BYTES)
+
+    def test_chunks_sent_once_in_order(self):
+        session = self._session(self.recognizer)
+        self._stream(session, 5)
+        (received,) = self.recognizer.calls
+        self.assertEqual(received[0], CONFIG_REQUEST)
+        self.assertEqual([r[0] for r in received[1:]], list(range(5)))
+        responses, num_ended = self._poll_all(session)
+        self.assertEqual(responses, [str(CHUNK_BYTES).encode()] * 5)
+        self.assertEqual(num_ended, 1)
+
+    def test_rollover(self):
+        session = self._session(self.recognizer, rollover_bytes=4 * CHUNK_BYTES)
+        self._stream(session, 10)
+        self.assertEqual(session.num_calls, 3)
+        # a call may still be finishing when the next one starts
+        self.assertEqual(sorted(len(call) for call in self.recognizer.calls), [3, 5, 5])
+        self.assertEqual(
+            self.recognizer.bytes_received(), 3 * len(CONFIG_REQUEST) + 10 * CHUNK_BYTES
+        )
+
+        # the responses of a call are all returned before its end is reported
+        ends = []
+        for _ in range(3):
+            responses, ended = session.poll()
+            ends.append((len(responses), ended))
+        self.assertEqual(ends, [(4, True), (4, True), (2, True)])
+        self.assertEqual(session.poll(), ([], False))
+
+    def test_poll_does_not_block(self):
+        session = self._session(self.recognizer)
+        session.send(b"\0" * CHUNK_BYTES)
+        start = time.monotonic()
+        session.poll()
+        self.assertLess(time.monotonic() - start, 0.5)
+        session.close(timeout=10)
+
+    def test_reconnect_after_failure(self):
+        recognizer = FakeRecognizer(fail_after=2)
+        try:
+            session = self._session(recognizer, max_pending=1)
+            for _ in range(2):
+                session.send(b"\0" * CHUNK_BYTES)
+            # wait for the call to fail
+            stream = session._streams[-1]
+            stream.done.wait(10)
+            self.assertTrue(session.send(b"\1" * CHUNK_BYTES))
+            self.assertEqual(session.num_calls, 2)
+            session.close(timeout=10)
+
+            _, num_ended = self._poll_all(session)
+            self.assertEqual(num_ended, 2)
+            self.assertIsInstance(session.last_error, grpc.RpcError)
+            self.assertEqual(recognizer.calls[-1], [CONFIG_REQUEST, b"\1" * CHUNK_BYTES])
+        finally:
+            recognizer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -14,8 +14,11 @@
 # limitations under the License.
 
 import glob
+import hashlib
+import json
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from types import SimpleNamespace
 
 import yaml
@@ -23,11 +26,119 @@ from langchain.docstore.document import Document
 from langchain_community.document_loaders import PyPDFLoader  # for loading the pdf
 from langchain_community.embeddings import HuggingFaceBgeEmbeddings
 from langchain_community.vectorstores import Chroma
-from utils import clone_repository, get_source_chunks
+from utils import clone_repository, get_source_chunks, get_text_splitter
 
 current_dir = os.path.dirname(__file__)
 CHROMA_DB_PATH = f"{current_dir}/embeddings/holoscan"
 
+# Dictionary used to map the file types to store to their language
+FILE_TYPES = {
+    ".md": "markdown",
+    ".py": "python",
+    ".cpp": "cpp",
+    ".yaml": None,
+}
+
+# Name of the file, stored next to the Chroma DB, mapping each source to its content hash
+# and the IDs of its chunks in the DB
+MANIFEST_FILE = "manifest.json"
+
+# 5461 is the max batch size for the BAAI/bge-large-en model
+MAX_BATCH_SIZE = 5461
+
+
+def find_source_files(root_dirs, file_types=FILE_TYPES):
+    """
+    Walks each directory once and returns the (path, language) of every file of the given types
+    """
+    source_files = []
+    for root_dir in root_dirs:
+        for root, dirs, files in os.walk(root_dir):
+            for file in files:
+                extension = os.path.splitext(file)[1].lower()
+                if extension in file_types:
+                    source_files.append((os.path.join(root, file), file_types[extension]))
+    return source_files
+
+
+def get_content_hash(content):
+    """
+    Returns the SHA-256 hash of the given str or bytes content
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8", errors="ignore")
+    return hashlib.sha256(content).hexdigest()
+
+
+def get_chunk_ids(source, num_chunks):
+    """
+    Returns the stable DB IDs of the chunks of a source
+    """
+    return [get_content_hash(f"{source}:{index}") for index in range(num_chunks)]
+
+
+def load_source_file(task):
+    """
+    Reads and chunks a source file, skipping the chunking when its content hash is unchanged.
+
+    Args:
+        task: a (path, language, previous content hash or None) tuple
+
+    Returns:
+        A (path, content hash, chunks) tuple, where chunks is None if the file is unchanged
+    """
+    path, language, previous_hash = task
+    with open(path, "r", errors="ignore") as f:
+        content = f.read()
+    content_hash = get_content_hash(content)
+    if content_hash == previous_hash:
+        return path, content_hash, None
+    chunks = get_text_splitter(language).split_text(content)
+    return path, content_hash, chunks
+
+
+def load_manifest(chroma_db_path):
+    """
+    Loads the manifest of the sources stored in the Chroma DB, or returns None if there is none
+    """
+    manifest_path = os.path.join(chroma_db_path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def save_manifest(chroma_db_path, manifest):
+    """
+    Atomically writes the manifest of the sources stored in the Chroma DB
+    """
+    os.makedirs(chroma_db_path, exist_ok=True)
+    manifest_path = os.path.join(chroma_db_path, MANIFEST_FILE)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+
+def clean_pdf_page(page_content):
+    """
+    Removes the line numbers of code and the page headers/footers from a user guide page
+    """
+    # Remove line numbers for code
+    page_content = re.sub(
+        r"^\d+(?!\.)",
+        lambda match: " " * len(match.group(0)),
+        page_content,
+        flags=re.MULTILINE,
+    )
+    # Remove unnecessary text
+    page_content = re.sub(
+        r".*(Holoscan SDK User Guide, Release|Chapter|(continued from previous page|(continues on next page))).*\n?",
+        "",
+        page_content,
+    )
+    return page_content
+
 
 def main():
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -35,96 +146,101 @@ def main():
     with open(config_path) as f:
         yaml_config = yaml.safe_load(f)
     config = SimpleNamespace(**yaml_config)
-    # Define the repos, docs, and file types to store
+    # Define the repos and docs to store
     repos = ["holoscan-sdk", "holohub"]
     docs = glob.glob(os.path.join(current_dir, "docs", "*.pdf"))
-    file_types = [".md", ".py", ".cpp", ".yaml"]
 
-    content_lists = {file_type: [] for file_type in file_types}
-    total_files = 0
+    chroma_db_path = os.path.join(current_dir, config.chroma_db_dir)
+    previous_manifest = load_manifest(chroma_db_path)
+    is_incremental = previous_manifest is not None
+    previous_manifest = previous_manifest or {}
+    manifest = {}
+    # Chunks to add to the DB, keyed by their ID
+    new_chunks = {}
+
+    def update_source(source, content_hash, chunks):
+        """Records the new chunks of a source, or keeps its previous entry if chunks is None"""
+        if chunks is None:
+            manifest[source] = previous_manifest[source]
+            return
+        ids = get_chunk_ids(source, len(chunks))
+        manifest[source] = {"hash": content_hash, "ids": ids}
+        new_chunks.update(zip(ids, chunks))
 
-    # Loop over each repo and create a Document for each file found
+    # Walk each cloned repo once for all the file types, then read and chunk the files
+    # in parallel, skipping the ones whose content did not change since the last build
     for repo in repos:
         clone_repository(repo, "")
-        for file_type in file_types:
-            for root, dirs, files in os.walk(f"/tmp/{repo}"):
-                for file in files:
-                    if file.lower().endswith(file_type):
-                        total_files += 1
-                        print(f"Processing file: {file}")
-                        print(f"Total files: {total_files}")
-                        with open(os.path.join(root, file), "r", errors="ignore") as f:
-                            content = f.read()
-                            content_lists[file_type].append(
-                                Document(
-                                    page_content=content,
-                                    metadata={"source": os.path.join(root, file)},
-                                )
-                            )
-
-    # Loop over the user guide and create a Document for each page
-    content_lists[".pdf"] = []
+    source_files = find_source_files([f"/tmp/{repo}" for repo in repos])
+    tasks = [
+        (path, language, previous_manifest.get(path, {}).get("hash"))
+        for path, language in source_files
+    ]
+    with ProcessPoolExecutor() as executor:
+        for path, content_hash, chunks in executor.map(load_source_file, tasks, chunksize=32):
+            if chunks is not None:
+                chunks = [
+                    Document(page_content=chunk, metadata={"source": path}) for chunk in chunks
+                ]
+            update_source(path, content_hash, chunks)
+
+    # Load the user guide and create a Document for each page, unless it is unchanged
     for doc in docs:
+        with open(doc, "rb") as f:
+            content_hash = get_content_hash(f.read())
+        if previous_manifest.get(doc, {}).get("hash") == content_hash:
+            update_source(doc, content_hash, None)
+            continue
         loader = PyPDFLoader(doc)
         pages = loader.load_and_split()
         print("doc length: ", len(pages))
-        for page in pages:
-            page_content = page.page_content
-            # Remove line numbers for code
-            page_content = re.sub(
-                r"^\d+(?!\.)",
-                lambda match: " " * len(match.group(0)),
-                page_content,
-                flags=re.MULTILINE,
-            )
-            # Remove unnecessary text
-            page_content = re.sub(
-                r".*(Holoscan SDK User Guide, Release|Chapter|(continued from previous page|(continues on next page))).*\n?",
-                "",
-                page_content,
-            )
-            content_lists[".pdf"].append(
-                Document(page_content=page_content, metadata={"userguide": doc})
-            )
-
-    # Dictionary used to map file type to language
-    ext_to_language = {
-        ".py": "python",
-        ".cpp": "cpp",
-        ".md": "markdown",
-        ".yaml": None,
-        ".pdf": None,
-    }
-    source_chunks = []
-    content_len = 0
-
-    for file_ext, content in content_lists.items():
-        content_len += len(content)
-        source_chunks += get_source_chunks(content, ext_to_language[file_ext])
-
-    model_name = "BAAI/bge-large-en"
-    model_kwargs = {"device": "cuda"}
-    encode_kwargs = {"normalize_embeddings": True}  # set True to compute cosine similarity
-
-    # Create local embedding model cached at ./models
-    embedding_model = HuggingFaceBgeEmbeddings(
-        model_name=model_name,
-        model_kwargs=model_kwargs,
-        encode_kwargs=encode_kwargs,
-        cache_folder=os.path.join(current_dir, config.model_cache_dir),
-    )
-    chroma_db_path = os.path.join(current_dir, config.chroma_db_dir)
-    print(f"Length of content: {content_len}")
-    print(f"Total number of files to process: {total_files}")
-    print(f"Number of source chunks: {len(source_chunks)}")
+        pages = [
+            Document(page_content=clean_pdf_page(page.page_content), metadata={"userguide": doc})
+            for page in pages
+        ]
+        update_source(doc, content_hash, get_source_chunks(pages))
+
+    # Chunks of sources that changed or no longer exist
+    stale_ids = [
+        chunk_id
+        for source, entry in previous_manifest.items()
+        if manifest.get(source) is not entry
+        for chunk_id in entry["ids"]
+    ]
+
+    print(f"Total number of files to process: {len(source_files) + len(docs)}")
+    print(f"Number of new source chunks: {len(new_chunks)}")
+    print(f"Number of stale source chunks: {len(stale_ids)}")
     print(f"Building Holoscan Embeddings Chroma DB at {chroma_db_path}...")
     print("Building Chroma DB (This may take a few minutes)...")
 
-    max_batch_size = 5461  # 5461 is the max batch size for the BAAI/bge-large-en model
-    for i in range(0, len(source_chunks), max_batch_size):
-        batch = source_chunks[i : i + max_batch_size]
-        chroma_db = Chroma.from_documents(batch, embedding_model, persist_directory=chroma_db_path)
-        chroma_db.persist()
+    embedding_model = None
+    if new_chunks:
+        model_name = "BAAI/bge-large-en"
+        model_kwargs = {"device": "cuda"}
+        encode_kwargs = {"normalize_embeddings": True}  # set True to compute cosine similarity
+
+        # Create local embedding model cached at ./models
+        embedding_model = HuggingFaceBgeEmbeddings(
+            model_name=model_name,
+            model_kwargs=model_kwargs,
+            encode_kwargs=encode_kwargs,
+            cache_folder=os.path.join(current_dir, config.model_cache_dir),
+        )
+    chroma_db = Chroma(persist_directory=chroma_db_path, embedding_function=embedding_model)
+
+    if not is_incremental:
+        # The DB was not built incrementally before, so none of its chunks can be matched
+        stale_ids = chroma_db.get(include=[])["ids"]
+    for i in range(0, len(stale_ids), MAX_BATCH_SIZE):
+        chroma_db.delete(ids=stale_ids[i : i + MAX_BATCH_SIZE])
+
+    new_ids = list(new_chunks)
+    for i in range(0, len(new_ids), MAX_BATCH_SIZE):
+        batch_ids = new_ids[i : i + MAX_BATCH_SIZE]
+        chroma_db.add_documents([new_chunks[chunk_id] for chunk_id in batch_ids], ids=batch_ids)
+
+    save_manifest(chroma_db_path, manifest)
     print("Done!")
 
 
@@ -13,13 +13,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
 import os
 import re
 import subprocess
 import sys
+import tempfile
 import unittest
 from unittest.mock import Mock, patch
 
+import yaml
+
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
@@ -37,6 +41,14 @@ class TestBuildHoloscanDB(unittest.TestCase):
         if match:
             return match.group(1)
 
+    def _patch_chroma_db_dir(self, chroma_db_dir):
+        """Patch the config read by build_holoscan_db.main to store the DB in chroma_db_dir"""
+        safe_load = yaml.safe_load
+        return patch(
+            "build_holoscan_db.yaml.safe_load",
+            lambda f: {**safe_load(f), "chroma_db_dir": chroma_db_dir},
+        )
+
     def _download_pdf_if_needed(self, pdf_url, pdf_path):
         """Download PDF if it doesn't exist"""
         if os.path.exists(pdf_path):
@@ -90,13 +102,106 @@ class TestBuildHoloscanDB(unittest.TestCase):
             from build_holoscan_db import main
 
             try:
-                main()
+                # Build in a temporary DB, which leaves the DB of the checkout as is
+                with tempfile.TemporaryDirectory() as tmp_dir, self._patch_chroma_db_dir(tmp_dir):
+                    main()
                 success = True
             except Exception as e:
                 success = False
                 print(f"Database building failed: {e}")
             self.assertTrue(success, "Database building should succeed when PDF is available")
 
+    def test_incremental_source_loading(self):
+        """Test that source files are found in one walk and unchanged files are not re-chunked"""
+        from build_holoscan_db import find_source_files, load_source_file
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.makedirs(os.path.join(tmp_dir, "sub"))
+            for name in ["app.py", "README.MD", "sub/op.cpp", "sub/config.yaml", "notes.txt"]:
+                with open(os.path.join(tmp_dir, name), "w") as f:
+                    f.write(f"content of {name}\n" * 200)
+
+            source_files = dict(find_source_files([tmp_dir]))
+            self.assertEqual(
+                sorted(os.path.relpath(path, tmp_dir) for path in source_files),
+                [
+                    "README.MD",
+                    "app.py",
+                    os.path.join("sub", "config.yaml"),
+                    os.path.join("sub", "op.cpp"),
+                ],
+            )
+            self.assertEqual(source_files[os.path.join(tmp_dir, "app.py")], "python")
+
+            path = os.path.join(tmp_dir, "app.py")
+            _, content_hash, chunks = load_source_file((path, "python", None))
+            self.assertGreater(len(chunks), 1)
+            _, unchanged_hash, unchanged_chunks = load_source_file((path, "python", content_hash))
+            self.assertEqual(unchanged_hash, content_hash)
+            self.assertIsNone(unchanged_chunks)
+
+    @patch("build_holoscan_db.clone_repository")
+    @patch("build_holoscan_db.glob.glob", return_value=[])
+    @patch("build_holoscan_db.HuggingFaceBgeEmbeddings")
+    def test_incremental_db_build(self, mock_embeddings, mock_glob, mock_clone):
+        """Test that only the chunks of changed and deleted files are updated in the DB"""
+        import build_holoscan_db
+        from langchain_community.embeddings import DeterministicFakeEmbedding
+        from langchain_community.vectorstores import Chroma
+
+        mock_embeddings.return_value = DeterministicFakeEmbedding(size=16)
+        find_source_files = build_holoscan_db.find_source_files
+
+        with tempfile.TemporaryDirectory() as src_dir, tempfile.TemporaryDirectory() as db_dir:
+            files = {"app.py": "print('app')\n", "op.cpp": "int op();\n", "README.md": "# Op\n"}
+
+            def write_files():
+                for name, content in files.items():
+                    with open(os.path.join(src_dir, name), "w") as f:
+                        f.write(content * 100)
+
+            def build_db():
+                mock_embeddings.reset_mock()
+                with self._patch_chroma_db_dir(db_dir), patch(
+                    "build_holoscan_db.find_source_files",
+                    lambda root_dirs: find_source_files([src_dir]),
+                ):
+                    build_holoscan_db.main()
+                chunks = Chroma(persist_directory=db_dir).get(include=["metadatas", "documents"])
+                db_sources = {}
+                for chunk_id, metadata, document in zip(
+                    chunks["ids"], chunks["metadatas"], chunks["documents"]
+                ):
+                    name = os.path.basename(metadata["source"])
+                    db_sources.setdefault(name, {})[chunk_id] = document
+                return db_sources
+
+            write_files()
+            db_sources = build_db()
+            self.assertEqual(sorted(db_sources), sorted(files))
+            mock_embeddings.assert_called_once()
+
+            # An unchanged rerun neither embeds nor removes any chunk
+            self.assertEqual(build_db(), db_sources)
+            mock_embeddings.assert_not_called()
+
+            # The changed file is re-embedded, and the chunks of the deleted file are removed
+            files["app.py"] = "print('changed app')\n"
+            write_files()
+            os.remove(os.path.join(src_dir, "op.cpp"))
+            updated_sources = build_db()
+            mock_embeddings.assert_called_once()
+            self.assertEqual(sorted(updated_sources), ["README.md", "app.py"])
+            self.assertEqual(updated_sources["README.md"], db_sources["README.md"])
+            self.assertTrue(
+                all("changed app" in chunk for chunk in updated_sources["app.py"].values())
+            )
+            with open(os.path.join(db_dir, build_holoscan_db.MANIFEST_FILE)) as f:
+                manifest = json.load(f)
+            self.assertEqual(
+                sorted(os.path.basename(source) for source in manifest), ["README.md", "app.py"]
+            )
+
 
 if __name__ == "__main__":
     unittest.main()
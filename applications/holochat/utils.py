@@ -16,6 +16,7 @@
 import base64
 import fnmatch
 import time
+from functools import lru_cache
 
 import git
 import requests
@@ -93,14 +94,7 @@ def get_source_chunks(all_contents, file_type=None, chunk_size=1500, chunk_overl
     it is split according to the syntax of that language (Ex: not splitting python
     functions in the middle)
     """
-    if file_type in ["python", "cpp", "markdown"]:
-        splitter = RecursiveCharacterTextSplitter.from_language(
-            language=file_type, chunk_size=chunk_size, chunk_overlap=chunk_overlap
-        )
-    else:
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size, chunk_overlap=chunk_overlap
-        )
+    splitter = get_text_splitter(file_type, chunk_size, chunk_overlap)
 
     print(f"Turning {file_type} text into chunks ...")
     source_chunks = []
@@ -108,3 +102,15 @@ def get_source_chunks(all_contents, file_type=None, chunk_size=1500, chunk_overl
         for chunk in splitter.split_text(source.page_content):
             source_chunks.append(Document(page_content=chunk, metadata=source.metadata))
     return source_chunks
+
+
+@lru_cache(maxsize=None)
+def get_text_splitter(file_type=None, chunk_size=1500, chunk_overlap=150):
+    """
+    Returns the text splitter for the given language, creating it only once per process
+    """
+    if file_type in ["python", "cpp", "markdown"]:
+        return RecursiveCharacterTextSplitter.from_language(
+            language=file_type, chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        )
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
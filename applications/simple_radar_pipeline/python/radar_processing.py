@@ -0,0 +1,143 @@
+# SPDX-FileCopyrightText: Copyright (c) 2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Batched radar signal processing stages of the simple radar pipeline.
+
+Every stage processes the full (channels x pulses x samples) data cube at once, and takes the
+array module ``xp`` as its first argument, so the same code runs on the GPU with CuPy and on the
+CPU with NumPy.
+"""
+
+import math
+
+# Three-pulse canceller, the convolution of [1, -1] with itself
+MTI_TAPS = (1, -2, 1)
+
+# CFAR window half sizes along the (Doppler, range) axes: the reference window spans
+# 2 * CFAR_REFERENCE + 1 cells and the guard window around the cell under test spans
+# 2 * CFAR_GUARD + 1 cells
+CFAR_REFERENCE = (2, 6)
+CFAR_GUARD = (1, 1)
+
+
+def range_fft_size(num_uncompressed_range_bins, waveform_length):
+    """Returns the FFT size used for pulse compression"""
+    return 2 ** math.ceil(math.log2(max(num_uncompressed_range_bins, waveform_length)))
+
+
+def pulse_compression(xp, x, waveform, num_compressed_range_bins, nfft=None):
+    """Matched filters every pulse of every channel with the windowed waveform
+
+    Parameters
+    ----------
+    x                         : (channels, pulses, samples) complex data cube
+    waveform                  : transmitted complex waveform
+    num_compressed_range_bins : number of range bins kept after compression
+    nfft                      : FFT size, by default the next power of two of the input lengths
+
+    Returns
+    -------
+    (channels, pulses, num_compressed_range_bins) compressed data cube
+    """
+    if nfft is None:
+        nfft = range_fft_size(x.shape[-1], waveform.shape[-1])
+    waveform_windowed = waveform * xp.hamming(waveform.shape[-1])
+    waveform_windowed_norm = waveform_windowed / xp.linalg.norm(waveform_windowed)
+    W = xp.conj(xp.fft.fft(waveform_windowed_norm, nfft))
+    X = xp.fft.fft(x, nfft, axis=-1)
+    X *= W
+    return xp.fft.ifft(X, nfft, axis=-1)[..., :num_compressed_range_bins]
+
+
+def mti_filter(xp, x, taps=MTI_TAPS):
+    """Convolves the pulses of every channel with the MTI canceller taps, keeping valid outputs
+
+    Returns
+    -------
+    (channels, pulses - len(taps) + 1, samples) filtered data cube
+    """
+    num_taps = len(taps)
+    num_pulses = x.shape[-2] - num_taps + 1
+    y = taps[0] * x[..., num_taps - 1 : num_taps - 1 + num_pulses, :]
+    for k in range(1, num_taps):
+        y += taps[k] * x[..., num_taps - 1 - k : num_taps - 1 - k + num_pulses, :]
+    return y
+
+
+def range_doppler(xp, x, ndfft, window=None):
+    """Windows the pulses and converts them to Doppler bins for every channel and range bin
+
+    Returns
+    -------
+    (channels, ndfft, samples) range-Doppler maps
+    """
+    if window is None:
+        window = xp.hamming(x.shape[-2])
+    return xp.fft.fft(x * window[:, None], ndfft, axis=-2)
+
+
+def box_sum(xp, x, half_sizes):
+    """Sums x over a (2 * h + 1) window centered on each cell of the last two axes
+
+    The sums are computed from a summed-area table, cells outside of the map count as zero.
+    """
+    a, b = half_sizes
+    padded = xp.zeros(x.shape[:-2] + (x.shape[-2] + 2 * a + 1, x.shape[-1] + 2 * b + 1), x.dtype)
+    padded[..., a + 1 : a + 1 + x.shape[-2], b + 1 : b + 1 + x.shape[-1]] = x
+    table = xp.cumsum(xp.cumsum(padded, axis=-2), axis=-1)
+    rows, cols = x.shape[-2], x.shape[-1]
+    return (
+        table[..., 2 * a + 1 : 2 * a + 1 + rows, 2 * b + 1 : 2 * b + 1 + cols]
+        - table[..., :rows, 2 * b + 1 : 2 * b + 1 + cols]
+        - table[..., 2 * a + 1 : 2 * a + 1 + rows, :cols]
+        + table[..., :rows, :cols]
+    )
+
+
+def cfar_threshold_factor(xp, shape, pfa, reference=CFAR_REFERENCE, guard=CFAR_GUARD):
+    """Returns the number of reference cells of each cell of a map, and the threshold factor
+    giving the requested probability of false alarm for that number of cells
+    """
+    ones = xp.ones(shape, dtype=xp.float64)
+    num_cells = box_sum(xp, ones, reference) - box_sum(xp, ones, guard)
+    alpha = num_cells * (xp.power(pfa, -1.0 / num_cells) - 1)
+    return num_cells, alpha
+
+
+def cfar(xp, x, pfa, reference=CFAR_REFERENCE, guard=CFAR_GUARD, threshold=None):
+    """Cell-averaging CFAR detector over the last two axes of x
+
+    The noise power of each cell under test is estimated as the mean power of the reference
+    window around it, excluding the guard window.
+
+    Parameters
+    ----------
+    x         : (channels, Doppler, range) complex range-Doppler maps
+    pfa       : probability of false alarm
+    reference : half sizes of the reference window along the last two axes
+    guard     : half sizes of the guard window along the last two axes
+    threshold : optional precomputed result of cfar_threshold_factor for the map shape
+
+    Returns
+    -------
+    (channels, Doppler, range) boolean detection maps
+    """
+    if threshold is None:
+        threshold = cfar_threshold_factor(xp, x.shape[-2:], pfa, reference, guard)
+    num_cells, alpha = threshold
+    power = xp.abs(x) ** 2
+    power64 = power.astype(xp.float64)
+    background = (box_sum(xp, power64, reference) - box_sum(xp, power64, guard)) / num_cells
+    return power > alpha * background
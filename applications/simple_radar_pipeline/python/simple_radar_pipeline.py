@@ -13,26 +13,23 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import math
 import time
 
-try:
-    import numpy as np
-except ImportError:
-    raise ImportError("This demo requires numpy, but it could not be imported.")
-
 try:
     import cupy as cp
 except ImportError:
     raise ImportError("This demo requires cupy, but it could not be imported.")
 
-try:
-    import cusignal
-except ImportError:
-    raise ImportError("This demo requires cusignal, but it could not be imported.")
-
 from holoscan.conditions import CountCondition
 from holoscan.core import Application, Operator, OperatorSpec
+from radar_processing import (
+    cfar,
+    cfar_threshold_factor,
+    mti_filter,
+    pulse_compression,
+    range_doppler,
+    range_fft_size,
+)
 
 # Radar Settings
 num_channels = 16
@@ -44,36 +41,7 @@ NDfft = 256
 Pfa = 1e-5
 iterations = 100
 
-# Window Settings
-window = cusignal.hamming(waveform_length)
-# The -2 is a hack here to account for a 3 tap MTI filter
-range_doppler_window = cp.transpose(
-    cp.repeat(
-        cp.expand_dims(cusignal.hamming(num_pulses - 2), 0), num_compressed_range_bins, axis=0
-    )
-)
-Nfft = 2 ** math.ceil(math.log2(np.max([num_uncompressed_range_bins, waveform_length])))
-
-# CFAR Settings
-mask = cp.transpose(
-    cp.asarray(
-        [
-            [1, 1, 1, 1, 1],
-            [1, 1, 1, 1, 1],
-            [1, 1, 1, 1, 1],
-            [1, 1, 1, 1, 1],
-            [1, 1, 1, 1, 1],
-            [1, 0, 0, 0, 1],
-            [1, 0, 0, 0, 1],
-            [1, 0, 0, 0, 1],
-            [1, 1, 1, 1, 1],
-            [1, 1, 1, 1, 1],
-            [1, 1, 1, 1, 1],
-            [1, 1, 1, 1, 1],
-            [1, 1, 1, 1, 1],
-        ]
-    )
-)
+Nfft = range_fft_size(num_uncompressed_range_bins, waveform_length)
 
 
 class SignalGeneratorOp(Operator):
@@ -86,9 +54,10 @@ class SignalGeneratorOp(Operator):
         spec.output("waveform")
 
     def compute(self, op_input, op_output, context):
-        x = cp.random.randn(
-            num_pulses, num_uncompressed_range_bins, dtype=cp.float32
-        ) + 1j * cp.random.randn(num_pulses, num_uncompressed_range_bins, dtype=cp.float32)
+        shape = (num_channels, num_pulses, num_uncompressed_range_bins)
+        x = cp.random.randn(*shape, dtype=cp.float32) + 1j * cp.random.randn(
+            *shape, dtype=cp.float32
+        )
         waveform = cp.random.randn(waveform_length, dtype=cp.float32) + 1j * cp.random.randn(
             waveform_length, dtype=cp.float32
         )
@@ -112,21 +81,10 @@ class PulseCompressionOp(Operator):
         x = op_input.receive("x")
         waveform = op_input.receive("waveform")
 
-        waveform_windowed = waveform * window
-        waveform_windowed_norm = waveform_windowed / cp.linalg.norm(waveform_windowed)
-
-        W = cp.conj(cp.fft.fft(waveform_windowed_norm, Nfft))
-        X = cp.fft.fft(x, Nfft, 1)
-
-        for pulse in range(num_pulses):
-            y = cp.fft.ifft(cp.multiply(X[pulse, :], W), Nfft, 0)
-            x[pulse, 0:num_compressed_range_bins] = y[0:num_compressed_range_bins]
-
-        x_compressed = x[:, 0:num_compressed_range_bins]
-
-        x_compressed_stack = cp.stack([x_compressed] * num_channels)
+        # one batched FFT over all the pulses of all the channels
+        x_compressed = pulse_compression(cp, x, waveform, num_compressed_range_bins, Nfft)
 
-        op_output.emit(x_compressed_stack, "X")
+        op_output.emit(x_compressed, "X")
 
 
 class MTIFilterOp(Operator):
@@ -141,17 +99,14 @@ class MTIFilterOp(Operator):
 
     def compute(self, op_input, op_output, context):
         x = op_input.receive("x")
-        for channel in range(num_channels):
-            x_conv2 = cusignal.convolve2d(x[channel, :, :], cp.array([[1], [-2], [-1]]), "valid")
-            x_conv2_stack = cp.stack([x_conv2] * num_channels)
-
-        op_output.emit(x_conv2_stack, "X")
+        op_output.emit(mti_filter(cp, x), "X")
 
 
 class RangeDopplerOp(Operator):
     def __init__(self, *args, **kwargs):
         # Need to call the base class constructor last
         self.index = 0
+        self.window = None
         super().__init__(*args, **kwargs)
 
     def setup(self, spec: OperatorSpec):
@@ -160,17 +115,17 @@ class RangeDopplerOp(Operator):
 
     def compute(self, op_input, op_output, context):
         x = op_input.receive("x")
-        for channel in range(num_channels):
-            x_window = cp.fft.fft(cp.multiply(x[channel, :, :], range_doppler_window), NDfft, 0)
-            x_window_stack = cp.stack([x_window] * num_channels)
-
-        op_output.emit(x_window_stack, "X")
+        if self.window is None or self.window.shape[0] != x.shape[-2]:
+            self.window = cp.hamming(x.shape[-2])
+        op_output.emit(range_doppler(cp, x, NDfft, self.window), "X")
 
 
 class CFAROp(Operator):
     def __init__(self, *args, **kwargs):
         # Need to call the base class constructor last
         self.index = 0
+        self.threshold = None
+        self.threshold_shape = None
         super().__init__(*args, **kwargs)
 
     def setup(self, spec: OperatorSpec):
@@ -180,19 +135,13 @@ class CFAROp(Operator):
     def compute(self, op_input, op_output, context):
         x = op_input.receive("x")
 
-        norm = cusignal.convolve2d(cp.ones(x.shape[1::]), mask, "same")
-
-        for channel in range(num_channels):
-            background_averages = cp.divide(
-                cusignal.convolve2d(cp.abs(x[channel, :, :]) ** 2, mask, "same"), norm
-            )
-            alpha = cp.multiply(norm, cp.power(Pfa, cp.divide(-1.0, norm)) - 1)
-            dets = cp.zeros(x[channel, :, :].shape)
-            dets[cp.where(cp.abs(x[channel, :, :]) ** 2 > cp.multiply(alpha, background_averages))]
-
-            dets_stacked = cp.stack([dets] * num_channels)
+        # the threshold factor only depends on the map shape, so compute it once
+        if self.threshold_shape != x.shape[-2:]:
+            self.threshold = cfar_threshold_factor(cp, x.shape[-2:], Pfa)
+            self.threshold_shape = x.shape[-2:]
+        dets = cfar(cp, x, Pfa, threshold=self.threshold)
 
-        op_output.emit(dets_stacked, "X")
+        op_output.emit(dets, "X")
 
 
 class SinkOp(Operator):
@@ -237,3 +186,4 @@ if __name__ == "__main__":
     duration = (iterations * num_pulses * num_channels) / (tstop - tstart)
 
     print(f"{duration:0.3f} pulses/sec")
+    print(f"{iterations / (tstop - tstart):0.3f} cubes/sec")
@@ -0,0 +1,143 @@
+# SPDX-FileCopyrightText: Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import time
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from radar_processing import (  # noqa: E402
+    CFAR_GUARD,
+    CFAR_REFERENCE,
+    box_sum,
+    cfar,
+    mti_filter,
+    pulse_compression,
+    range_doppler,
+)
+
+NUM_CHANNELS = 4
+NUM_PULSES = 34
+NUM_UNCOMPRESSED_RANGE_BINS = 600
+WAVEFORM_LENGTH = 64
+NUM_COMPRESSED_RANGE_BINS = NUM_UNCOMPRESSED_RANGE_BINS - WAVEFORM_LENGTH + 1
+NDFFT = 64
+PFA = 1e-5
+
+
+def process(xp, x, waveform):
+    x = pulse_compression(xp, x, waveform, NUM_COMPRESSED_RANGE_BINS)
+    x = mti_filter(xp, x)
+    x = range_doppler(xp, x, NDFFT)
+    return cfar(xp, x, PFA)
+
+
+class TestRadarProcessing(unittest.TestCase):
+    """Test cases for the batched radar processing stages, run with the NumPy backend"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.waveform = (
+            self.rng.standard_normal(WAVEFORM_LENGTH)
+            + 1j * self.rng.standard_normal(WAVEFORM_LENGTH)
+        ).astype(np.complex64)
+
+    def _noise(self, shape):
+        return (self.rng.standard_normal(shape) + 1j * self.rng.standard_normal(shape)).astype(
+            np.complex64
+        )
+
+    def test_box_sum(self):
+        x = self.rng.standard_normal((2, 9, 17))
+        a, b = CFAR_REFERENCE
+        padded = np.pad(x, ((0, 0), (a, a), (b, b)))
+        expected = np.zeros_like(x)
+        for i in range(x.shape[1]):
+            for j in range(x.shape[2]):
+                expected[:, i, j] = padded[:, i : i + 2 * a + 1, j : j + 2 * b + 1].sum(axis=(1, 2))
+        np.testing.assert_allclose(box_sum(np, x, CFAR_REFERENCE), expected, atol=1e-9)
+
+    def test_stages_match_per_channel_reference(self):
+        """Test the batched stages against a per-channel, per-pulse computation"""
+        x = self._noise((2, 8, NUM_UNCOMPRESSED_RANGE_BINS))
+        compressed = pulse_compression(np, x, self.waveform, NUM_COMPRESSED_RANGE_BINS)
+        filtered = mti_filter(np, compressed)
+        maps = range_doppler(np, filtered, NDFFT)
+
+        window = self.waveform * np.hamming(WAVEFORM_LENGTH)
+        window = window / np.linalg.norm(window)
+        for channel in range(x.shape[0]):
+            for pulse in range(x.shape[1]):
+                expected = np.correlate(x[channel, pulse], window, mode="valid")
+                np.testing.assert_allclose(
+                    compressed[channel, pulse], expected, rtol=1e-3, atol=1e-3
+                )
+            expected = np.stack(
+                [
+                    compressed[channel, p + 2]
+                    - 2 * compressed[channel, p + 1]
+                    + compressed[channel, p]
+                    for p in range(x.shape[1] - 2)
+                ]
+            )
+            np.testing.assert_allclose(filtered[channel], expected, rtol=1e-5, atol=1e-5)
+            expected = np.fft.fft(expected * np.hamming(x.shape[1] - 2)[:, None], NDFFT, axis=0)
+            np.testing.assert_allclose(maps[channel], expected, rtol=1e-4, atol=1e-4)
+
+    def test_cfar_detects_synthetic_targets(self):
+        """Test that targets are detected in their own channels only, at their range-Doppler cell"""
+        x = self._noise((NUM_CHANNELS, NUM_PULSES, NUM_UNCOMPRESSED_RANGE_BINS))
+        targets = {0: (100, 0.25), 2: (300, -0.125)}  # channel: (range bin, normalized Doppler)
+        pulses = np.arange(NUM_PULSES)[:, None]
+        for channel, (delay, doppler) in targets.items():
+            x[channel, :, delay : delay + WAVEFORM_LENGTH] += (
+                3 * self.waveform * np.exp(2j * np.pi * doppler * pulses)
+            )
+
+        detections = process(np, x, self.waveform)
+
+        self.assertEqual(detections.shape, (NUM_CHANNELS, NDFFT, NUM_COMPRESSED_RANGE_BINS))
+        for channel, (delay, doppler) in targets.items():
+            doppler_bin = int(round(doppler * NDFFT)) % NDFFT
+            self.assertTrue(detections[channel, doppler_bin, delay])
+        for channel in range(NUM_CHANNELS):
+            if channel in targets:
+                delay, doppler = targets[channel]
+                doppler_bin = int(round(doppler * NDFFT)) % NDFFT
+                # allow detections in the target's Doppler sidelobes and range mainlobe only
+                far = detections[channel].copy()
+                far[:, max(0, delay - CFAR_GUARD[1]) : delay + CFAR_GUARD[1] + 1] = False
+                self.assertLessEqual(int(far.sum()), 5)
+            else:
+                self.assertLessEqual(int(detections[channel].sum()), 5)
+
+    def test_throughput(self):
+        """Measure the number of cubes processed per second on the CPU"""
+        x = self._noise((NUM_CHANNELS, NUM_PULSES, NUM_UNCOMPRESSED_RANGE_BINS))
+        iterations = 5
+        start = time.perf_counter()
+        for _ in range(iterations):
+            process(np, x, self.waveform)
+        cubes_per_second = iterations / (time.perf_counter() - start)
+        print(f"{cubes_per_second:0.3f} cubes/sec")
+        self.assertGreater(cubes_per_second, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022-2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Backprojection kernels used by the HoloSAR image formation operator.
+
+Every function takes the array module ``xp`` as its first argument, so the same code runs on
+the GPU with CuPy and on the CPU with NumPy.
+"""
+
+# Value of the samples interpolated outside of the recorded range swath
+OUT_OF_SWATH_SAMPLE = 0.000001
+
+
+def image_grid(xp, image_size_x, image_size_y, pixel_spacing):
+    """Returns the (x, y) ground plane coordinates of the image pixels, centered on the scene"""
+    min_x = (-image_size_x / 2.0 + 0.5) * pixel_spacing
+    max_y = (image_size_y - 1) / 2 * pixel_spacing
+    xx = xp.linspace(min_x, min_x + pixel_spacing * (image_size_x - 1), image_size_x)
+    yy = xp.linspace(max_y, -max_y, image_size_y)
+    return xp.meshgrid(xx, yy)
+
+
+def pulse_contribution(xp, coords, xyz, r0, samples, dr_inv, bin_offset, pc_partial, factor=1.0):
+    """Backprojects a single pulse onto the image grid
+
+    Parameters
+    ----------
+    coords     : (x, y) pixel coordinates, as returned by image_grid
+    xyz        : location of the receiver for the pulse
+    r0         : range to the center of the scene
+    samples    : complex return samples of the pulse
+    dr_inv     : inverse of the range difference between adjacent samples
+    bin_offset : sample bin of the center of the scene
+    pc_partial : phase correction per meter of range
+    factor     : scale applied to the contribution
+    """
+    pixel_radius = xp.sqrt((coords[0] - xyz[0]) ** 2 + (coords[1] - xyz[1]) ** 2 + xyz[2] ** 2) - r0
+    sample_bin = pixel_radius * dr_inv + bin_offset
+    sample_index = xp.arange(samples.shape[0], dtype=xp.float64)
+    interpolated = xp.interp(
+        sample_bin, sample_index, samples, left=OUT_OF_SWATH_SAMPLE, right=OUT_OF_SWATH_SAMPLE
+    )
+    mf = xp.exp(pixel_radius * pc_partial * (0 + 1j))
+    return mf * interpolated * factor
+
+
+def batch_contribution(xp, coords, xyz, r0, samples, dr_inv, bin_offset, pc_partial):
+    """Backprojects K pulses onto the image grid as one broadcast over (pulses x grid)
+
+    Parameters
+    ----------
+    coords  : (x, y) pixel coordinates, as returned by image_grid
+    xyz     : (K, 3) locations of the receiver for each pulse
+    r0      : (K,) ranges to the center of the scene
+    samples : (K, N) complex return samples of each pulse
+
+    The remaining parameters are the same as for pulse_contribution.
+
+    Returns
+    -------
+    The sum of the contributions of the K pulses to each pixel
+    """
+    num_pulses, num_samples = samples.shape
+    x = xyz[:, 0, None, None]
+    y = xyz[:, 1, None, None]
+    z = xyz[:, 2, None, None]
+    pixel_radius = xp.sqrt((coords[0] - x) ** 2 + (coords[1] - y) ** 2 + z**2) - r0[:, None, None]
+    sample_bin = (pixel_radius * dr_inv + bin_offset).reshape(num_pulses, -1)
+
+    # Linear interpolation of the samples on the uniform sample index, as done by xp.interp
+    lower = xp.clip(xp.floor(sample_bin), 0, num_samples - 2).astype(xp.int64)
+    weight = sample_bin - lower
+    lower_samples = xp.take_along_axis(samples, lower, axis=1)
+    upper_samples = xp.take_along_axis(samples, lower + 1, axis=1)
+    interpolated = lower_samples + (upper_samples - lower_samples) * weight
+    out_of_swath = (sample_bin < 0) | (sample_bin > num_samples - 1)
+    interpolated = xp.where(out_of_swath, OUT_OF_SWATH_SAMPLE, interpolated)
+
+    mf = xp.exp(pixel_radius * pc_partial * (0 + 1j))
+    contributions = mf * interpolated.reshape(pixel_radius.shape)
+    return contributions.sum(axis=0)
+
+
+class ContributionRing:
+    """Fixed-size ring buffer of the image contributions of the pulses in the integration window
+
+    Each entry holds the contribution of one batch of pulses. Once the ring is full, the entry of
+    the batch leaving the window is subtracted from the accumulated image when it is replaced,
+    instead of backprojecting the expiring pulses again.
+
+    Contributions are stored with the given dtype, and the stored values are the ones added to
+    the accumulated image, so that their later subtraction cancels them up to float64 rounding.
+    """
+
+    def __init__(self, xp, num_entries, shape, dtype=None):
+        assert num_entries > 0
+        self.entries = xp.zeros((num_entries,) + tuple(shape), dtype=dtype or xp.complex64)
+        self.head = 0
+        self.count = 0
+
+    def is_full(self):
+        return self.count == len(self.entries)
+
+    def add(self, contribution, accumulator):
+        """Adds a contribution to the accumulator, removing the oldest one if the ring is full"""
+        slot = self.entries[self.head]
+        if self.is_full():
+            accumulator -= slot
+        slot[...] = contribution
+        accumulator += slot
+        self.head = (self.head + 1) % len(self.entries)
+        self.count = min(self.count + 1, len(self.entries))
+        return accumulator
@@ -19,18 +19,20 @@ import time
 
 import cupy as cp
 import holoscan as hs
+from backprojection import ContributionRing, batch_contribution, image_grid, pulse_contribution
 from holoscan.conditions import BooleanCondition
 from holoscan.core import Application, Operator, OperatorSpec
 from holoscan.gxf import Entity
 from holoscan.logger import LogLevel, set_log_level
 from holoscan.operators import HolovizOp
-from PIL import Image, ImageDraw, ImageFont
+from image_rendering import TextStamper, log_magnitude_to_rgb
+from PIL import Image
+from pulse_reader import PulseFileReader, read_header
 
 OVERSAMPLE_FACTOR = 1
 C = 299792458.0
 PI = 3.1415926535897932384626433832795
 HUGE = 1000000000000.0
-FIRST_PULSE_BYTE_OFFSET = 24
 
 
 # import numpy as cp
@@ -55,14 +57,15 @@ class Signal_GeneratorOp(Operator):
 
     Parameters
     ----------
-    bfile             : file handle to use for reading inputs
-    num_pulses        : maximum number of pulses to emit before entering infinite loop
-    num_samples       : number of samples per pulse
+    Input_Filename    : path of the pulse file to read inputs from
     oversample_factor : oversampling factor for optional FFT of input values
     fft_input         : flag indicating whether input data should be fourier transformed before
                         emission
+    File_Loop         : if nonzero, restart from the first pulse after the end of the file,
+                        otherwise the operator stops at the end of the file
     Target_PRF        : if positive, attempts to set pulse output to the given frequency
     Abort_After       : if positive, the operator will terminate after given pulse count
+    Read_Block_Size   : number of pulses read from the file at a time by the background reader
 
     Output
     ------
@@ -78,29 +81,29 @@ class Signal_GeneratorOp(Operator):
     def __init__(
         self,
         *args,
-        bfile,
-        num_pulses=-1,
-        num_samples=-1,
-        oversample_factor=1,
         Input_Filename="",
+        oversample_factor=1,
         Fourier_Transform_Input=-1,
         File_Loop=0,
         Target_PRF=-1,
         Abort_After=-1,
+        Read_Block_Size=256,
         dtype=cp.int32,
         **kwargs,
     ):
-        self.bfile = bfile
-        self.num_pulses = num_pulses
-        self.num_samples = num_samples
+        self.reader = PulseFileReader(
+            Input_Filename, block_size=Read_Block_Size, loop=File_Loop != 0
+        )
+        self.num_pulses = self.reader.num_pulses
+        self.num_samples = self.reader.num_samples
         self.oversample_factor = oversample_factor
         self.fft_input = Fourier_Transform_Input
         self.target_prf = Target_PRF
         self.file_loop = File_Loop
         self.abort_after = Abort_After
 
-        assert num_pulses > 0
-        assert num_samples > 0
+        assert self.num_pulses > 0
+        assert self.num_samples > 0
 
         print("source num_pulses=", self.num_pulses)
         print("source num_samples=", self.num_samples)
@@ -109,7 +112,6 @@ class Signal_GeneratorOp(Operator):
         print("Target PRF = ", self.target_prf)
         print("file_loop = ", self.file_loop)
 
-        self.loop_count = 0
         self.total_count = 0
         self.dtype = dtype
         super().__init__(*args, **kwargs)
@@ -122,6 +124,12 @@ class Signal_GeneratorOp(Operator):
     def setup(self, spec: OperatorSpec):
         spec.output("pulse_data")
 
+    def start(self):
+        self.reader.start()
+
+    def stop(self):
+        self.reader.close()
+
     def compute(self, op_input, op_output, context):
         current_time = time.perf_counter()
         if self.timer_inited == 0:
@@ -141,12 +149,16 @@ class Signal_GeneratorOp(Operator):
                     self.time_per_pulse * self.total_count,
                 )
         # print ("Sending pulse ", self.count, " at ", elapsed_time)
-        xyz_i = cp.fromfile(self.bfile, count=3, dtype=cp.float32)
-        xyz = cp.array([xyz_i[0], xyz_i[1], xyz_i[2]], dtype=cp.float64)
-        r0 = cp.fromfile(self.bfile, count=1, dtype=cp.float64)
+        pulse = self.reader.next_pulse()
+        if pulse is None:
+            print("Stopping after source emitter reached end of file @ pulse #", self.total_count)
+            self.conditions["enabled"].disable_tick()
+            return
+        xyz = cp.asarray(pulse["xyz"], dtype=cp.float64)
+        r0 = cp.asarray(pulse["r0"])
         r1 = cp.linalg.norm(xyz)
 
-        samples = cp.fromfile(self.bfile, count=self.num_samples, dtype=cp.complex64)
+        samples = cp.asarray(pulse["samples"])
         output_samples = self.num_samples
         if self.fft_input == 1:
             if self.oversample_factor > 0:
@@ -162,16 +174,7 @@ class Signal_GeneratorOp(Operator):
             pass
 
         out = {"xyz": xyz, "r0": r0, "r1": r1, "sample_count": output_samples, "samples": samples}
-        self.loop_count += 1
         self.total_count += 1
-        if self.loop_count == self.num_pulses:
-            if self.file_loop == 0:
-                print("Hanging after source emitter reached end of file @ pulse #", self.num_pulses)
-                while 1:
-                    pass
-            else:
-                self.bfile.seek(FIRST_PULSE_BYTE_OFFSET)
-                self.loop_count = 0
         if (self.abort_after > 0) & (self.total_count > self.abort_after):
             self.conditions["enabled"].disable_tick()
 
@@ -180,7 +183,8 @@ class Signal_GeneratorOp(Operator):
 
 class BP_Image_FormationOp(Operator):
     """Form an image of the ground plane of interest via back projection.
-    this algorithm applies one pulse at a time to all pixels in the image
+    this algorithm applies batches of pulses to all pixels in the image, and keeps the
+    image integrated over a sliding window of the most recent pulses
 
     Parameters
     ----------
@@ -191,6 +195,13 @@ class BP_Image_FormationOp(Operator):
     minf: double
         Minimum frequency in each pulse
         [need to understand this better.  Used for matched filter]
+    Pulses_To_Integrate: int
+        number of pulses in the sliding integration window
+    Pulses_Per_Batch: int
+        number of pulses backprojected together. The image is updated once per batch, and the
+        contribution of each batch is kept in a ring buffer of
+        Pulses_To_Integrate / Pulses_Per_Batch images, so that it can be subtracted without
+        being recomputed when the batch leaves the window
 
     Input
     ------
@@ -217,6 +228,7 @@ class BP_Image_FormationOp(Operator):
         Image_Size_Y=-1,
         Pixel_Spacing=-1,
         Pulses_To_Integrate=-1,
+        Pulses_Per_Batch=1,
         Algorithm="",
         minf=-1,
         **kwargs,
@@ -225,6 +237,8 @@ class BP_Image_FormationOp(Operator):
         assert num_samples > 0
         assert dr > 0
         assert minf > 0
+        assert Pulses_Per_Batch > 0
+        assert Pulses_To_Integrate % Pulses_Per_Batch == 0
         self.dr_inv = 1 / dr
         self.image_size_x = Image_Size_X
         self.image_size_y = Image_Size_Y
@@ -233,20 +247,17 @@ class BP_Image_FormationOp(Operator):
         self.pc_partial = 4.0 * PI * (cp.float64(minf) / C)
         self.num_samples = num_samples
         self.accumulator = cp.zeros([self.image_size_y, self.image_size_x]) + (0 + 0j)
-        self.xp = cp.linspace(0, self.num_samples - 1, self.num_samples)
         self.bin_offset = num_samples / 2
         self.pulses_to_integrate = Pulses_To_Integrate
-        self.buffer_head = 0
-        self.buffer_tail = 0
-        self.pulse_buffer = list({} for i in range(Pulses_To_Integrate))
-        self.total_time = 0
-        min_x = (-self.image_size_x / 2.0 + 0.5) * self.pixel_spacing
-        max_y = (self.image_size_y - 1) / 2 * self.pixel_spacing
-        xx = cp.linspace(
-            min_x, min_x + self.pixel_spacing * (self.image_size_x - 1), self.image_size_x
+        self.pulses_per_batch = Pulses_Per_Batch
+        self.pending_pulses = []
+        self.contributions = ContributionRing(
+            cp,
+            Pulses_To_Integrate // Pulses_Per_Batch,
+            self.accumulator.shape,
         )
-        yy = cp.linspace(max_y, -max_y, self.image_size_y)
-        self.coords = cp.meshgrid(xx, yy)
+        self.total_time = 0
+        self.coords = image_grid(cp, self.image_size_x, self.image_size_y, self.pixel_spacing)
         super().__init__(*args, **kwargs)
 
     def setup(self, spec: OperatorSpec):
@@ -254,43 +265,58 @@ class BP_Image_FormationOp(Operator):
         spec.output("signal_out")
 
     def pulse_bit(self, pulse, factor):
-        xyz = pulse["xyz"]
-        r0 = pulse["r1"]
-        pulse["sample_count"]
-        input_samples = pulse["samples"]
-        pixel_radius = (
-            cp.sqrt((self.coords[0] - xyz[0]) ** 2 + (self.coords[1] - xyz[1]) ** 2 + xyz[2] ** 2)
-            - r0
+        return pulse_contribution(
+            cp,
+            self.coords,
+            pulse["xyz"],
+            pulse["r1"],
+            pulse["samples"],
+            self.dr_inv,
+            self.bin_offset,
+            self.pc_partial,
+            factor,
+        )
+
+    def batch_bit(self, pulses):
+        return batch_contribution(
+            cp,
+            self.coords,
+            cp.stack([pulse["xyz"] for pulse in pulses]),
+            cp.asarray([pulse["r1"] for pulse in pulses], dtype=cp.float64),
+            cp.stack([pulse["samples"] for pulse in pulses]),
+            self.dr_inv,
+            self.bin_offset,
+            self.pc_partial,
         )
-        sample_bin = pixel_radius * self.dr_inv + self.bin_offset
-        samples = cp.interp(sample_bin, self.xp, input_samples, left=0.000001, right=0.000001)
-        mf = cp.exp(pixel_radius * self.pc_partial * (0 + 1j))
-        contribution = mf * samples * factor
-        return contribution
 
     def compute(self, op_input, op_output, context):
         pulse_data = op_input.receive("signal_in")
         xyz = pulse_data["xyz"]
         if (self.count % 100) == 0:
-            print("count=", self.count, "head=", self.buffer_head, "total_time=", self.total_time)
+            print(
+                "count=",
+                self.count,
+                "head=",
+                self.contributions.head,
+                "total_time=",
+                self.total_time,
+            )
             # print (".", end="")
             sys.stdout.flush()
-        pulse_data["r1"]
-        pulse_data["sample_count"]
-
-        # save incoming pulses in rotating buffer
-        this_pulse = self.buffer_head
-        self.pulse_buffer[self.buffer_head] = pulse_data
-        self.buffer_head += 1
-        if self.buffer_head == self.pulses_to_integrate:
-            self.buffer_head = 0
-        start_time = time.perf_counter()
-        new_addition = self.pulse_bit(self.pulse_buffer[this_pulse], 1.0)
-        self.accumulator += new_addition
-        if self.count > self.pulses_to_integrate:
-            self.accumulator -= self.pulse_bit(self.pulse_buffer[self.buffer_head], 1.0)
-        stop_time = time.perf_counter()
-        self.total_time += stop_time - start_time
+
+        # backproject the incoming pulses once a batch is complete, and replace the contribution
+        # of the oldest batch in the integration window by the new one
+        self.pending_pulses.append(pulse_data)
+        if len(self.pending_pulses) == self.pulses_per_batch:
+            start_time = time.perf_counter()
+            if self.pulses_per_batch == 1:
+                new_addition = self.pulse_bit(self.pending_pulses[0], 1.0)
+            else:
+                new_addition = self.batch_bit(self.pending_pulses)
+            self.contributions.add(new_addition, self.accumulator)
+            self.pending_pulses = []
+            stop_time = time.perf_counter()
+            self.total_time += stop_time - start_time
         self.count += 1
 
         out = {"xyz": xyz, "image": self.accumulator}
@@ -300,79 +326,55 @@ class BP_Image_FormationOp(Operator):
 class Image_OutputOp(Operator):
     """Write the complex image as a greymap file representing the magnitude
     of reflectivity at each point.  This method discards phase and is not optimal for
-    downstream processing, but makes a good visualization"""
+    downstream processing, but makes a good visualization
+
+    Parameters
+    ----------
+    Render_Period : an image is rendered for each of the first 10 received images, then once
+                    every Render_Period received images
+    Font_Size     : size of the font of the text overlay
+    """
 
-    def __init__(self, *args, Output_Filename_Prefix="", final=-1, **kwargs):
+    def __init__(
+        self, *args, Output_Filename_Prefix="", final=-1, Render_Period=100, Font_Size=24, **kwargs
+    ):
+        assert Render_Period > 0
         self.final = final
         self.image_prefix = Output_Filename_Prefix
+        self.render_period = Render_Period
+        self.text_stamper = TextStamper(
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "font.ttf"), Font_Size
+        )
+        self.pixels = None
         print("Setting final=", self.final)
         super().__init__(*args, **kwargs)
 
     def setup(self, spec: OperatorSpec):
         spec.input("complex_image")
         spec.output("outputs")
-        self.first_xyz = cp.array([-1, -1, -1])
         self.count = 0
 
     def compute(self, op_input, op_output, context):
         self.count += 1
         input = op_input.receive("complex_image")
         image = input["image"]
-        image_size_y = image.shape[0]
-        image_size_x = image.shape[1]
         xyz = input["xyz"]
-        if ((self.count % 100) > 0) and (self.count > 10):
+        if ((self.count % self.render_period) > 0) and (self.count > 10):
             return
-        if self.first_xyz[0] < 0:
-            self.first_xyz = xyz
-        b = cp.abs(image)
-        v1 = xyz[:2]
-        v2 = self.first_xyz[:2]
-        cp.arccos(cp.dot(v1, v2) / (cp.linalg.norm(v1) * cp.linalg.norm(v2))) * 180 / PI
-
-        b = cp.log10(cp.abs(b))
-        floor = cp.min(b)
-        floor = -2
-        b = b - floor
-        b = b / cp.max(b)
-        c = b * 255
 
-        if cp.__name__ == "cupy":
-            b = b.get()
-
-        im = Image.fromarray(cp.uint8(b * 255), "L")
-        im1 = ImageDraw.Draw(im)
-        mf = ImageFont.truetype("font.ttf", 24)
-        text = (
-            "TX: ("
-            + "%4.2f" % xyz[0]
-            + ", "
-            + "%4.2f" % xyz[1]
-            + ") "
-            + " Pulses="
-            + str(self.count)
-        )  # + " angle=" + '%4.2f' % theta
-        im1.text((5, 5), text, font=mf)
-        # im1.line ((image_size_x/2, image_size_y/2, image_size_x/2+xyz[0],
-        #           image_size_y/2-xyz[1]), width=3)
-        # im1.line ((image_size_x/2, image_size_y/2, image_size_x/2+self.first_xyz[0],
-        #           image_size_y/2-self.first_xyz[1]), width=3)
-        e = Image.Image.getdata(im)
-        f = cp.asarray(e, dtype=cp.uint8).reshape(image_size_x, image_size_y)
-        f = cp.repeat(f[:, :, cp.newaxis], 3, axis=2)
-        self.image_prefix + str(self.count) + ".png"
-        # im = im.save (filename)
-        # print ("File ", filename, " written!")
-        print("Image after pulse ", str(self.count), " outputted")
-        out_message = Entity(context)
-        c = c.astype(dtype=cp.uint8)
-        d = cp.repeat(c[:, :, cp.newaxis], 3, axis=2)
-        # d=cp.ones([2048,2048,3], dtype=cp.uint8)*255
-        if cp.__name__ == "cupy":
-            d = d.get()
-        out_message.add(hs.as_tensor(f), "pixels")
+        # the buffer is allocated once and reused for every rendered image
+        if self.pixels is None or self.pixels.shape[:2] != image.shape:
+            self.pixels = cp.empty(image.shape + (3,), dtype=cp.uint8)
+        log_magnitude_to_rgb(cp, image, self.pixels, floor=-2)
+
         plat_x = float(xyz[0])
         plat_y = float(xyz[1])
+        text = "TX: (" + "%4.2f" % plat_x + ", " + "%4.2f" % plat_y + ")  Pulses=" + str(self.count)
+        self.text_stamper.stamp(cp, self.pixels, text, (5, 5))
+
+        print("Image after pulse ", str(self.count), " outputted")
+        out_message = Entity(context)
+        out_message.add(hs.as_tensor(self.pixels), "pixels")
         print("plat: ", plat_x, plat_y, type(plat_x))
         platform_coords = cp.asarray(
             [
@@ -388,9 +390,6 @@ class Image_OutputOp(Operator):
             platform_coords = platform_coords.get()
         out_message.add(hs.as_tensor(platform_coords), "platform")
 
-        text = (["label_1", "label_2"],)
-        # out_message.add(hs.as_tensor("test"), "textline")
-        # out_message.add (0,0,"hello","text")
         op_output.emit(out_message, "outputs")
 
 
@@ -414,12 +413,11 @@ class SAR_ImagingApp(Application):
         fft_input = int(self.from_config("SAR_Input.Fourier_Transform_Input"))
         print("FFT Input=", fft_input)
 
-        self.bfile = open(input_filename, "rb")
-        bfile = self.bfile
-        np = cp.fromfile(bfile, count=1, dtype=cp.uint32)
-        ns = cp.fromfile(bfile, count=1, dtype=cp.uint32)
-        self.minf = cp.fromfile(bfile, count=1, dtype=cp.float64)
-        self.df = cp.fromfile(bfile, count=1, dtype=cp.float64)
+        header = read_header(input_filename)
+        np = header["num_pulses"]
+        ns = header["num_samples"]
+        self.minf = float(header["minf"])
+        self.df = float(header["df"])
 
         self.num_pulses = int(np)
         self.num_samples = int(ns)
@@ -445,9 +443,6 @@ class SAR_ImagingApp(Application):
         signal_generator = Signal_GeneratorOp(
             self,
             BooleanCondition(self, name="enabled"),
-            bfile=bfile,
-            num_pulses=self.num_pulses,
-            num_samples=self.num_samples,
             oversample_factor=OVERSAMPLE_FACTOR,
             name="generator",
             **self.kwargs("SAR_Input"),
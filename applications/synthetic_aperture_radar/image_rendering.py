@@ -0,0 +1,107 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022-2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Rendering helpers used by the HoloSAR image output operator.
+
+The functions take the array module ``xp`` as their first argument, so the same code runs on
+the GPU with CuPy and on the CPU with NumPy.
+"""
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+
+def log_magnitude_to_rgb(xp, image, out, floor=-2.0):
+    """Writes the normalized log-magnitude of a complex image into a uint8 RGB buffer
+
+    Parameters
+    ----------
+    image : (Y, X) complex image
+    out   : (Y, X, 3) uint8 buffer receiving the grey levels in each channel
+    floor : log10 magnitude mapped to black; lower magnitudes are clipped to it
+
+    Returns
+    -------
+    out
+    """
+    level = xp.abs(image)
+    xp.log10(level, out=level)
+    level -= floor
+    xp.maximum(level, 0, out=level)
+    peak = float(level.max())
+    if peak > 0:
+        level *= 255 / peak
+    out[...] = level[:, :, None]
+    return out
+
+
+class TextStamper:
+    """Stamps text onto images from cached glyph masks
+
+    Each glyph is rendered once with PIL, then text is composed from the cached masks and blended
+    into the target image region, without converting the whole image to a PIL image.
+
+    Parameters
+    ----------
+    font_path : path of the TrueType font
+    font_size : size of the font
+    """
+
+    def __init__(self, font_path, font_size):
+        self.font = ImageFont.truetype(font_path, font_size)
+        ascent, descent = self.font.getmetrics()
+        self.line_height = ascent + descent
+        self.glyphs = {}
+
+    def glyph(self, char):
+        """Returns the cached (mask, advance) of a character, rendering it on first use"""
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            advance = int(round(self.font.getlength(char)))
+            _, _, right, _ = self.font.getbbox(char)
+            width = max(advance, right, 1)
+            canvas = Image.new("L", (width, self.line_height))
+            ImageDraw.Draw(canvas).text((0, 0), char, font=self.font, fill=255)
+            glyph = (np.asarray(canvas), advance)
+            self.glyphs[char] = glyph
+        return glyph
+
+    def text_mask(self, text):
+        """Returns the uint8 coverage mask of a single line of text"""
+        glyphs = [self.glyph(char) for char in text]
+        width = sum(advance for _, advance in glyphs)
+        if glyphs:
+            # the last glyph may extend past its advance
+            width += max(0, glyphs[-1][0].shape[1] - glyphs[-1][1])
+        mask = np.zeros((self.line_height, max(width, 1)), dtype=np.uint8)
+        x = 0
+        for glyph_mask, advance in glyphs:
+            region = mask[:, x : x + glyph_mask.shape[1]]
+            np.maximum(region, glyph_mask[:, : region.shape[1]], out=region)
+            x += advance
+        return mask
+
+    def stamp(self, xp, out, text, position, color=255):
+        """Blends text of the given grey level into a (Y, X, C) uint8 image at (x, y)"""
+        mask = self.text_mask(text)
+        x, y = position
+        height = min(mask.shape[0], out.shape[0] - y)
+        width = min(mask.shape[1], out.shape[1] - x)
+        if height <= 0 or width <= 0:
+            return out
+        alpha = xp.asarray(mask[:height, :width], dtype=xp.float32)[:, :, None] / 255
+        region = out[y : y + height, x : x + width]
+        region[...] = (region + (color - region.astype(xp.float32)) * alpha + 0.5).astype(xp.uint8)
+        return out
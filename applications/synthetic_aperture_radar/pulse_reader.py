@@ -0,0 +1,146 @@
+# SPDX-FileCopyrightText: Copyright (c) 2022-2023 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Reader of the HoloSAR pulse files written by the converters in ``data/``.
+
+The file starts with a header (number of pulses, number of samples per pulse, minimum
+frequency and frequency step), followed by one record per pulse: the location of the receiver,
+the range to the center of the scene, and the complex return samples.
+"""
+
+import os
+import queue
+import threading
+
+import numpy as np
+
+HEADER_DTYPE = np.dtype(
+    [("num_pulses", "<u4"), ("num_samples", "<u4"), ("minf", "<f8"), ("df", "<f8")]
+)
+FIRST_PULSE_BYTE_OFFSET = HEADER_DTYPE.itemsize
+
+
+def pulse_record_dtype(num_samples):
+    """Returns the structured dtype of a pulse record with the given number of samples"""
+    return np.dtype([("xyz", "<f4", (3,)), ("r0", "<f8"), ("samples", "<c8", (num_samples,))])
+
+
+def read_header(filename):
+    """Returns the header of a pulse file as a structured NumPy scalar"""
+    return np.fromfile(filename, dtype=HEADER_DTYPE, count=1)[0]
+
+
+class PulseFileReader:
+    """Memory-maps a pulse file and prefetches blocks of pulse records in a background thread
+
+    Parameters
+    ----------
+    filename   : path of the pulse file
+    block_size : number of pulse records read from the file at a time
+    prefetch   : number of blocks read ahead of the consumer
+    loop       : when True, restart from the first pulse after the last one
+
+    Pulses are returned as views of the prefetched blocks, without copying their samples. An error
+    reading the file in the background thread is raised by ``next_pulse``.
+    """
+
+    def __init__(self, filename, block_size=256, prefetch=4, loop=False):
+        assert block_size > 0
+        assert prefetch > 0
+        header = read_header(filename)
+        self.num_pulses = int(header["num_pulses"])
+        self.num_samples = int(header["num_samples"])
+        self.minf = float(header["minf"])
+        self.df = float(header["df"])
+        record_dtype = pulse_record_dtype(self.num_samples)
+        num_records = (os.path.getsize(filename) - FIRST_PULSE_BYTE_OFFSET) // record_dtype.itemsize
+        if num_records < self.num_pulses:
+            raise ValueError(
+                f"{filename} holds {num_records} pulses, its header gives {self.num_pulses}"
+            )
+        self.records = np.memmap(
+            filename,
+            dtype=record_dtype,
+            mode="r",
+            offset=FIRST_PULSE_BYTE_OFFSET,
+            shape=(self.num_pulses,),
+        )
+        self.block_size = block_size
+        self.loop = loop
+        self._blocks = queue.Queue(maxsize=prefetch)
+        self._stop = threading.Event()
+        self._thread = None
+        self._block = self.records[:0]
+        self._index = 0
+
+    def start(self):
+        """Starts prefetching pulse records"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._prefetch, daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Stops prefetching and releases the memory map"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.records = None
+
+    def next_pulse(self):
+        """Returns the next pulse record, or None once the end of the file is reached"""
+        if self._index == len(self._block):
+            self.start()
+            block = self._blocks.get()
+            if block is None or isinstance(block, Exception):
+                # put the end marker back so that later calls also return None, or raise
+                self._blocks.put(block)
+                if block is None:
+                    return None
+                raise block
+            self._block = block
+            self._index = 0
+        pulse = self._block[self._index]
+        self._index += 1
+        return pulse
+
+    def _put(self, item):
+        """Queues an item unless the reader is closed, returning whether it was queued"""
+        while not self._stop.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _prefetch(self):
+        try:
+            start = 0
+            while self.num_pulses > 0:
+                stop = min(start + self.block_size, self.num_pulses)
+                # copy the block out of the memory map so that the file is read by this thread
+                if not self._put(np.array(self.records[start:stop])):
+                    return
+                start = stop
+                if start == self.num_pulses:
+                    if not self.loop:
+                        break
+                    start = 0
+        except Exception as e:
+            # queued in place of the end marker, so that the consumer does not wait forever
+            self._put(e)
+            return
+        self._put(None)
@@ -0,0 +1,104 @@
+# SPDX-FileCopyrightText: Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backprojection import (  # noqa: E402
+    ContributionRing,
+    batch_contribution,
+    image_grid,
+    pulse_contribution,
+)
+
+IMAGE_SIZE = 24
+PIXEL_SPACING = 0.5
+NUM_SAMPLES = 64
+DR = 0.25
+PC_PARTIAL = 4.0 * np.pi * 9.0e9 / 299792458.0
+
+
+class TestBackprojection(unittest.TestCase):
+    """Test cases for the HoloSAR backprojection kernels, run with the NumPy backend"""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.coords = image_grid(np, IMAGE_SIZE, IMAGE_SIZE, PIXEL_SPACING)
+        self.pulses = []
+        for angle in np.linspace(0, np.pi / 4, 40):
+            xyz = np.array([1000.0 * np.cos(angle), 1000.0 * np.sin(angle), 500.0])
+            samples = rng.standard_normal(NUM_SAMPLES) + 1j * rng.standard_normal(NUM_SAMPLES)
+            self.pulses.append({"xyz": xyz, "r1": np.linalg.norm(xyz), "samples": samples})
+
+    def _pulse_contribution(self, pulse):
+        return pulse_contribution(
+            np,
+            self.coords,
+            pulse["xyz"],
+            pulse["r1"],
+            pulse["samples"],
+            1 / DR,
+            NUM_SAMPLES / 2,
+            PC_PARTIAL,
+        )
+
+    def _batch_contribution(self, pulses):
+        return batch_contribution(
+            np,
+            self.coords,
+            np.stack([pulse["xyz"] for pulse in pulses]),
+            np.array([pulse["r1"] for pulse in pulses]),
+            np.stack([pulse["samples"] for pulse in pulses]),
+            1 / DR,
+            NUM_SAMPLES / 2,
+            PC_PARTIAL,
+        )
+
+    def test_batch_matches_per_pulse(self):
+        """Test that backprojecting a batch equals the sum of the per-pulse contributions"""
+        pulses = self.pulses[:8]
+        expected = sum(self._pulse_contribution(pulse) for pulse in pulses)
+        np.testing.assert_allclose(self._batch_contribution(pulses), expected, rtol=1e-9, atol=1e-9)
+
+    def test_batch_out_of_swath(self):
+        """Test that pixels outside of the range swath use the out-of-swath sample value"""
+        pulses = [dict(pulse, r1=pulse["r1"] + 100.0) for pulse in self.pulses[:3]]
+        expected = sum(self._pulse_contribution(pulse) for pulse in pulses)
+        np.testing.assert_allclose(self._batch_contribution(pulses), expected, rtol=1e-9, atol=1e-9)
+
+    def test_sliding_window(self):
+        """Test that the ring buffer keeps the image integrated over the latest pulses"""
+        pulses_to_integrate = 12
+        for pulses_per_batch in [1, 4]:
+            ring = ContributionRing(
+                np, pulses_to_integrate // pulses_per_batch, self.coords[0].shape
+            )
+            accumulator = np.zeros(self.coords[0].shape, dtype=np.complex128)
+            for end in range(pulses_per_batch, len(self.pulses) + 1, pulses_per_batch):
+                batch = self.pulses[end - pulses_per_batch : end]
+                ring.add(self._batch_contribution(batch), accumulator)
+
+                window = self.pulses[max(0, end - pulses_to_integrate) : end]
+                expected = sum(self._pulse_contribution(pulse) for pulse in window)
+                np.testing.assert_allclose(accumulator, expected, rtol=1e-4, atol=1e-4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+# SPDX-FileCopyrightText: Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import unittest
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from image_rendering import TextStamper, log_magnitude_to_rgb  # noqa: E402
+
+FONT_PATH = os.path.join(APP_DIR, "font.ttf")
+
+
+class TestImageRendering(unittest.TestCase):
+    """Test cases for the HoloSAR image rendering helpers, run with the NumPy backend"""
+
+    def test_log_magnitude_to_rgb(self):
+        """Test the single pass normalization against the per-step PIL-era computation"""
+        rng = np.random.default_rng(0)
+        image = (rng.uniform(0.02, 50, (32, 48)) * np.exp(1j * rng.uniform(0, 6, (32, 48)))).T
+        out = np.empty(image.shape + (3,), dtype=np.uint8)
+        log_magnitude_to_rgb(np, image, out, floor=-2)
+
+        b = np.log10(np.abs(image)) + 2
+        expected = np.uint8(b / np.max(b) * 255)
+        for channel in range(3):
+            np.testing.assert_allclose(out[:, :, channel], expected, atol=1)
+        self.assertEqual(out.max(), 255)
+
+    def test_log_magnitude_clips_below_floor(self):
+        image = np.array([[0, 1e-5], [1, 100]], dtype=np.complex128)
+        out = np.empty((2, 2, 3), dtype=np.uint8)
+        log_magnitude_to_rgb(np, image, out, floor=-2)
+        np.testing.assert_array_equal(out[:, :, 0], [[0, 0], [127, 255]])
+
+    def test_text_stamper(self):
+        """Test that stamped text matches text drawn by PIL and leaves other pixels unchanged"""
+        stamper = TextStamper(FONT_PATH, 24)
+        text = "TX: (12.34, -5.67)  Pulses=100"
+        out = np.zeros((64, 512, 3), dtype=np.uint8)
+        stamper.stamp(np, out, text, (5, 5))
+
+        reference = Image.new("L", (512, 64))
+        ImageDraw.Draw(reference).text((5, 5), text, font=stamper.font, fill=255)
+        reference = np.asarray(reference)
+
+        self.assertTrue(np.array_equal(out[:, :, 0], out[:, :, 1]))
+        self.assertTrue(np.array_equal(out[:, :, 0], out[:, :, 2]))
+        # the glyphs are laid out by advance, so allow small differences at the glyph edges
+        self.assertLess(np.mean(np.abs(out[:, :, 0].astype(int) - reference)), 4)
+        self.assertFalse(out[:5].any())
+        self.assertFalse(out[:, :5].any())
+        self.assertEqual(len(stamper.glyphs), len(set(text)))
+
+    def test_text_stamper_clips_to_image(self):
+        stamper = TextStamper(FONT_PATH, 24)
+        out = np.zeros((16, 20, 3), dtype=np.uint8)
+        stamper.stamp(np, out, "Pulses=1", (5, 5))
+        self.assertTrue(out.any())
+
+
+if __name__ == "__main__":
+    unittest.main()
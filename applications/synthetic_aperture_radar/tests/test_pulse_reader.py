@@ -0,0 +1,131 @@
+# SPDX-FileCopyrightText: Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pulse_reader import PulseFileReader, read_header  # noqa: E402
+
+NUM_PULSES = 10
+NUM_SAMPLES = 16
+
+
+class TestPulseFileReader(unittest.TestCase):
+    """Test cases for the memory-mapped HoloSAR pulse file reader"""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.xyz = rng.standard_normal((NUM_PULSES, 3)).astype(np.float32)
+        self.r0 = rng.standard_normal(NUM_PULSES)
+        self.samples = (
+            rng.standard_normal((NUM_PULSES, NUM_SAMPLES))
+            + 1j * rng.standard_normal((NUM_PULSES, NUM_SAMPLES))
+        ).astype(np.complex64)
+
+        # write the file the same way as the converters in data/
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmp_dir.name, "pulses.dat")
+        with open(self.filename, "wb") as bfile:
+            bfile.write(np.array(NUM_PULSES).astype(np.int32))
+            bfile.write(np.array(NUM_SAMPLES).astype(np.int32))
+            bfile.write(np.array(9.0e9).astype(np.float64))
+            bfile.write(np.array(1.0e6).astype(np.float64))
+            for p in range(NUM_PULSES):
+                bfile.write(self.xyz[p, :].astype(np.float32))
+                bfile.write(self.r0[p].astype(np.float64))
+                bfile.write(self.samples[p, :].astype(np.complex64))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _check_pulse(self, pulse, index):
+        np.testing.assert_array_equal(pulse["xyz"], self.xyz[index])
+        self.assertEqual(pulse["r0"], self.r0[index])
+        np.testing.assert_array_equal(pulse["samples"], self.samples[index])
+
+    def test_header(self):
+        header = read_header(self.filename)
+        self.assertEqual(header["num_pulses"], NUM_PULSES)
+        self.assertEqual(header["num_samples"], NUM_SAMPLES)
+        self.assertEqual(header["minf"], 9.0e9)
+        self.assertEqual(header["df"], 1.0e6)
+
+    def test_read_until_end_of_file(self):
+        reader = PulseFileReader(self.filename, block_size=3)
+        try:
+            for index in range(NUM_PULSES):
+                self._check_pulse(reader.next_pulse(), index)
+            self.assertIsNone(reader.next_pulse())
+            self.assertIsNone(reader.next_pulse())
+        finally:
+            reader.close()
+
+    def test_loop(self):
+        reader = PulseFileReader(self.filename, block_size=4, prefetch=1, loop=True)
+        try:
+            for index in range(3 * NUM_PULSES):
+                self._check_pulse(reader.next_pulse(), index % NUM_PULSES)
+        finally:
+            reader.close()
+
+    def test_truncated_file(self):
+        # the last pulse record is incomplete
+        with open(self.filename, "r+b") as bfile:
+            bfile.truncate(os.path.getsize(self.filename) - 1)
+        with self.assertRaisesRegex(ValueError, f"holds {NUM_PULSES - 1} pulses"):
+            PulseFileReader(self.filename)
+
+    def test_read_error_is_raised(self):
+        class FailingRecords:
+            def __getitem__(self, index):
+                raise OSError("read failed")
+
+        reader = PulseFileReader(self.filename, block_size=4)
+        reader.records = FailingRecords()
+        try:
+            for _ in range(2):
+                with self.assertRaisesRegex(OSError, "read failed"):
+                    reader.next_pulse()
+        finally:
+            reader.close()
+
+    def test_read_error_after_first_blocks(self):
+        reader = PulseFileReader(self.filename, block_size=4)
+        records = reader.records
+
+        class FailingRecords:
+            def __getitem__(self, index):
+                if index.start >= 8:
+                    raise OSError("read failed")
+                return records[index]
+
+        reader.records = FailingRecords()
+        try:
+            for index in range(8):
+                self._check_pulse(reader.next_pulse(), index)
+            with self.assertRaisesRegex(OSError, "read failed"):
+                reader.next_pulse()
+        finally:
+            reader.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
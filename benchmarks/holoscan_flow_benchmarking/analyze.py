@@ -14,11 +14,13 @@
 # limitations under the License.
 
 import argparse
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 import matplotlib.pyplot as plt
 import numpy as np
-from log_parser import parse_log_as_paths_latencies
+from log_parser import parse_log_as_paths_latency_arrays
 
 np.set_printoptions(precision=2)
 
@@ -34,26 +36,67 @@ index = 0
 #                                   -> (holoviz,1685129021194404,1685129021265517)
 
 
-# This function merges the latencies of the same path from different log files
+# This function parses the log files concurrently in a process pool and returns a dictionary of
+# log file to its {path: integer latencies (microseconds)} dictionary
+def parse_log_files(log_files, use_cache=False, num_workers=None):
+    log_files = list(dict.fromkeys(log_files))
+    if num_workers == 1 or len(log_files) <= 1:
+        return {
+            log_file: parse_log_as_paths_latency_arrays(log_file, use_cache)
+            for log_file in log_files
+        }
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        parsed_logs = executor.map(
+            parse_log_as_paths_latency_arrays, log_files, [use_cache] * len(log_files)
+        )
+        return dict(zip(log_files, parsed_logs))
+
+
+# This function merges the latencies of the same path from different log files into one array of
+# latencies in ms per path
 def merge_path_latencies(multiple_path_latencies, skip_begin_messages=10, discard_last_messages=10):
     merged_path_latencies = {}
     for path_latencies in multiple_path_latencies:
         for path, latencies in path_latencies.items():
             modified_latencies = latencies[skip_begin_messages:-discard_last_messages]
-            if path in merged_path_latencies:
-                merged_path_latencies[path].extend(modified_latencies)
-            else:
-                merged_path_latencies[path] = modified_latencies
-    return merged_path_latencies
+            merged_path_latencies.setdefault(path, []).append(modified_latencies)
+    return {
+        path: np.concatenate(latencies) / 1000.0
+        for path, latencies in merged_path_latencies.items()
+    }
+
+
+# This function computes all the latency metrics of a path from a single sorted copy of the
+# latencies. Percentiles use the nearest-rank rule: the value at index
+# int(n * percentile / 100) of the sorted latencies, or the maximum for the 100th percentile.
+def get_latency_statistics(latencies, percentiles=()):
+    latencies = np.asarray(latencies, dtype=np.float64)
+    if len(latencies) == 0:
+        # e.g., a path with fewer messages than the skipped and discarded ones
+        latencies = np.array([np.nan])
+    data = np.sort(latencies)
+    n = len(data)
+    requested_percentiles = np.array([95, 100, 10, 90, *percentiles], dtype=np.float64)
+    indices = np.minimum(n * requested_percentiles / 100.0, n - 1).astype(np.int64)
+    values = data[indices]
+    p95, p100, p10, p90 = values[:4]
+    return {
+        "max": data[-1],
+        "min": float(data[0]),
+        "avg": np.mean(latencies),
+        "median": np.median(data),
+        "stddev": np.std(latencies),
+        "tail": p100 - p95,
+        "flatness": p90 - p10,
+        "percentiles": dict(zip(percentiles, values[4:])),
+    }
 
 
 # Creates a CDF from the provided latencies
 def get_cdf_data(latencies):
-    data = sorted(latencies)
+    data = np.sort(latencies)
     n = len(data)
-    p = []
-    for i in range(n):
-        p.append(i / n)
+    p = np.arange(n) / n
     return data, p
 
 
@@ -114,22 +157,6 @@ def complete_cdf_plot(fig, ax, operator_legends=None):
     fig.tight_layout()
 
 
-def latency_percentile(latencies, percentile, is_sorted=False):
-    if not is_sorted:
-        latencies = sorted(latencies)
-    if percentile == 100:
-        return latencies[-1]
-    index = int(len(latencies) * percentile / 100.0)
-    return latencies[index]
-
-
-def get_latency_difference(latencies, percentile_start, percentile_end):
-    data = sorted(latencies)
-    start_value = latency_percentile(data, percentile_start, is_sorted=True)
-    end_value = latency_percentile(data, percentile_end, is_sorted=True)
-    return "{:.2f}".format(end_value - start_value)
-
-
 # This function shortens a path by taking first 3 letters of each operator name if
 # it's more than 3 letters long
 def shorten_path(path, operator_legends, path_separator="→ "):
@@ -249,6 +276,23 @@ def main():
         required=False,
     )
 
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="cache the parsed latencies of every log file in a hidden .npz file next to it\
+              (.<log file>.npz) and reuse it as long as the log file is unchanged",
+        required=False,
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="number of processes used to parse the log files concurrently",
+        required=False,
+    )
+
     parser.add_argument(
         "--cdash",
         action="store_true",
@@ -334,123 +378,135 @@ def main():
                 "\033[91mError: No log files provided for group: " + current_group_name + "\033[0m"
             )
             sys.exit(1)
-        parsed_latencies_per_file = []
-        for log_file in current_log_files:
-            parsed_latencies_per_file.append(parse_log_as_paths_latencies(log_file))
-        grouped_path_latencies[current_group_name] = merge_path_latencies(parsed_latencies_per_file)
         grouped_log_files[current_group_name] = current_log_files
 
+    parsed_logs = parse_log_files(
+        [log_file for log_files in grouped_log_files.values() for log_file in log_files],
+        use_cache=args.cache,
+        num_workers=args.jobs,
+    )
+    percentiles = args.percentile or []
+    grouped_path_statistics = {}
+    for group_name, log_files in grouped_log_files.items():
+        grouped_path_latencies[group_name] = merge_path_latencies(
+            [parsed_logs[log_file] for log_file in log_files]
+        )
+        grouped_path_statistics[group_name] = {
+            path: get_latency_statistics(latencies, percentiles)
+            for path, latencies in grouped_path_latencies[group_name].items()
+        }
+
     if args.max:
         if args.save_csv:
             with open("max_values.csv", "w") as f:
                 f.truncate(0)
         print_metric_title("Maximum (Worst-case) Latencies")
-        for group_name, paths_latencies in grouped_path_latencies.items():
+        for group_name, paths_statistics in grouped_path_statistics.items():
             print_group_name_with_log_files(group_name, grouped_log_files[group_name])
-            for path, latency in paths_latencies.items():
-                print_path_metric_ms(path, str(round(np.max(latency), 2)))
-            (path, latency) = next(iter(paths_latencies.items()))
+            for path, statistics in paths_statistics.items():
+                print_path_metric_ms(path, str(round(statistics["max"], 2)))
+            statistics = next(iter(paths_statistics.values()))
             if args.cdash:
                 print(
                     f'<CTestMeasurement type="numeric/double" name="maximum_latency_{group_name}">'
-                    + str(round(np.max(latency), 2))
+                    + str(round(statistics["max"], 2))
                     + "</CTestMeasurement>"
                 )
             if args.save_csv:
                 with open("max_values.csv", "a") as f:
-                    f.write(str(round(np.max(latency), 2)) + ",")
+                    f.write(str(round(statistics["max"], 2)) + ",")
 
     if args.avg:
         if args.save_csv:
             with open("avg_values.csv", "w") as f:
                 f.truncate(0)
         print_metric_title("Average Latencies")
-        for group_name, paths_latencies in grouped_path_latencies.items():
+        for group_name, paths_statistics in grouped_path_statistics.items():
             print_group_name_with_log_files(group_name, grouped_log_files[group_name])
-            for path, latency in paths_latencies.items():
-                print_path_metric_ms(path, str(round(np.mean(latency), 2)))
-            (path, latency) = next(iter(paths_latencies.items()))
+            for path, statistics in paths_statistics.items():
+                print_path_metric_ms(path, str(round(statistics["avg"], 2)))
+            statistics = next(iter(paths_statistics.values()))
             if args.cdash:
                 print(
                     f'<CTestMeasurement type="numeric/double" name="average_latency_{group_name}">'
-                    + str(round(np.mean(latency), 2))
+                    + str(round(statistics["avg"], 2))
                     + "</CTestMeasurement>"
                 )
             if args.save_csv:
                 with open("avg_values.csv", "a") as f:
-                    f.write(str(round(np.mean(latency), 2)) + ",")
+                    f.write(str(round(statistics["avg"], 2)) + ",")
 
     if args.median:
         if args.save_csv:
             with open("median_values.csv", "w") as f:
                 f.truncate(0)
         print_metric_title("Median Latencies")
-        for group_name, paths_latencies in grouped_path_latencies.items():
+        for group_name, paths_statistics in grouped_path_statistics.items():
             print_group_name_with_log_files(group_name, grouped_log_files[group_name])
-            for path, latency in paths_latencies.items():
-                print_path_metric_ms(path, str(round(np.median(latency), 2)))
-            (path, latency) = next(iter(paths_latencies.items()))
+            for path, statistics in paths_statistics.items():
+                print_path_metric_ms(path, str(round(statistics["median"], 2)))
+            statistics = next(iter(paths_statistics.values()))
             if args.cdash:
                 print(
                     f'<CTestMeasurement type="numeric/double" name="median_latency_{group_name}">'
-                    + str(round(np.median(latency), 2))
+                    + str(round(statistics["median"], 2))
                     + "</CTestMeasurement>"
                 )
             if args.save_csv:
                 with open("median_values.csv", "a") as f:
-                    f.write(str(round(np.median(latency), 2)) + ",")
+                    f.write(str(round(statistics["median"], 2)) + ",")
 
     if args.stddev:
         if args.save_csv:
             with open("stddev_values.csv", "w") as f:
                 f.truncate(0)
         print_metric_title("Standard Deviation of Latencies")
-        for group_name, paths_latencies in grouped_path_latencies.items():
+        for group_name, paths_statistics in grouped_path_statistics.items():
             print_group_name_with_log_files(group_name, grouped_log_files[group_name])
-            for path, latency in paths_latencies.items():
-                print_path_metric_ms(path, str(round(np.std(latency), 2)))
-            (path, latency) = next(iter(paths_latencies.items()))
+            for path, statistics in paths_statistics.items():
+                print_path_metric_ms(path, str(round(statistics["stddev"], 2)))
+            statistics = next(iter(paths_statistics.values()))
             if args.cdash:
                 print(
                     f'<CTestMeasurement type="numeric/double" name="stddev_latency_{group_name}">'
-                    + str(round(np.std(latency), 2))
+                    + str(round(statistics["stddev"], 2))
                     + "</CTestMeasurement>"
                 )
             if args.save_csv:
                 with open("stddev_values.csv", "a") as f:
-                    f.write(str(round(np.std(latency), 2)) + ",")
+                    f.write(str(round(statistics["stddev"], 2)) + ",")
 
     if args.min:
         if args.save_csv:
             with open("min_values.csv", "w") as f:
                 f.truncate(0)
         print_metric_title("Minimum Latencies")
-        for group_name, paths_latencies in grouped_path_latencies.items():
+        for group_name, paths_statistics in grouped_path_statistics.items():
             print_group_name_with_log_files(group_name, grouped_log_files[group_name])
-            for path, latency in paths_latencies.items():
-                print_path_metric_ms(path, str(round(min(latency), 2)))
-            (path, latency) = next(iter(paths_latencies.items()))
+            for path, statistics in paths_statistics.items():
+                print_path_metric_ms(path, str(round(statistics["min"], 2)))
+            statistics = next(iter(paths_statistics.values()))
             if args.cdash:
                 print(
                     f'<CTestMeasurement type="numeric/double" name="min_latency_{group_name}">'
-                    + str(round(min(latency), 2))
+                    + str(round(statistics["min"], 2))
                     + "</CTestMeasurement>"
                 )
             if args.save_csv:
                 with open("min_values.csv", "a") as f:
-                    f.write(str(round(min(latency), 2)) + ",")
+                    f.write(str(round(statistics["min"], 2)) + ",")
 
     if args.tail:
         if args.save_csv:
             with open("tail_values.csv", "w") as f:
                 f.truncate(0)
         print_metric_title("Latency Distribution Tail (95-100 percentile)")
-        for group_name, paths_latencies in grouped_path_latencies.items():
+        for group_name, paths_statistics in grouped_path_statistics.items():
             print_group_name_with_log_files(group_name, grouped_log_files[group_name])
-            for path, latency in paths_latencies.items():
-                print_path_metric_ms(path, get_latency_difference(latency, 95, 100))
-            (path, latency) = next(iter(paths_latencies.items()))
-            latency_tail_one_path = str(get_latency_difference(latency, 95, 100))
+            for path, statistics in paths_statistics.items():
+                print_path_metric_ms(path, "{:.2f}".format(statistics["tail"]))
+            statistics = next(iter(paths_statistics.values()))
+            latency_tail_one_path = "{:.2f}".format(statistics["tail"])
             if args.cdash:
                 print(
                     f'<CTestMeasurement type="numeric/double" name="distribution_tail_{group_name}">'
@@ -466,12 +522,12 @@ def main():
             with open("flatness_values.csv", "w") as f:
                 f.truncate(0)
         print_metric_title("Latency Distribution Flatness (10-90 percentile)")
-        for group_name, paths_latencies in grouped_path_latencies.items():
+        for group_name, paths_statistics in grouped_path_statistics.items():
             print_group_name_with_log_files(group_name, grouped_log_files[group_name])
-            for path, latency in paths_latencies.items():
-                print_path_metric_ms(path, get_latency_difference(latency, 10, 90))
-            (path, latency) = next(iter(paths_latencies.items()))
-            latency_flatness_one_path = str(get_latency_difference(latency, 10, 90))
+            for path, statistics in paths_statistics.items():
+                print_path_metric_ms(path, "{:.2f}".format(statistics["flatness"]))
+            statistics = next(iter(paths_statistics.values()))
+            latency_flatness_one_path = "{:.2f}".format(statistics["flatness"])
             if args.cdash:
                 print(
                     f'<CTestMeasurement type="numeric/double" name="\
@@ -490,16 +546,16 @@ def main():
                 with open(percentile_file, "w") as f:
                     f.truncate(0)
             print_metric_title(f"Latency Percentile ({percentile})")
-            for group_name, paths_latencies in grouped_path_latencies.items():
+            for group_name, paths_statistics in grouped_path_statistics.items():
                 print_group_name_with_log_files(group_name, grouped_log_files[group_name])
-                for path, latency in paths_latencies.items():
+                for path, statistics in paths_statistics.items():
                     latency_percentile_str = "{:.2f}".format(
-                        latency_percentile(latency, float(percentile))
+                        statistics["percentiles"][percentile]
                     )
                     print_path_metric_ms(path, latency_percentile_str)
-                (path, latency) = next(iter(paths_latencies.items()))
+                statistics = next(iter(paths_statistics.values()))
                 latency_percentile_filtered_one_path = "{:.2f}".format(
-                    latency_percentile(latency, float(percentile))
+                    statistics["percentiles"][percentile]
                 )
                 if args.cdash:
                     print(
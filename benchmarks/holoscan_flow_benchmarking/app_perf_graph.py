@@ -14,8 +14,9 @@
 # limitations under the License.
 
 import argparse
+import collections
+import math
 import os
-import queue
 import sys
 import time
 
@@ -25,6 +26,93 @@ from log_parser import parse_line_from_log
 # independent run instruction: python3 app_perf_graph.py <filenames>
 
 
+# This class is a streaming latency histogram with logarithmically sized buckets (as in HDR
+# histograms and DDSketch). Percentiles have a bounded relative error and the memory only grows
+# with the logarithm of the latency range, not with the number of samples.
+class LatencyHistogram:
+    def __init__(self, relative_error=0.01):
+        self._gamma = (1 + relative_error) / (1 - relative_error)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets = collections.Counter()
+        self._zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            self._zero_count += 1
+        else:
+            self._buckets[math.ceil(math.log(value) / self._log_gamma)] += 1
+
+    def percentile(self, percentile):
+        if self.count == 0:
+            return float("nan")
+        rank = percentile / 100.0 * (self.count - 1)
+        seen = self._zero_count
+        if rank < seen:
+            return 0.0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if rank < seen:
+                return 2 * self._gamma**bucket / (self._gamma + 1)
+        return 2 * self._gamma ** max(self._buckets) / (self._gamma + 1)
+
+
+# This class keeps O(1) streaming statistics of latencies: Welford's running mean and variance,
+# the maximum, and a LatencyHistogram for percentiles
+class LatencyStatistics:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.max = float("-inf")
+        self._histogram = LatencyHistogram()
+
+    def add(self, latency):
+        self.count += 1
+        delta = latency - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (latency - self.mean)
+        self.max = max(self.max, latency)
+        self._histogram.add(latency)
+
+    @property
+    def stddev(self):
+        return math.sqrt(self._m2 / self.count) if self.count else float("nan")
+
+    def percentile(self, percentile):
+        return self._histogram.percentile(percentile)
+
+
+# This class incrementally reads the complete lines appended to a log file. It remembers the
+# byte offset it read up to, so each poll only costs the size of the new data.
+class LogFollower:
+    def __init__(self, log_file):
+        self.log_file = log_file
+        self.offset = 0
+        self._partial_line = b""
+
+    def read_lines(self):
+        try:
+            size = os.path.getsize(self.log_file)
+        except OSError:
+            return []
+        if size < self.offset:
+            # the file was truncated or replaced, start over
+            self.offset = 0
+            self._partial_line = b""
+        if size == self.offset:
+            return []
+        with open(self.log_file, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        self.offset += len(data)
+        lines = (self._partial_line + data).split(b"\n")
+        # the last element is an incomplete line (or empty) that is completed by later writes
+        self._partial_line = lines.pop()
+        return [line.decode("utf-8", errors="replace") for line in lines]
+
+
 # This function returns the latency between operator pairs and the time spent in each operator
 def get_operator_latency(op_timestamps):
     operator_latency = {}
@@ -40,131 +128,80 @@ def get_operator_latency(op_timestamps):
     return operator_latency, edge_latency
 
 
-def update_op_edge_latency(
-    op_latency,
-    edge_latency,
-    operator_avg_latencies,
-    operator_max_latencies,
-    edge_avg_latencies,
-    edge_max_latencies,
-    num_samples,
-):
+def update_op_edge_latency(op_latency, edge_latency, operator_statistics, edge_statistics):
     for op, latency in op_latency.items():
-        if op in operator_avg_latencies:
-            operator_avg_latencies[op] = float(
-                operator_avg_latencies[op] * num_samples + latency
-            ) / (num_samples + 1)
-            operator_max_latencies[op] = max(operator_max_latencies[op], latency)
-        else:
-            operator_avg_latencies[op] = latency
-            operator_max_latencies[op] = latency
+        if op not in operator_statistics:
+            operator_statistics[op] = LatencyStatistics()
+        operator_statistics[op].add(latency)
     for edge, latency in edge_latency.items():
-        if edge in edge_avg_latencies:
-            edge_avg_latencies[edge] = float(edge_avg_latencies[edge] * num_samples + latency) / (
-                num_samples + 1
-            )
-            edge_max_latencies[edge] = max(edge_max_latencies[edge], latency)
-        else:
-            edge_avg_latencies[edge] = latency
-            edge_max_latencies[edge] = latency
-    return operator_avg_latencies, operator_max_latencies, edge_avg_latencies, edge_max_latencies
+        if edge not in edge_statistics:
+            edge_statistics[edge] = LatencyStatistics()
+        edge_statistics[edge].add(latency)
 
 
+# This function adds the messages of a whole log file to the operator and edge statistics,
+# skipping the first skip_begin_messages and the last discard_last_messages messages.
+# It returns the number of added messages.
 def parse_log(
     log_file,
-    startline=0,
-    operator_avg_latencies={},
-    operator_max_latencies={},
-    edge_avg_latencies={},
-    edge_max_latencies={},
-    num_samples=0,
+    operator_statistics,
+    edge_statistics,
     skip_begin_messages=10,
     discard_last_messages=10,
-    livefile=False,
 ):
+    num_samples = 0
+    # this is a buffer to discard the last messages
+    buffered_op_edge_latencies = collections.deque()
     with open(log_file, "r") as f:
-        read_lines = 0
-        if startline:
-            # skip startline number of lines in f
-            for _ in range(startline):
-                f.readline()
-        # this is a buffer to see whether to discard the last 10 messages
-        buffered_op_edge_latencies = queue.Queue(maxsize=discard_last_messages + 1)
         for line in f:
-            read_lines += 1
-            if line[0] == "(":
-                if skip_begin_messages > 0 and startline == 0:
-                    skip_begin_messages -= 1
-                    continue
-                op_latency, edge_latency = get_operator_latency(parse_line_from_log(line))
-                buffered_op_edge_latencies.put((op_latency, edge_latency))
-                if buffered_op_edge_latencies.full():
-                    old_op_latency, old_edge_latency = buffered_op_edge_latencies.get()
-                    update_op_edge_latency(
-                        old_op_latency,
-                        old_edge_latency,
-                        operator_avg_latencies,
-                        operator_max_latencies,
-                        edge_avg_latencies,
-                        edge_max_latencies,
-                        num_samples,
-                    )
-                    num_samples += 1
-        # if the file is live, then we don't want to discard the last few messages
-        while (livefile and not buffered_op_edge_latencies.empty()) or (
-            not livefile and buffered_op_edge_latencies.qsize() > discard_last_messages
-        ):
-            old_op_latency, old_edge_latency = buffered_op_edge_latencies.get()
-            update_op_edge_latency(
-                old_op_latency,
-                old_edge_latency,
-                operator_avg_latencies,
-                operator_max_latencies,
-                edge_avg_latencies,
-                edge_max_latencies,
-                num_samples,
-            )
-            num_samples += 1
-        return (
-            operator_avg_latencies,
-            operator_max_latencies,
-            edge_avg_latencies,
-            edge_max_latencies,
-            num_samples,
-            read_lines,
-        )
+            if line[0] != "(":
+                continue
+            if skip_begin_messages > 0:
+                skip_begin_messages -= 1
+                continue
+            buffered_op_edge_latencies.append(get_operator_latency(parse_line_from_log(line)))
+            if len(buffered_op_edge_latencies) > discard_last_messages:
+                update_op_edge_latency(
+                    *buffered_op_edge_latencies.popleft(), operator_statistics, edge_statistics
+                )
+                num_samples += 1
+    return num_samples
 
 
-def create_graph(
-    operator_avg_latencies,
-    operator_max_latencies,
-    edge_avg_latencies,
-    edge_max_latencies,
-    num_samples,
-    highlight,
-):
+def create_graph(operator_statistics, edge_statistics, highlight):
     # Go through all of the operator's average latencies and find the average
-    if highlight and len(operator_avg_latencies) > 0:
-        values = operator_avg_latencies.values()
-        total_sum = sum(values)
-        avg_op_latency = total_sum / len(values)
+    if highlight and len(operator_statistics) > 0:
+        values = [statistics.mean for statistics in operator_statistics.values()]
+        avg_op_latency = sum(values) / len(values)
 
     graph = pydot.Dot(graph_type="digraph")
-    for op, latency in operator_avg_latencies.items():
+    for op, statistics in operator_statistics.items():
+        latency = statistics.mean
         color = "red" if highlight and (latency > avg_op_latency) else "black"
         penwidth = "2.0" if highlight and (latency > avg_op_latency) else "1.0"
         node = pydot.Node(
             op,
             color=color,
             penwidth=penwidth,
-            label="{}\navg: {:.2f}\nmax: {:.2f}".format(op, latency, operator_max_latencies[op]),
+            label="{}\navg: {:.2f}\nmax: {:.2f}\np50: {:.2f}\np99: {:.2f}".format(
+                op,
+                latency,
+                statistics.max,
+                statistics.percentile(50),
+                statistics.percentile(99),
+            ),
         )
         graph.add_node(node)
-    for edge, latency in edge_avg_latencies.items():
+    for edge, statistics in edge_statistics.items():
         edge = pydot.Edge(
             edge[0],
             edge[1],
-            label="avg: {:.2f}\nmax: {:.2f}".format(latency, edge_max_latencies[edge]),
+            label="avg: {:.2f}\nmax: {:.2f}\np50: {:.2f}\np99: {:.2f}".format(
+                statistics.mean,
+                statistics.max,
+                statistics.percentile(50),
+                statistics.percentile(99),
+            ),
         )
         graph.add_edge(edge)
     return graph
@@ -198,6 +235,12 @@ def parse_arguments():
     parser.add_argument(
         "-l", "--live", action="store_true", help="live mode: keep updating the graph with new data"
     )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        help="live mode: seconds between checks of the log files for new data",
+    )
     parser.add_argument(
         "-o",
         "--output",
@@ -258,39 +301,14 @@ def parse_arguments():
     return args
 
 
-def create_dot_file(filenames, output_filename, live_graph, verbose, highlight):
+def create_dot_file(filenames, output_filename, live_graph, verbose, highlight, poll_interval=1.0):
+    operator_statistics = {}
+    edge_statistics = {}
+    num_samples = 0
     if not live_graph:
-        filenames = filenames
-        operator_avg_latencies = {}
-        operator_max_latencies = {}
-        edge_avg_latencies = {}
-        edge_max_latencies = {}
-        num_samples = 0
         for filename in filenames:
-            (
-                operator_avg_latencies,
-                operator_max_latencies,
-                edge_avg_latencies,
-                edge_max_latencies,
-                num_samples,
-                read_lines,
-            ) = parse_log(
-                filename,
-                0,
-                operator_avg_latencies,
-                operator_max_latencies,
-                edge_avg_latencies,
-                edge_max_latencies,
-                num_samples,
-            )
-        graph = create_graph(
-            operator_avg_latencies,
-            operator_max_latencies,
-            edge_avg_latencies,
-            edge_max_latencies,
-            num_samples,
-            highlight,
-        )
+            num_samples += parse_log(filename, operator_statistics, edge_statistics)
+        graph = create_graph(operator_statistics, edge_statistics, highlight)
         graph = add_graph_labels(graph, num_samples)
         graph.write(output_filename)
         if verbose:
@@ -300,12 +318,9 @@ def create_dot_file(filenames, output_filename, live_graph, verbose, highlight):
     else:
         # live mode
         directory = filenames[0]
-        operator_avg_latencies = {}
-        operator_max_latencies = {}
-        edge_avg_latencies = {}
-        edge_max_latencies = {}
-        num_samples = 0
-        read_files = {}
+        followers = {}
+        # number of messages still to skip at the beginning of each log file
+        skip_begin_messages = {}
         while True:
             log_files = [f for f in os.listdir(directory) if f.endswith(".log")]
             if len(log_files) == 0:
@@ -315,47 +330,35 @@ def create_dot_file(filenames, output_filename, live_graph, verbose, highlight):
                             directory
                         )
                     )
-                    print("sleeping for 1 seconds")
-                time.sleep(1)
+                    print("sleeping for {} seconds".format(poll_interval))
+                time.sleep(poll_interval)
                 continue
             # sort the files in ascending order of their creation time
             log_files.sort(key=lambda x: os.path.getctime(os.path.join(directory, x)))
             for filename in log_files:
-                if filename not in read_files:
-                    read_files[filename] = 0
+                if filename not in followers:
+                    followers[filename] = LogFollower(os.path.join(directory, filename))
+                    skip_begin_messages[filename] = 10
                 prev_num_samples = num_samples
-                (
-                    operator_avg_latencies,
-                    operator_max_latencies,
-                    edge_avg_latencies,
-                    edge_max_latencies,
-                    num_samples,
-                    read_lines,
-                ) = parse_log(
-                    os.path.join(directory, filename),
-                    read_files[filename],
-                    operator_avg_latencies,
-                    operator_max_latencies,
-                    edge_avg_latencies,
-                    edge_max_latencies,
-                    num_samples,
-                    skip_begin_messages=10,
-                    discard_last_messages=0,
-                    livefile=True,
-                )
-                read_files[filename] += read_lines
-                if prev_num_samples != num_samples:
-                    graph = create_graph(
-                        operator_avg_latencies,
-                        operator_max_latencies,
-                        edge_avg_latencies,
-                        edge_max_latencies,
-                        num_samples,
-                        highlight,
+                for line in followers[filename].read_lines():
+                    if not line.startswith("("):
+                        continue
+                    if skip_begin_messages[filename] > 0:
+                        skip_begin_messages[filename] -= 1
+                        continue
+                    update_op_edge_latency(
+                        *get_operator_latency(parse_line_from_log(line)),
+                        operator_statistics,
+                        edge_statistics,
                     )
+                    num_samples += 1
+                if prev_num_samples != num_samples:
+                    graph = create_graph(operator_statistics, edge_statistics, highlight)
                     if verbose:
                         print(
-                            "Read file {} - Line number: {}".format(filename, read_files[filename])
+                            "Read file {} - Byte offset: {}".format(
+                                filename, followers[filename].offset
+                            )
                         )
                     graph = add_graph_labels(graph, num_samples)
                     graph.write(output_filename)
@@ -367,10 +370,17 @@ def create_dot_file(filenames, output_filename, live_graph, verbose, highlight):
                         )
 
             if verbose:
-                print("sleeping for 1 seconds")
-            time.sleep(1)
+                print("sleeping for {} seconds".format(poll_interval))
+            time.sleep(poll_interval)
 
 
 if __name__ == "__main__":
     args = parse_arguments()
-    create_dot_file(args.filenames, args.output, args.live, args.verbose, args.highlight)
+    create_dot_file(
+        args.filenames,
+        args.output,
+        args.live,
+        args.verbose,
+        args.highlight,
+        poll_interval=args.poll_interval,
+    )
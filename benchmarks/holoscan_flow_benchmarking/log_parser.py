@@ -13,6 +13,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+from array import array
+
+import numpy as np
+
 
 def parse_line_from_log(line):
     operators = line.split("->")
@@ -59,21 +64,122 @@ def is_same_path(line1, line2):
     return True
 
 
-# parse the log file and return all the latencies for each path
+# tokenize a log line once and return a (path, source receive timestamp, source publish
+# timestamp, sink publish timestamp) record, with integer timestamps as logged (microseconds)
+def parse_record_from_log(line, path_separator="→ "):
+    op_timestamps = parse_line_from_log(line)
+    path = path_separator.join(op_timestamp[0] for op_timestamp in op_timestamps)
+    return (
+        path,
+        int(op_timestamps[0][1]),
+        int(op_timestamps[0][2]),
+        int(op_timestamps[-1][2]),
+    )
+
+
+# same rules as is_same_path, but on records that are already parsed
+def is_same_record(record1, record2):
+    if record1 is None or record2 is None:
+        return False
+    path1, source_receive1, source_publish1, sink_publish1 = record1
+    path2, source_receive2, source_publish2, sink_publish2 = record2
+    if path1 != path2:
+        return False
+    if source_receive1 != source_receive2 or source_publish1 != source_publish2:
+        return False
+    return abs(sink_publish1 - sink_publish2) <= 20
+
+
+# parse the log file in a single pass and return the integer latencies (in the log's timestamp
+# unit, microseconds) of each path in compact array('q') buffers
 # The format is (Operator1, receive timestamp, publish timestsamp) -> (Operator2, receive timestamp,
 # publish timestsamp) -> ... -> (OperatorN, receive timestamp, publish timestsamp)
-def parse_log_as_paths_latencies(log_file):
+def parse_log_as_paths_raw_latencies(log_file):
+    paths_latencies = {}
+    last_record = None
     with open(log_file, "r") as f:
-        paths_latencies = {}
-        last_line = ""
         for line in f:
-            if line[0] == "(":
-                path_latency = get_path_latency(parse_line_from_log(line))
-                if is_same_path(last_line, line):
-                    continue
-                if path_latency[0] in paths_latencies:
-                    paths_latencies[path_latency[0]].append(path_latency[1])
-                else:
-                    paths_latencies[path_latency[0]] = [path_latency[1]]
-                last_line = line
-        return paths_latencies
+            if line[0] != "(":
+                continue
+            record = parse_record_from_log(line)
+            # consecutive duplicate messages are only recorded once
+            if is_same_record(last_record, record):
+                continue
+            latencies = paths_latencies.get(record[0])
+            if latencies is None:
+                latencies = paths_latencies[record[0]] = array("q")
+            latencies.append(record[3] - record[1])
+            last_record = record
+    return paths_latencies
+
+
+# the cache file is hidden so that globs over the log files (e.g., logger_greedy_*) don't match it
+def get_cache_file(log_file):
+    directory, filename = os.path.split(log_file)
+    return os.path.join(directory, "." + filename + ".npz")
+
+
+# save the parsed latencies of a log file in a binary .npz cache next to the log file, together
+# with the size and modification time of the log file to detect stale caches
+def save_paths_latencies_cache(log_file, paths_latencies, cache_file=None):
+    cache_file = cache_file or get_cache_file(log_file)
+    stat = os.stat(log_file)
+    paths = list(paths_latencies.keys())
+    lengths = [len(paths_latencies[path]) for path in paths]
+    latencies = np.concatenate(
+        [np.asarray(paths_latencies[path], dtype=np.int64) for path in paths] or [[]]
+    ).astype(np.int64)
+    tmp_file = cache_file + ".tmp"
+    with open(tmp_file, "wb") as f:
+        np.savez(
+            f,
+            paths=np.array(paths, dtype=str),
+            lengths=np.array(lengths, dtype=np.int64),
+            latencies=latencies,
+            log_size=stat.st_size,
+            log_mtime_ns=stat.st_mtime_ns,
+        )
+    os.replace(tmp_file, cache_file)
+
+
+# load the latencies of a log file from its .npz cache, or return None if there is no cache or
+# the log file changed since the cache was written
+def load_paths_latencies_cache(log_file, cache_file=None):
+    cache_file = cache_file or get_cache_file(log_file)
+    if not os.path.isfile(cache_file):
+        return None
+    stat = os.stat(log_file)
+    with np.load(cache_file, allow_pickle=False) as cache:
+        if int(cache["log_size"]) != stat.st_size or int(cache["log_mtime_ns"]) != stat.st_mtime_ns:
+            return None
+        paths = cache["paths"].tolist()
+        latencies = np.split(cache["latencies"], np.cumsum(cache["lengths"])[:-1])
+    return dict(zip(paths, latencies))
+
+
+# parse the log file and return the integer latencies (microseconds) of each path as int64 NumPy
+# arrays. With use_cache, the result is read from and written to a .npz cache next to the log file
+def parse_log_as_paths_latency_arrays(log_file, use_cache=False):
+    if use_cache:
+        paths_latencies = load_paths_latencies_cache(log_file)
+        if paths_latencies is not None:
+            return paths_latencies
+    paths_latencies = {
+        path: np.frombuffer(latencies, dtype=np.int64)
+        for path, latencies in parse_log_as_paths_raw_latencies(log_file).items()
+    }
+    if use_cache:
+        try:
+            save_paths_latencies_cache(log_file, paths_latencies)
+        except OSError:
+            # the cache is only an optimization, e.g., the log directory may be read-only
+            pass
+    return paths_latencies
+
+
+# parse the log file and return all the latencies (in ms) for each path
+def parse_log_as_paths_latencies(log_file, use_cache=False):
+    return {
+        path: (latencies / 1000.0).tolist()
+        for path, latencies in parse_log_as_paths_latency_arrays(log_file, use_cache).items()
+    }
@@ -17,7 +17,9 @@
 import base64
 import json
 import logging
+import multiprocessing
 import re
+from concurrent.futures import Executor, ProcessPoolExecutor
 from typing import Any, Dict, List, Optional, Tuple
 
 import pydantic
@@ -44,6 +46,59 @@ from fhir.resources.R4B.servicerequest import ServiceRequest
 
 logger = logging.getLogger("FHIRResourceSanitizer")
 
+# Resource types that are recognized but not included in the sanitized output.
+UNSUPPORTED_RESOURCE_TYPES = frozenset(
+    [
+        "CareTeam",
+        "Claim",
+        "Device",
+        "ExplanationOfBenefit",
+        "Location",
+        "MedicationAdministration",
+        "Organization",
+        "Practitioner",
+        "PractitionerRole",
+        "Provenance",
+        "SupplyDelivery",
+    ]
+)
+
+# fhir.resources model attribute names that differ from the FHIR JSON element names.
+_RAW_ELEMENT_ALIASES = {"resource_type": "resourceType", "class_fhir": "class"}
+
+
+class _RawString(str):
+    """A string from a raw FHIR document that can stand in for a parsed date/time value."""
+
+    def isoformat(self) -> str:
+        return str(self)
+
+
+class _RawElement:
+    """Attribute access over a raw FHIR element dictionary, mirroring the fhir.resources models.
+
+    Missing elements read as None, nested elements and lists are wrapped on access, and the
+    `resource_type` and `class_fhir` model attributes map to `resourceType` and `class`.
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: Dict):
+        self._data = data
+
+    def __getattr__(self, name: str) -> Any:
+        return _RawElement._wrap(self._data.get(_RAW_ELEMENT_ALIASES.get(name, name), None))
+
+    @staticmethod
+    def _wrap(value: Any) -> Any:
+        if isinstance(value, dict):
+            return _RawElement(value)
+        if isinstance(value, list):
+            return [_RawElement._wrap(item) for item in value]
+        if isinstance(value, str):
+            return _RawString(value)
+        return value
+
 
 class FHIRResourceSanitizer:
     """
@@ -51,7 +106,7 @@ class FHIRResourceSanitizer:
     """
 
     @staticmethod
-    def sanitize(data: Dict) -> Optional[Dict]:
+    def sanitize(data: Dict, validate: bool = True) -> Optional[Dict]:
         """
         The sanitize method extracts wanted data, removes non-compliant entries, and then transforms
         the data structure so the AI model can better understand the details of a given FHIR record.
@@ -69,10 +124,14 @@ class FHIRResourceSanitizer:
                     "url": "[FHIR Resource Type]"
                 }
             }
+            validate (bool): when True, the resource is parsed and validated into its
+                fhir.resources model before extraction. When False, the values are extracted
+                directly from the dictionary without validation, which is much faster but
+                keeps date/time values as they appear in the document.
 
         Raises:
             NotImplementedError: if the FHIR resource type is not supported.
-                Note: unsupported resource types shall be added to the map.
+                Note: unsupported resource types shall be added to UNSUPPORTED_RESOURCE_TYPES.
 
         Returns:
             Optional[Dict]: a sanitized/transformed FHIR document/record.
@@ -82,61 +141,64 @@ class FHIRResourceSanitizer:
             return None
 
         resource_type = resource.get("resourceType", None)
-        if resource_type is None:
+        if resource_type is None or resource_type in UNSUPPORTED_RESOURCE_TYPES:
             return None
 
-        map = {
-            "AllergyIntolerance": FHIRResourceSanitizer.allergy_intolerance,
-            "CarePlan": FHIRResourceSanitizer.care_plan,
-            "Condition": FHIRResourceSanitizer.condition,
-            "DiagnosticReport": FHIRResourceSanitizer.diagnostic_report,
-            "DocumentReference": FHIRResourceSanitizer.document_reference,
-            "Encounter": FHIRResourceSanitizer.encounter,
-            "FamilyMemberHistory": FHIRResourceSanitizer.family_member_history,
-            "Medication": FHIRResourceSanitizer.medication,
-            "MedicationRequest": FHIRResourceSanitizer.medication_request,
-            "MedicationStatement": FHIRResourceSanitizer.medication_statement,
-            "ImagingStudy": FHIRResourceSanitizer.imaging_study,
-            "Immunization": FHIRResourceSanitizer.immunization,
-            "Observation": FHIRResourceSanitizer.observation,
-            "Patient": FHIRResourceSanitizer.patient,
-            "Procedure": FHIRResourceSanitizer.procedure,
-            "ServiceRequest": FHIRResourceSanitizer.service_request,
-            # unsupported resource types
-            "CareTeam": FHIRResourceSanitizer._no_op,
-            "Claim": FHIRResourceSanitizer._no_op,
-            "Device": FHIRResourceSanitizer._no_op,
-            "ExplanationOfBenefit": FHIRResourceSanitizer._no_op,
-            "Location": FHIRResourceSanitizer._no_op,
-            "MedicationAdministration": FHIRResourceSanitizer._no_op,
-            "Organization": FHIRResourceSanitizer._no_op,
-            "Practitioner": FHIRResourceSanitizer._no_op,
-            "PractitionerRole": FHIRResourceSanitizer._no_op,
-            "Provenance": FHIRResourceSanitizer._no_op,
-            "SupplyDelivery": FHIRResourceSanitizer._no_op,
-        }
+        handler = _SANITIZERS.get(resource_type, None)
+        if handler is None:
+            raise NotImplementedError(f"{resource_type} type, id={resource.get('id', None)}")
+
+        if not validate:
+            return handler(data, _RawElement(resource))
 
         try:
             model = construct_fhir_element(resource_type, resource)
         # If using fhir.resources 7.0.0, then the error type is
         #      pydantic.error_wrappers.ValidationError
         except pydantic.v1.error_wrappers.ValidationError:
-            logger.error("Validation error while processing: ", resource)
+            logger.error("Validation error while processing: %s", resource)
             return None
 
-        if resource_type in map:
-            return map[resource_type](data, model)
-        else:
-            raise NotImplementedError(f"{resource_type} type, id={model.id}")
+        return handler(data, model)
 
     @staticmethod
-    def _no_op(original_data: Dict, model: Any) -> None:
-        """For unsupported FHIR resources
+    def sanitize_records(
+        records: List[Dict],
+        validate: bool = True,
+        num_workers: int = 1,
+        chunk_size: int = 1000,
+        executor: Optional[Executor] = None,
+    ) -> Tuple[List[Dict], List[str]]:
+        """Sanitizes a list of FHIR documents/records, optionally across multiple processes.
+
+        Args:
+            records (List[Dict]): FHIR documents, each in the format accepted by `sanitize`.
+            validate (bool): see `sanitize`.
+            num_workers (int): number of worker processes. With 1, or when the records fit in a
+                single chunk, the records are sanitized in the calling process.
+            chunk_size (int): number of records sent to a worker process at a time.
+            executor (Optional[Executor]): process pool to sanitize the chunks in, so that it is
+                reused across calls. When None, a pool of spawned processes is created for the call.
 
         Returns:
-            None
+            Tuple[List[Dict], List[str]]: the sanitized records, in input order and without the
+                skipped ones, and the messages of the records that are not supported.
         """
-        return None
+        if num_workers <= 1 or len(records) <= chunk_size:
+            return _sanitize_chunk((records, validate))
+
+        chunks = [
+            (records[index : index + chunk_size], validate)
+            for index in range(0, len(records), chunk_size)
+        ]
+        if executor is not None:
+            return _sanitize_chunks(executor, chunks)
+        # Spawned rather than forked, as the calling process may be running other threads
+        with ProcessPoolExecutor(
+            max_workers=min(num_workers, len(chunks)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            return _sanitize_chunks(executor, chunks)
 
     @staticmethod
     def imaging_study(original_data: Dict, model: ImagingStudy) -> Dict:
@@ -638,6 +700,53 @@ class FHIRResourceSanitizer:
         return re.sub(tags, "", text)
 
 
+_SANITIZERS = {
+    "AllergyIntolerance": FHIRResourceSanitizer.allergy_intolerance,
+    "CarePlan": FHIRResourceSanitizer.care_plan,
+    "Condition": FHIRResourceSanitizer.condition,
+    "DiagnosticReport": FHIRResourceSanitizer.diagnostic_report,
+    "DocumentReference": FHIRResourceSanitizer.document_reference,
+    "Encounter": FHIRResourceSanitizer.encounter,
+    "FamilyMemberHistory": FHIRResourceSanitizer.family_member_history,
+    "Medication": FHIRResourceSanitizer.medication,
+    "MedicationRequest": FHIRResourceSanitizer.medication_request,
+    "MedicationStatement": FHIRResourceSanitizer.medication_statement,
+    "ImagingStudy": FHIRResourceSanitizer.imaging_study,
+    "Immunization": FHIRResourceSanitizer.immunization,
+    "Observation": FHIRResourceSanitizer.observation,
+    "Patient": FHIRResourceSanitizer.patient,
+    "Procedure": FHIRResourceSanitizer.procedure,
+    "ServiceRequest": FHIRResourceSanitizer.service_request,
+}
+
+
+def _sanitize_chunk(args: Tuple[List[Dict], bool]) -> Tuple[List[Dict], List[str]]:
+    """Sanitizes a chunk of records; a module-level function so it can run in a worker process."""
+    records, validate = args
+    sanitized_records = []
+    errors = []
+    for record in records:
+        try:
+            sanitized_record = FHIRResourceSanitizer.sanitize(record, validate)
+            if sanitized_record:
+                sanitized_records.append(sanitized_record)
+        except NotImplementedError as e:
+            errors.append(str(e))
+    return sanitized_records, errors
+
+
+def _sanitize_chunks(
+    executor: Executor, chunks: List[Tuple[List[Dict], bool]]
+) -> Tuple[List[Dict], List[str]]:
+    """Sanitizes chunks of records in the executor, and joins the results in chunk order."""
+    sanitized_records = []
+    errors = []
+    for chunk_records, chunk_errors in executor.map(_sanitize_chunk, chunks):
+        sanitized_records.extend(chunk_records)
+        errors.extend(chunk_errors)
+    return sanitized_records, errors
+
+
 if __name__ == "__main__":
     from pathlib import Path
 
@@ -15,11 +15,17 @@
 
 
 import logging
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from time import perf_counter as pc
-from typing import Dict, List
+from typing import Dict, Iterator, List
 
 import requests
-from holoscan.core import ConditionType, Fragment, Operator, OperatorSpec
+from holoscan.conditions import PeriodicCondition
+from holoscan.core import ConditionType, Fragment, IOSpec, Operator, OperatorSpec
+from requests.adapters import HTTPAdapter
 
 from operators.ehr_query_llm.fhir.ehr_query import FHIRQuery
 from operators.ehr_query_llm.fhir.ehr_response import FHIRQueryResponse
@@ -40,6 +46,10 @@ class FhirClientOperator(Operator):
         out: a FHIRQueryResponse object containing the original request ID and all matching patient and their medical records;
              key=Patient ID/MRN
              value=list of Python dictionary objects where each dict object represents a FHIR resource object
+        batch: in streaming mode, a FHIRQueryResponse object per page of resources of a patient.
+               One page is emitted per compute call while the other pages are fetched, so that
+               downstream operators receive the pages as they arrive.
+               Optional, not requiring a downstream receiver.
     """
 
     def __init__(
@@ -49,6 +59,10 @@ class FhirClientOperator(Operator):
         fhir_endpoint: str = "http://localhost:8080/",
         token_provider: TokenProvider = None,
         verify_cert: bool = True,
+        max_concurrency: int = 4,
+        streaming: bool = False,
+        batch_queue_capacity: int = 64,
+        poll_period: float = 0.01,
         **kwargs,
     ):
         """An operator that queries FHIR service based on information received via
@@ -56,20 +70,67 @@ class FhirClientOperator(Operator):
 
         Args:
             fhir_endpoint (str): FHIR endpoint
+            token_provider (TokenProvider): provider of the authorization token, None if not required.
+            verify_cert (bool): True to verify the server certificate.
+            max_concurrency (int): maximum number of patients whose resources are fetched concurrently,
+                                   and size of the HTTP connection pool.
+            streaming (bool): True to also emit each page of resources on the `batch` output as it is fetched.
+                              The `request` input is then optional and polled: each compute call emits
+                              at most one page, and the `out` response once all pages are fetched.
+            batch_queue_capacity (int): capacity of the `batch` output queue in streaming mode.
+                                        Pages that do not fit in the queue are dropped from the
+                                        `batch` output with a warning, and kept in the `out` response.
+            poll_period (float): period in seconds of the compute calls in streaming mode, which a
+                                 periodic condition throttles since no input message triggers them.
         Raises:
-            ValueError: if queue_policy is out of range.
+            ValueError: if max_concurrency is less than 1, or poll_period is not positive.
         """
         self._logger = logging.getLogger("{}.{}".format(__name__, type(self).__name__))
 
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}.")
+        if streaming and poll_period <= 0:
+            raise ValueError(f"poll_period must be positive, got {poll_period}.")
+
         self._fhir_endpoint = fhir_endpoint
         self._token_provider = token_provider  # If None, assume no auth token required.
         self._verify_cert = verify_cert  # True to verify server cert
+        self._max_concurrency = max_concurrency
+        self._streaming = streaming
+        self._batch_queue_capacity = batch_queue_capacity
+
+        # Streaming state: requests waiting for the current one to complete, and the current one
+        self._pending_queries = deque()
+        self._stream = None
+        self._executor = None
+
+        # A pooled session reuses the TCP/TLS connections across pages, patients and requests.
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        if streaming:
+            # The polled input does not schedule compute, so it would otherwise run back to back.
+            args = (*args, PeriodicCondition(fragment, timedelta(seconds=poll_period)))
 
         super().__init__(fragment, *args, **kwargs)
 
     def setup(self, spec: OperatorSpec):
-        spec.input("request")
+        if self._streaming:
+            # Polled, so that compute keeps emitting the pages of a request without new requests.
+            spec.input("request").condition(ConditionType.NONE)
+        else:
+            spec.input("request")
         spec.output("out").condition(ConditionType.NONE)
+        spec.output("batch").condition(ConditionType.NONE).connector(
+            IOSpec.ConnectorType.DOUBLE_BUFFER, capacity=self._batch_queue_capacity
+        )
+
+    def stop(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
     def compute(self, op_input, op_output, context):
         """
@@ -79,45 +140,48 @@ class FhirClientOperator(Operator):
         Raises:
             InvalidRequestBodyError: when the message received from message queue is malformed.
         """
-        try:
-            self._logger.debug("FHIR Client op processing request...")
-            request_str = op_input.receive("request")
-            query_parameters = FHIRQuery.from_json(request_str)
-        except Exception as ex:
-            raise InvalidRequestBodyError(request_str, ex)
+        if self._streaming:
+            self._compute_streaming(op_input, op_output)
+            return
 
+        query_parameters = self._receive_query(op_input)
         start = pc()
         try:
             patient_urls = self._find_patients(query_parameters)
-            patient_resources = {}
-            for id, url in patient_urls.items():
-                resources = []
-                self._fetch_patient_resources(query_parameters, id, url, resources)
-                patient_resources[id] = resources
-
-            if patient_resources:
-                self._logger.info(
-                    f"{query_parameters.request_id}: Found {len(patient_resources.keys())} patient(s) with {sum(len(item) for item in patient_resources.values())} matching FHIR resources."
-                )
-                op_output.emit(
-                    FHIRQueryResponse(query_parameters.request_id, patient_resources), "out"
-                )
-
+            patient_resources = self._fetch_all_patient_resources(query_parameters, patient_urls)
+            self._emit_response(query_parameters, patient_resources, op_output)
         except Exception as ex:
-            self._logger.error(
-                f"{query_parameters.request_id}: Error performing FHIR query", str(ex)
-            )
+            self._logger.error(f"{query_parameters.request_id}: Error performing FHIR query: {ex}")
 
         end = pc()
         self._logger.info(
             f"{query_parameters.request_id}: FHIR query elapsed: {end - start} seconds"
         )
 
+    def _receive_query(self, op_input) -> FHIRQuery:
+        """Receives the next request, None if the optional input has no message."""
+        request_str = None
+        try:
+            self._logger.debug("FHIR Client op processing request...")
+            request_str = op_input.receive("request")
+            if request_str is None and self._streaming:
+                return None
+            return FHIRQuery.from_json(request_str)
+        except Exception as ex:
+            raise InvalidRequestBodyError(request_str, ex)
+
+    def _emit_response(self, query_parameters: FHIRQuery, patient_resources, op_output):
+        if patient_resources:
+            self._logger.info(
+                f"{query_parameters.request_id}: Found {len(patient_resources.keys())} patient(s) with {sum(len(item) for item in patient_resources.values())} matching FHIR resources."
+            )
+            op_output.emit(FHIRQueryResponse(query_parameters.request_id, patient_resources), "out")
+
     def _find_patients(self, query_parameters: FHIRQuery) -> Dict[str, str]:
         request_url = self._fhir_endpoint + query_parameters.get_patient_query()
 
         self._logger.debug(f"{query_parameters.request_id}: Querying patient from {request_url}")
-        response = requests.get(
+        response = self._session.get(
             request_url,
             headers=self._create_headers(),
             verify=self._verify_cert,
@@ -152,35 +216,152 @@ class FhirClientOperator(Operator):
 
         return patient_urls
 
-    def _fetch_patient_resources(
-        self, query_parameters: FHIRQuery, id: str, url: str, entries: List[str]
-    ):
-        self._logger.debug(
-            f"{query_parameters.request_id}: Fetching resources for patient {id} from {url}"
-        )
+    def _fetch_all_patient_resources(
+        self, query_parameters: FHIRQuery, patient_urls: Dict[str, str]
+    ) -> Dict[str, List[Dict]]:
+        """Fetches the resources of the patients concurrently, keeping the order of the patients."""
+
+        def _fetch(item):
+            id, url = item
+            resources = []
+            self._fetch_patient_resources(query_parameters, id, url, resources)
+            return id, resources
+
+        with ThreadPoolExecutor(max_workers=self._max_concurrency) as executor:
+            return dict(executor.map(_fetch, patient_urls.items()))
+
+    def _compute_streaming(self, op_input, op_output):
+        """Emits at most one page of the current request per call.
+
+        Holoscan only delivers the messages of a compute call once it returns, so emitting one page
+        per call lets downstream operators receive the pages while the other ones are fetched, and
+        keeps the `batch` queue from filling up within a call.
+        """
+        query_parameters = self._receive_query(op_input)
+        if query_parameters is not None:
+            self._pending_queries.append(query_parameters)
+
+        if self._stream is None:
+            if not self._pending_queries:
+                return
+            self._stream = self._start_stream(self._pending_queries.popleft())
+
+        stream = self._stream
+        while True:
+            try:
+                id, entries = stream.pages.get_nowait()
+            except queue.Empty:
+                return  # Nothing fetched yet, the next compute call checks again.
+            if entries is not None:
+                stream.patient_resources[id].extend(entries)
+                self._emit_batch(stream, id, entries, op_output)
+                return
+            stream.pending -= 1
+            if stream.pending == 0:
+                self._finish_stream(op_output)
+                return
+
+    def _start_stream(self, query_parameters: FHIRQuery) -> "_PatientResourceStream":
+        """Finds the patients of a request and starts fetching their pages in the background."""
+        stream = _PatientResourceStream(query_parameters)
         try:
-            response = requests.get(
-                url,
-                headers=self._create_headers(),
-                verify=self._verify_cert,
+            patient_urls = self._find_patients(query_parameters)
+        except Exception as ex:
+            stream.error = ex
+            patient_urls = {}
+        stream.patient_resources = {id: [] for id in patient_urls}
+        if not patient_urls:
+            stream.pages.put((None, None))
+            stream.pending = 1
+            return stream
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_concurrency)
+
+        def _fetch(item):
+            id, url = item
+            try:
+                for entries in self._iter_patient_resource_pages(query_parameters, id, url):
+                    stream.pages.put((id, entries))
+            finally:
+                stream.pages.put((id, None))  # Done with this patient, even on error.
+
+        stream.futures = [self._executor.submit(_fetch, item) for item in patient_urls.items()]
+        stream.pending = len(stream.futures)
+        return stream
+
+    def _emit_batch(self, stream: "_PatientResourceStream", id: str, entries, op_output):
+        request_id = stream.query_parameters.request_id
+        try:
+            op_output.emit(FHIRQueryResponse(request_id, {id: entries}), "batch")
+        except Exception as ex:
+            # The page is kept in the `out` response, only its early delivery is lost.
+            stream.dropped_pages += 1
+            self._logger.warning(
+                f"{request_id}: Dropped a page of patient {id} from the batch output: {ex}"
             )
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 500 and len(entries) > 0:
-                return
-            raise e
 
-        data = response.json()
+    def _finish_stream(self, op_output):
+        """Emits the complete response of the current request once all pages were fetched."""
+        stream, self._stream = self._stream, None
+        query_parameters = stream.query_parameters
+        try:
+            if stream.error is not None:
+                raise stream.error
+            for future in stream.futures:
+                future.result()  # Raises the error of a patient, if any
+            self._emit_response(query_parameters, stream.patient_resources, op_output)
+        except Exception as ex:
+            self._logger.error(f"{query_parameters.request_id}: Error performing FHIR query: {ex}")
 
-        if "entry" in data:
-            entries.extend(data["entry"])
+        if stream.dropped_pages:
+            self._logger.warning(
+                f"{query_parameters.request_id}: {stream.dropped_pages} page(s) did not fit in the "
+                "batch output queue."
+            )
+        self._logger.info(
+            f"{query_parameters.request_id}: FHIR query elapsed: {pc() - stream.start} seconds"
+        )
 
-        if "link" in data:
-            next_page = next(
-                (item for item in data.get("link") if item.get("relation") == "next"), None
+    def _fetch_patient_resources(
+        self, query_parameters: FHIRQuery, id: str, url: str, entries: List[str]
+    ):
+        for page_entries in self._iter_patient_resource_pages(query_parameters, id, url):
+            entries.extend(page_entries)
+
+    def _iter_patient_resource_pages(
+        self, query_parameters: FHIRQuery, id: str, url: str
+    ) -> Iterator[List[Dict]]:
+        """Yields the entries of each page of the resources of a patient, following the next links."""
+        num_entries = 0
+        while url:
+            self._logger.debug(
+                f"{query_parameters.request_id}: Fetching resources for patient {id} from {url}"
             )
-            if next_page:
-                self._fetch_patient_resources(query_parameters, id, next_page["url"], entries)
+            try:
+                response = self._session.get(
+                    url,
+                    headers=self._create_headers(),
+                    verify=self._verify_cert,
+                )
+                response.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                if e.response.status_code == 500 and num_entries > 0:
+                    return
+                raise e
+
+            data = response.json()
+
+            if "entry" in data:
+                num_entries += len(data["entry"])
+                yield data["entry"]
+
+            next_page = None
+            if "link" in data:
+                next_page = next(
+                    (item for item in data.get("link") if item.get("relation") == "next"), None
+                )
+            url = next_page["url"] if next_page else None
 
     def _create_headers(self):
         """Populates the header for the FHIR requests.
@@ -193,3 +374,17 @@ class FhirClientOperator(Operator):
             req_headers["Authorization"] = self._token_provider.authorization_header
 
         return req_headers
+
+
+class _PatientResourceStream:
+    """State of a request whose pages are fetched in the background and emitted one per compute."""
+
+    def __init__(self, query_parameters: FHIRQuery):
+        self.query_parameters = query_parameters
+        self.start = pc()
+        self.pages = queue.Queue()
+        self.patient_resources: Dict[str, List[Dict]] = {}
+        self.futures = []
+        self.pending = 0
+        self.dropped_pages = 0
+        self.error = None
@@ -15,6 +15,8 @@
 
 
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from time import perf_counter as pc
 
 from holoscan.core import ConditionType, Fragment, Operator, OperatorSpec
@@ -37,6 +39,9 @@ class FhirResourceSanitizerOp(Operator):
         fragment: Fragment,
         *args,
         fhir_endpoint: str = "http://localhost:8080/",
+        validate: bool = True,
+        num_workers: int = 1,
+        chunk_size: int = 1000,
         **kwargs,
     ):
         """An operator that queries FHIR service based on information received via
@@ -44,18 +49,38 @@ class FhirResourceSanitizerOp(Operator):
 
         Args:
             fhir_endpoint (str): FHIR endpoint
+            validate (bool): validate each resource against its FHIR model before extracting
+                the data. Set to False to extract directly from the raw documents.
+            num_workers (int): number of processes used to sanitize the records of a patient
+                having more than `chunk_size` records.
+            chunk_size (int): number of records sanitized by a worker process at a time.
         Raises:
             ValueError: if queue_policy is out of range.
+            ValueError: if num_workers or chunk_size is less than 1.
         """
         self._logger = logging.getLogger("{}.{}".format(__name__, type(self).__name__))
 
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+
         self._fhir_endpoint = fhir_endpoint
+        self._validate = validate
+        self._num_workers = num_workers
+        self._chunk_size = chunk_size
+        self._executor = None
         super().__init__(fragment, *args, **kwargs)
 
     def setup(self, spec: OperatorSpec):
         spec.input("records")
         spec.output("out").condition(ConditionType.NONE)
 
+    def stop(self):
+        if self._executor:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
     def compute(self, op_input, op_output, context):
         """
         Sanitizes a given FHIR resource.
@@ -64,17 +89,24 @@ class FhirResourceSanitizerOp(Operator):
         """
 
         start = pc()
+        if self._num_workers > 1 and self._executor is None:
+            # Created once and reused across compute calls. The worker processes are spawned
+            # rather than forked, since forking copies the threads of the Holoscan process.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._num_workers, mp_context=multiprocessing.get_context("spawn")
+            )
         sanitized_patient_records = {}
         patient_records = op_input.receive("records")
-        for patient in patient_records.patient_resources.keys():
-            sanitized_patient_records[patient] = []
-            for record in patient_records.patient_resources[patient]:
-                try:
-                    sanitized_record = FHIRResourceSanitizer.sanitize(record)
-                    if sanitized_record:
-                        sanitized_patient_records[patient].append(sanitized_record)
-                except NotImplementedError as e:
-                    self._logger.warning(e)
+        for patient, records in patient_records.patient_resources.items():
+            sanitized_patient_records[patient], errors = FHIRResourceSanitizer.sanitize_records(
+                records,
+                validate=self._validate,
+                num_workers=self._num_workers,
+                chunk_size=self._chunk_size,
+                executor=self._executor,
+            )
+            for error in errors:
+                self._logger.warning(error)
 
         op_output.emit(
             FHIRQueryResponse(patient_records.request_id, sanitized_patient_records).to_json(),
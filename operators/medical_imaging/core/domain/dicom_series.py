@@ -48,8 +48,8 @@ class DICOMSeries(Domain):
     def get_series_instance_uid(self):
         return self._series_instance_uid
 
-    def add_sop_instance(self, sop_instance):
-        dicom_sop_instance = DICOMSOPInstance(sop_instance)
+    def add_sop_instance(self, sop_instance, file_path=None):
+        dicom_sop_instance = DICOMSOPInstance(sop_instance, file_path)
         self._sop_instances.append(dicom_sop_instance)
 
     def get_sop_instances(self):
@@ -14,7 +14,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Any, Union
+from typing import Any, Optional, Union
 
 from operators.medical_imaging.utils.importutil import optional_import
 
@@ -29,27 +29,55 @@ Dataset: Any = Dataset_ if dataset_ok_ else Any
 Tag_, tag_ok_ = optional_import("pydicom.tag", name="Tag")
 # Dynamic class is not handled so make it Any for now: https://github.com/python/mypy/issues/2477
 Tag: Any = Tag_ if tag_ok_ else Any
+dcmread, _ = optional_import("pydicom", name="dcmread")
 
 
 class DICOMSOPInstance(Domain):
     """This class represents a SOP Instance.
 
     An attribute can be looked up with a slice ([group_number, element number]).
+
+    If the path of its file is given, the native SOP instance is assumed to have been read without
+    its pixel data, e.g. with `stop_before_pixels`, and the full dataset is read from the file on
+    the first `get_pixel_array`.
     """
 
-    def __init__(self, native_sop):
+    def __init__(self, native_sop, file_path: Optional[str] = None):
         super().__init__(None)
         self._sop: Any = native_sop
+        self._header: Any = native_sop
+        self._file_path = file_path
+        self._pixel_data_loaded = file_path is None
 
     def get_native_sop_instance(self):
         return self._sop
 
+    def get_file_path(self) -> Optional[str]:
+        return self._file_path
+
     def __getitem__(self, key: Union[int, slice, Tag]) -> Union[Dataset, DataElement]:
         return self._sop.__getitem__(key)
 
     def get_pixel_array(self):
+        if not self._pixel_data_loaded:
+            self._sop = dcmread(self._file_path)
+            self._pixel_data_loaded = True
         return self._sop.pixel_array
 
+    def release_pixel_data(self):
+        """Releases the pixel data read on demand, which will be read again if needed.
+
+        If the pixel data was loaded along with the header, only the pixel array decoded from it
+        is released, and it will be decoded again if needed.
+        """
+        if self._file_path is not None and self._pixel_data_loaded:
+            self._sop = self._header
+            self._pixel_data_loaded = False
+        elif getattr(self._sop, "_pixel_array", None) is not None:
+            # pydicom keeps the decoded array on the dataset until its pixel data changes
+            self._sop._pixel_array = None
+            self._sop._pixel_id = {}
+
     def __str__(self):
         result = "---------------" + "\n"
 
@@ -15,8 +15,9 @@
 
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Any, List, Tuple
 
 from holoscan.core import ConditionType, Fragment, Operator, OperatorSpec
 
@@ -59,6 +60,8 @@ class DICOMDataLoaderOperator(Operator):
         input_folder: Path = DEFAULT_INPUT_FOLDER,
         output_name: str = DEFAULT_OUTPUT_NAME,
         must_load: bool = True,
+        header_only: bool = False,
+        num_workers: int = 1,
         **kwargs,
     ):
         """Creates an instance of this class.
@@ -72,10 +75,16 @@ class DICOMDataLoaderOperator(Operator):
                                Defaults to `dicom_study_list`, and if None or blank passed in.
             must_load (bool): If true, raise exception if no study is loaded.
                               Defaults to True.
+            header_only (bool): If true, only read the DICOM headers when loading the studies. The pixel data of
+                                an instance is read from its file on the first `get_pixel_array` call.
+                                Defaults to False.
+            num_workers (int): Number of threads reading the DICOM files. Defaults to 1.
         """
 
         self._logger = logging.getLogger("{}.{}".format(__name__, type(self).__name__))
         self._must_load = must_load
+        self._header_only = header_only
+        self._num_workers = max(1, num_workers)
         self.input_path = input_folder
         self.index = 0
         self.input_name = "input_folder"
@@ -172,15 +181,17 @@ class DICOMDataLoaderOperator(Operator):
         """
         study_dict = {}
         series_dict = {}
-        sop_instances = []
 
-        for file in files:
-            try:
-                sop_instances.append(dcmread(file))
-            except InvalidDicomError as ex:
-                self._logger.warn(f"Ignored {file}, reason being: {ex}")
+        # Each file is read independently, then the instances are grouped in the order of the files.
+        if self._num_workers > 1 and len(files) > 1:
+            with ThreadPoolExecutor(max_workers=self._num_workers) as executor:
+                sop_instances = list(executor.map(self._read_sop_instance, files))
+        else:
+            sop_instances = [self._read_sop_instance(file) for file in files]
 
-        for sop_instance in sop_instances:
+        for file, sop_instance in sop_instances:
+            if sop_instance is None:
+                continue
             study_instance_uid = sop_instance[0x0020, 0x000D].value.name  # name is the UID as str
 
             # First need to eliminate the SOP instances whose SOP Class is to be ignored.
@@ -212,9 +223,26 @@ class DICOMDataLoaderOperator(Operator):
                 self.populate_series_attributes(series, sop_instance)
                 study_dict[study_instance_uid].add_series(series)
 
-            series_dict[series_instance_uid].add_sop_instance(sop_instance)
+            series_dict[series_instance_uid].add_sop_instance(
+                sop_instance, file if self._header_only else None
+            )
         return list(study_dict.values())
 
+    def _read_sop_instance(self, file: str) -> Tuple[str, Any]:
+        """Reads a DICOM file, without its pixel data if loading headers only.
+
+        Args:
+            file: The fully qualified name of the file.
+
+        Returns:
+            The file name and its dataset, or None if the file is not a valid DICOM file.
+        """
+        try:
+            return file, dcmread(file, stop_before_pixels=self._header_only)
+        except InvalidDicomError as ex:
+            self._logger.warn(f"Ignored {file}, reason being: {ex}")
+            return file, None
+
     def populate_study_attributes(self, study, sop_instance):
         """Populates study level attributes in the study data structure.
 
@@ -408,6 +436,15 @@ def test():
 
                 break
             break
+    # Test loading the headers only, with the pixel data read on demand.
+    header_loader = DICOMDataLoaderOperator(Fragment(), header_only=True, num_workers=4)
+    header_study_list = header_loader.load_data_to_studies(data_path.absolute())
+    sop = header_study_list[0].get_all_series()[0].get_sop_instances()[0]
+    print(
+        f"Header only loading, 'PixelData' in dataset: {'PixelData' in sop.get_native_sop_instance()}"
+    )
+    print(f"Pixel array loaded on demand: {sop.get_pixel_array().shape}")
+
     # Test raising exception, or not, depending on if set to must_load.
     non_dcm_dir = current_file_dir.parent / "utils"
     print(f"Test loading from dir without dcm files: {non_dcm_dir}")
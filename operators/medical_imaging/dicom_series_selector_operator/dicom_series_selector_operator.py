@@ -16,8 +16,9 @@
 import logging
 import numbers
 import re
+import time
 from json import loads as json_loads
-from typing import List
+from typing import Any, Dict, List, Optional, Union
 
 from holoscan.core import ConditionType, Fragment, Operator, OperatorSpec
 
@@ -29,6 +30,156 @@ from operators.medical_imaging.core.domain.dicom_series_selection import (
 from operators.medical_imaging.core.domain.dicom_study import DICOMStudy
 
 
+class SelectionCondition:
+    """A condition of a selection rule, matching one attribute, with its regex compiled once.
+
+    A string which is not a valid regex, e.g. "CT (contrast", only matches case insensitive.
+    """
+
+    def __init__(self, key: str, value_to_match: Any):
+        self.key = key
+        self.value_to_match = value_to_match
+        self._casefolded = None
+        self._regex = None
+        self._value_set = None
+        if isinstance(value_to_match, str):
+            self._casefolded = value_to_match.casefold()
+            try:
+                self._regex = re.compile(value_to_match, re.IGNORECASE)
+            except re.error:
+                logging.debug(f"Value {value_to_match!r} of {key!r} is not a regex, matched as is.")
+        if isinstance(value_to_match, list):
+            self._value_set = {str(element).lower() for element in value_to_match}
+        elif isinstance(value_to_match, (str, numbers.Number)):
+            self._value_set = {str(value_to_match).lower()}
+
+    def matches(self, attr_value: Any) -> bool:
+        """Simplistic matching of an attribute value.
+
+        Number: exactly matches
+        String: matches case insensitive, if fails then tries RegEx search
+        String array matches as subset, case insensitive
+        """
+        if not attr_value:
+            return False
+        if isinstance(attr_value, numbers.Number):
+            return self.value_to_match == attr_value
+        if isinstance(attr_value, str):
+            if self._casefolded is None:
+                raise ValueError(f"Expected a string to match attribute {self.key!r}.")
+            if attr_value.casefold() == self._casefolded:
+                return True
+            # For str, also try RegEx search to check for a match anywhere in the string
+            # unless the user constrains it in the expression.
+            return self._regex is not None and bool(self._regex.search(attr_value))
+        if isinstance(attr_value, list):
+            # Assume multi value string attributes
+            if self._value_set is None:
+                return False
+            meta_data_list = str(attr_value).lower()
+            return all(val in meta_data_list for val in self._value_set)
+        raise NotImplementedError(f"Not support for matching on this type: {type(attr_value)}")
+
+
+class SelectionRule:
+    """A named selection, compiled from the JSON selection rules, with optional timing counters."""
+
+    def __init__(self, name: str, conditions: Dict[str, Any]):
+        self.name = name
+        # Conditions with no value to match are ignored.
+        self.conditions = [
+            SelectionCondition(key, value) for key, value in conditions.items() if value
+        ]
+        self.evaluations = 0
+        self.matches = 0
+        self.elapsed_time = 0.0
+
+    def matches_series(self, series_attributes: "SeriesAttributes") -> bool:
+        """Checks if a series matches all the conditions of this rule."""
+        for condition in self.conditions:
+            if not condition.matches(series_attributes.get(condition.key)):
+                return False
+        return True
+
+    def select(
+        self, series_attributes_list: List["SeriesAttributes"], all_matched=False, timed=False
+    ) -> List[DICOMSeries]:
+        """Finds the series matching this rule, at most one if all_matched is False."""
+        start = time.perf_counter() if timed else 0.0
+        found_series = []
+        evaluations = 0
+        for series_attributes in series_attributes_list:
+            evaluations += 1
+            if self.matches_series(series_attributes):
+                logging.info(f"Selected Series, UID: {series_attributes.series.SeriesInstanceUID}")
+                found_series.append(series_attributes.series)
+                if not all_matched:
+                    break
+        if timed:
+            self.evaluations += evaluations
+            self.matches += len(found_series)
+            self.elapsed_time += time.perf_counter() - start
+        return found_series
+
+
+def compile_selection_rules(selection_rules: Dict) -> List[SelectionRule]:
+    """Compiles the JSON selection rules into a list of SelectionRule objects.
+
+    Selections without conditions are skipped.
+
+    Raises:
+        ValueError: If the selection_rules object does not contain "selections" attribute.
+    """
+    selections = selection_rules.get("selections", None)  # TODO type is not json now.
+    # If missing selections in the rules then it is an error.
+    if not selections:
+        raise ValueError('Expected "selections" not found in the rules.')
+
+    rules = []
+    for selection in selections:
+        # Get the selection name. Blank name will be handled by the SelectedSeries
+        selection_name = selection.get("name", "").strip()
+        conditions = selection.get("conditions", None)
+        if not conditions:
+            logging.info(f"Skipping selection named {selection_name!r} without conditions.")
+            continue
+        rules.append(SelectionRule(selection_name, conditions))
+    return rules
+
+
+class SeriesAttributes:
+    """Index of the study and series attributes of a series, built once and shared by all rules.
+
+    Attributes that are not Study or Series properties are looked up in the first native SOP
+    instance on first use, mainly for attributes like ImageType, and cached.
+    """
+
+    def __init__(self, series: DICOMSeries, study_attributes: Dict[str, Any]):
+        self.series = series
+        self._attributes = DICOMSeriesSelectorOperator._get_instance_properties(series)
+        self._attributes.update(study_attributes)
+        self._instance_level_keys = set()
+
+    def get(self, key: str) -> Any:
+        attr_value = self._attributes.get(key, None)
+        if attr_value or key in self._instance_level_keys:
+            return attr_value
+
+        # If not found, try the best at the native instance level for string VR
+        self._instance_level_keys.add(key)
+        try:
+            # Can use some enhancements, especially multi-value where VM > 1
+            elem = self.series.get_sop_instances()[0].get_native_sop_instance()[key]
+            if elem.VM > 1:
+                attr_value = [elem.repval]  # repval: str representation of the element’s value
+            else:
+                attr_value = elem.value  # element's value
+            self._attributes[key] = attr_value
+        except Exception:
+            logging.debug(f"Attribute {key} not at instance level either.")
+        return attr_value
+
+
 class DICOMSeriesSelectorOperator(Operator):
     """This operator selects a list of DICOM Series in a DICOM Study for a given set of selection rules.
 
@@ -78,7 +229,13 @@ class DICOMSeriesSelectorOperator(Operator):
     """
 
     def __init__(
-        self, fragment: Fragment, *args, rules: str = "", all_matched: bool = False, **kwargs
+        self,
+        fragment: Fragment,
+        *args,
+        rules: str = "",
+        all_matched: bool = False,
+        rule_timing: bool = False,
+        **kwargs,
     ) -> None:
         """Instantiate an instance.
 
@@ -86,6 +243,8 @@ class DICOMSeriesSelectorOperator(Operator):
             fragment (Fragment): An instance of the Application class which is derived from Fragment.
             rules (Text): Selection rules in JSON string.
             all_matched (bool): Gets all matched series in a study. Defaults to False for first match only.
+            rule_timing (bool): Counts the evaluations, matches and time spent per selection rule,
+                                see `get_rule_timings`. Defaults to False.
         """
 
         # rules: Text = "", all_matched: bool = False,
@@ -93,6 +252,9 @@ class DICOMSeriesSelectorOperator(Operator):
         # Delay loading the rules as JSON string till compute time.
         self._rules_json_str = rules if rules and rules.strip() else None
         self._all_matched = all_matched  # all_matched
+        self._rule_timing = rule_timing
+        self._compiled_rules: Optional[List[SelectionRule]] = None
+        self._timed_rules: List[SelectionRule] = []
         self.input_name_study_list = "dicom_study_list"
         self.output_name_selected_series = "study_selected_series_list"
 
@@ -111,12 +273,18 @@ class DICOMSeriesSelectorOperator(Operator):
         """Performs computation for this operator."""
 
         dicom_study_list = op_input.receive(self.input_name_study_list)
-        selection_rules = self._load_rules() if self._rules_json_str else None
+        # The rules are compiled on the first call and reused afterwards.
+        if self._compiled_rules is None and self._rules_json_str:
+            self._compiled_rules = compile_selection_rules(self._load_rules())
+        selection_rules = self._compiled_rules
         study_selected_series = self.filter(selection_rules, dicom_study_list, self._all_matched)
         op_output.emit(study_selected_series, self.output_name_selected_series)
 
     def filter(
-        self, selection_rules, dicom_study_list, all_matched: bool = False
+        self,
+        selection_rules: Union[Dict, List[SelectionRule], None],
+        dicom_study_list,
+        all_matched: bool = False,
     ) -> List[StudySelectedSeries]:
         """Selects the series with the given matching rules.
 
@@ -128,7 +296,8 @@ class DICOMSeriesSelectorOperator(Operator):
             String array matches as subset, case insensitive
 
         Args:
-            selection_rules (object): JSON object containing the matching rules.
+            selection_rules (object): JSON object containing the matching rules, or the rules already
+                                      compiled with `compile_selection_rules`.
             dicom_study_list (list): A list of DICOMStudiy objects.
             all_matched (bool): Gets all matched series in a study. Defaults to False for first match only.
 
@@ -147,39 +316,57 @@ class DICOMSeriesSelectorOperator(Operator):
             logging.warn("No selection rules given; select all series.")
             return self._select_all_series(dicom_study_list)
 
-        selections = selection_rules.get("selections", None)  # TODO type is not json now.
-        # If missing selections in the rules then it is an error.
-        if not selections:
-            raise ValueError('Expected "selections" not found in the rules.')
+        if isinstance(selection_rules, dict):
+            selection_rules = compile_selection_rules(selection_rules)
 
         study_selected_series_list = []  # List of StudySelectedSeries objects
 
         for study in dicom_study_list:
             study_selected_series = StudySelectedSeries(study)
-            for selection in selections:
-                # Get the selection name. Blank name will be handled by the SelectedSeries
-                selection_name = selection.get("name", "").strip()
-                logging.info(f"Finding series for Selection named: {selection_name}")
-
-                # Skip if no selection conditions are provided.
-                conditions = selection.get("conditions", None)
-                if not conditions:
-                    continue
-
-                # Select only the first series that matches the conditions, list of one
-                series_list = self._select_series(conditions, study, all_matched)
-                if series_list and len(series_list) > 0:
-                    for series in series_list:
-                        selected_series = SelectedSeries(
-                            selection_name, series, None
-                        )  # No Image obj yet.
-                        study_selected_series.add_selected_series(selected_series)
+            # The attributes of the study and each of its series are indexed once for all rules.
+            series_attributes_list = self._index_series_attributes(study)
+            for rule in selection_rules:
+                logging.info(f"Finding series for Selection named: {rule.name}")
+                series_list = rule.select(series_attributes_list, all_matched, self._rule_timing)
+                for series in series_list:
+                    selected_series = SelectedSeries(rule.name, series, None)  # No Image obj yet.
+                    study_selected_series.add_selected_series(selected_series)
 
             if len(study_selected_series.selected_series) > 0:
                 study_selected_series_list.append(study_selected_series)
 
+        if self._rule_timing:
+            self._timed_rules = selection_rules
+
         return study_selected_series_list
 
+    def get_rule_timings(self) -> Dict[str, Dict[str, Union[int, float]]]:
+        """Gets the counters of the rules used in the last selection, if rule_timing is enabled.
+
+        The counters of the rules compiled by this operator from its `rules` accumulate over all the
+        compute calls.
+
+        Returns:
+            dict: Counters by selection name, the number of series evaluated, the number of series
+                  matched, and the total time in seconds spent evaluating the rule.
+        """
+        return {
+            rule.name: {
+                "evaluations": rule.evaluations,
+                "matches": rule.matches,
+                "time": rule.elapsed_time,
+            }
+            for rule in self._timed_rules
+        }
+
+    def _index_series_attributes(self, study: DICOMStudy) -> List[SeriesAttributes]:
+        """Indexes the attributes of each series in a study, combined with the study attributes."""
+        logging.info(
+            f"Searching study, : {study.StudyInstanceUID}\n  # of series: {len(study.get_all_series())}"
+        )
+        study_attr = self._get_instance_properties(study)
+        return [SeriesAttributes(series, study_attr) for series in study.get_all_series()]
+
     def _load_rules(self):
         return json_loads(self._rules_json_str) if self._rules_json_str else None
 
@@ -217,84 +404,8 @@ class DICOMSeriesSelectorOperator(Operator):
         """
         assert isinstance(attributes, dict), '"attributes" must be a dict.'
 
-        logging.info(
-            f"Searching study, : {study.StudyInstanceUID}\n  # of series: {len(study.get_all_series())}"
-        )
-        study_attr = self._get_instance_properties(study)
-
-        found_series = []
-        for series in study.get_all_series():
-            logging.info(f"Working on series, instance UID: {series.SeriesInstanceUID}")
-
-            # Combine Study and current Series properties for matching
-            series_attr = self._get_instance_properties(series)
-            series_attr.update(study_attr)
-
-            matched = True
-            # Simple matching on attribute value
-            for key, value_to_match in attributes.items():
-                logging.info(f"On attribute: {key!r} to match value: {value_to_match!r}")
-                # Ignore None
-                if not value_to_match:
-                    continue
-                # Try getting the attribute value from Study and current Series prop dict
-                attr_value = series_attr.get(key, None)
-                logging.info(f"    Series attribute {key} value: {attr_value}")
-
-                # If not found, try the best at the native instance level for string VR
-                # This is mainly for attributes like ImageType
-                if not attr_value:
-                    try:
-                        # Can use some enhancements, especially multi-value where VM > 1
-                        elem = series.get_sop_instances()[0].get_native_sop_instance()[key]
-                        if elem.VM > 1:
-                            attr_value = [
-                                elem.repval
-                            ]  # repval: str representation of the element’s value
-                        else:
-                            attr_value = elem.value  # element's value
-
-                        series_attr.update({key: attr_value})
-                    except Exception:
-                        logging.info(f"        Attribute {key} not at instance level either.")
-
-                if not attr_value:
-                    matched = False
-                elif isinstance(attr_value, numbers.Number):
-                    matched = value_to_match == attr_value
-                elif isinstance(attr_value, str):
-                    matched = attr_value.casefold() == (value_to_match.casefold())
-                    if not matched:
-                        # For str, also try RegEx search to check for a match anywhere in the string
-                        # unless the user constrains it in the expression.
-                        logging.info("Series attribute string value did not match. Try regEx.")
-                        if re.search(value_to_match, attr_value, re.IGNORECASE):
-                            matched = True
-                elif isinstance(attr_value, list):
-                    # Assume multi value string attributes
-                    meta_data_list = str(attr_value).lower()
-                    if isinstance(value_to_match, list):
-                        value_set = {str(element).lower() for element in value_to_match}
-                        matched = all(val in meta_data_list for val in value_set)
-                    elif isinstance(value_to_match, (str, numbers.Number)):
-                        matched = str(value_to_match).lower() in meta_data_list
-                else:
-                    raise NotImplementedError(
-                        f"Not support for matching on this type: {type(value_to_match)}"
-                    )
-
-                if not matched:
-                    logging.info("This series does not match the selection conditions.")
-                    break
-
-            if matched:
-                logging.info(f"Selected Series, UID: {series.SeriesInstanceUID}")
-                found_series.append(series)
-
-                if not all_matched:
-                    return found_series
-
-        return found_series
+        rule = SelectionRule("", attributes)
+        return rule.select(self._index_series_attributes(study), all_matched)
 
     @staticmethod
     def _get_instance_properties(obj: object):
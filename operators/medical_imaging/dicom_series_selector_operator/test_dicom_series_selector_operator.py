@@ -0,0 +1,171 @@
+# SPDX-FileCopyrightText: Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import numbers
+import re
+
+import pytest
+from pydicom.dataset import Dataset
+
+from operators.medical_imaging.core.domain import DICOMSeries, DICOMStudy
+from operators.medical_imaging.dicom_series_selector_operator import DICOMSeriesSelectorOperator
+
+SERIES = [
+    # uid, modality, description, series number, image type
+    ("1.1", "CT", "CT (contrast", 3, ["ORIGINAL", "PRIMARY", "AXIAL"]),
+    ("1.2", "MR", "T1 axial", 5, ["DERIVED", "SECONDARY"]),
+    ("1.3", "CT", "Spleen CT", 7, ["ORIGINAL", "PRIMARY", "LOCALIZER"]),
+]
+
+
+def make_study():
+    study = DICOMStudy("1")
+    study.StudyDescription = "Spleen study"
+    for uid, modality, description, number, image_type in SERIES:
+        series = DICOMSeries(uid)
+        series.Modality = modality
+        series.SeriesDescription = description
+        series.SeriesNumber = number
+        sop_instance = Dataset()
+        sop_instance.ImageType = image_type
+        series.add_sop_instance(sop_instance)
+        study.add_series(series)
+    return study
+
+
+def select_like_before(conditions, study, all_matched):
+    """Matches the series of a study the way the selector did before the rules were compiled."""
+    study_attr = DICOMSeriesSelectorOperator._get_instance_properties(study)
+    found_series = []
+    for series in study.get_all_series():
+        series_attr = DICOMSeriesSelectorOperator._get_instance_properties(series)
+        series_attr.update(study_attr)
+        matched = True
+        for key, value_to_match in conditions.items():
+            if not value_to_match:
+                continue
+            attr_value = series_attr.get(key, None)
+            if not attr_value:
+                try:
+                    elem = series.get_sop_instances()[0].get_native_sop_instance()[key]
+                    attr_value = [elem.repval] if elem.VM > 1 else elem.value
+                except Exception:
+                    pass
+            if not attr_value:
+                matched = False
+            elif isinstance(attr_value, numbers.Number):
+                matched = value_to_match == attr_value
+            elif isinstance(attr_value, str):
+                matched = attr_value.casefold() == value_to_match.casefold()
+                if not matched and re.search(value_to_match, attr_value, re.IGNORECASE):
+                    matched = True
+            elif isinstance(attr_value, list):
+                meta_data_list = str(attr_value).lower()
+                if isinstance(value_to_match, list):
+                    value_set = {str(element).lower() for element in value_to_match}
+                    matched = all(val in meta_data_list for val in value_set)
+                else:
+                    matched = str(value_to_match).lower() in meta_data_list
+            if not matched:
+                break
+        if matched:
+            found_series.append(series.SeriesInstanceUID)
+            if not all_matched:
+                break
+    return found_series
+
+
+def selected_uids(study_selected_series_list, name):
+    return [
+        selected_series.series.SeriesInstanceUID
+        for study_selected_series in study_selected_series_list
+        for selected_series in study_selected_series.selected_series
+        if selected_series.selection_name == name
+    ]
+
+
+CONDITIONS = {
+    "exact": {"Modality": "ct"},
+    "exact_no_match": {"Modality": "US"},
+    "regex": {"SeriesDescription": "(?i)^spleen"},
+    "regex_search": {"SeriesDescription": "axial|contrast"},
+    "study_regex": {"StudyDescription": "^Spleen", "Modality": "MR"},
+    "numeric": {"SeriesNumber": 5},
+    "numeric_no_match": {"SeriesNumber": 4},
+    "list": {"ImageType": ["primary", "localizer"]},
+    "list_single_value": {"ImageType": "derived"},
+    "invalid_regex": {"SeriesDescription": "CT (contrast"},
+    "missing_attribute": {"Modality": "CT", "Laterality": "L"},
+    "ignored_condition": {"Modality": "CT", "Laterality": None},
+}
+
+
+@pytest.mark.parametrize("all_matched", [False, True])
+@pytest.mark.parametrize("name", sorted(CONDITIONS))
+def test_filter_matches_previous_selection(fragment, name, all_matched):
+    """Test that the compiled rules select the same series as the previous matching."""
+    selector = DICOMSeriesSelectorOperator(fragment)
+    study = make_study()
+    rules = {"selections": [{"name": name, "conditions": CONDITIONS[name]}]}
+
+    selected = selected_uids(selector.filter(rules, [study], all_matched), name)
+
+    if name == "invalid_regex" and all_matched:
+        # the previous matching raised for the series not equal to the value, instead of
+        # not matching them
+        with pytest.raises(re.error):
+            select_like_before(CONDITIONS[name], study, all_matched)
+        assert selected == ["1.1"]
+    else:
+        assert selected == select_like_before(CONDITIONS[name], study, all_matched)
+
+
+def test_compute_with_invalid_regex(fragment):
+    """Test that a rule which is not a valid regex is compiled, and only matches as is."""
+    conditions = {"SeriesDescription": "ct (CONTRAST"}
+    rules = json.dumps({"selections": [{"name": "contrast", "conditions": conditions}]})
+    selector = DICOMSeriesSelectorOperator(fragment, rules=rules, all_matched=True)
+
+    class Input:
+        def receive(self, name):
+            return [make_study()]
+
+    class Output:
+        def emit(self, value, name):
+            self.value = value
+
+    op_output = Output()
+    selector.compute(Input(), op_output, None)
+    assert selected_uids(op_output.value, "contrast") == ["1.1"]
+
+
+def test_multiple_selections(fragment):
+    selector = DICOMSeriesSelectorOperator(fragment, rule_timing=True)
+    rules = {
+        "selections": [
+            {"name": "ct", "conditions": {"Modality": "CT"}},
+            {"name": "no_conditions"},
+            {"name": "mr", "conditions": {"Modality": "MR", "SeriesNumber": 5}},
+        ]
+    }
+
+    study_selected_series_list = selector.filter(rules, [make_study()], all_matched=True)
+
+    assert selected_uids(study_selected_series_list, "ct") == ["1.1", "1.3"]
+    assert selected_uids(study_selected_series_list, "mr") == ["1.2"]
+    timings = selector.get_rule_timings()
+    assert sorted(timings) == ["ct", "mr"]
+    assert timings["ct"]["evaluations"] == 3 and timings["ct"]["matches"] == 2
@@ -13,9 +13,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import copy
 import logging
-import math
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Union
 
 import numpy as np
@@ -38,13 +37,19 @@ class DICOMSeriesToVolumeOperator(Operator):
         image: Image object.
     """
 
-    def __init__(self, fragment: Fragment, *args, **kwargs):
+    # Tolerances for the slice geometry checks, in the units of the direction cosines and mm
+    ORIENTATION_TOLERANCE = 1e-4
+    SPACING_TOLERANCE = 1e-2
+
+    def __init__(self, fragment: Fragment, *args, num_workers: int = 1, **kwargs):
         """Create an instance for a containing application object.
 
         Args:
             fragment (Fragment): An instance of the Application class which is derived from Fragment.
+            num_workers (int): Number of threads decoding the pixel data of the slices. Defaults to 1.
         """
 
+        self._num_workers = max(1, num_workers)
         self.input_name_series = "study_selected_series_list"
         self.output_name_image = "image"
         # Need to call the base class constructor last
@@ -117,8 +122,29 @@ class DICOMSeriesToVolumeOperator(Operator):
         # so the final 3D NumPy array will have index order of [DHW]. This is consistent
         # with the NumPy array returned from the ITK GetArrayViewFromImage on the image
         # loaded from the same DICOM series.
-        vol_data = np.stack([s.get_pixel_array() for s in slices], axis=0)
-        vol_data = vol_data.astype(np.int16)
+        # The volume is allocated once and each slice is decoded straight into its plane, with
+        # the decoded array, and the pixel data read on demand, released as soon as it is copied.
+        first_pixel_array = slices[0].get_pixel_array()
+        vol_data = np.empty((len(slices),) + first_pixel_array.shape, dtype=np.int16)
+        del first_pixel_array
+
+        def copy_slice(index):
+            pixel_array = slices[index].get_pixel_array()
+            if pixel_array.shape != vol_data.shape[1:]:
+                raise ValueError(
+                    f"Slice {index} has shape {pixel_array.shape}, expected {vol_data.shape[1:]}."
+                )
+            np.copyto(vol_data[index], pixel_array, casting="unsafe")
+            slices[index].release_pixel_data()
+
+        if self._num_workers > 1 and len(slices) > 1:
+            with ThreadPoolExecutor(max_workers=self._num_workers) as executor:
+                # Consume the results to raise the first exception, if any
+                for _ in executor.map(copy_slice, range(len(slices))):
+                    pass
+        else:
+            for index in range(len(slices)):
+                copy_slice(index)
 
         # For now we support monochrome image only, for which DICOM Photometric Interpretation
         # (0028,0004) has defined terms, MONOCHROME1 and MONOCHROME2, with the former being:
@@ -145,7 +171,7 @@ class DICOMSeriesToVolumeOperator(Operator):
         if photometric_interpretation != "MONOCHROME2":
             if photometric_interpretation == "MONOCHROME1" or presentation_lut_shape == "INVERSE":
                 logging.debug("Applying INVERSE transformation as required for MONOCHROME1 image.")
-                vol_data = np.amax(vol_data) - vol_data
+                np.subtract(np.amax(vol_data), vol_data, out=vol_data)
             else:
                 raise ValueError(
                     f"Cannot process pixel data with Photometric Interpretation of {photometric_interpretation}."
@@ -162,11 +188,14 @@ class DICOMSeriesToVolumeOperator(Operator):
         except KeyError:
             slope = 1
 
+        # Rescale in place, one plane at a time, to avoid a float64 copy of the whole volume.
         if slope != 1:
-            vol_data = slope * vol_data.astype(np.float64)
-            vol_data = vol_data.astype(np.int16)
+            plane = np.empty(vol_data.shape[1:], dtype=np.float64)
+            for index in range(vol_data.shape[0]):
+                np.multiply(vol_data[index], slope, out=plane, dtype=np.float64)
+                np.copyto(vol_data[index], plane, casting="unsafe")
         vol_data += np.int16(intercept)
-        return np.array(vol_data, dtype=np.int16)
+        return vol_data
 
     def create_volumetric_image(self, vox_data, metadata):
         """Creates an instance of 3D image.
@@ -188,8 +217,16 @@ class DICOMSeriesToVolumeOperator(Operator):
         It computes the distance of that point from the origin of the patient coordinate system along the slice normal.
         It orders the slices in the series according to that distance.
 
+        The geometry of all the slices is computed at once with NumPy arrays. Slices without
+        Image Orientation Patient or Image Position Patient are removed, and a series whose
+        slices have different orientations or non-uniform spacing is reported, since it cannot
+        be stacked into a regular volume as is. The depth spacing is the median slice spacing.
+
         Args:
             series: An instance of DICOMSeries.
+
+        Raises:
+            ValueError: If slices of the series are at the same position.
         """
 
         if len(series._sop_instances) <= 1:
@@ -198,77 +235,84 @@ class DICOMSeriesToVolumeOperator(Operator):
             )
             return
 
-        slice_indices_to_be_removed = []
-        depth_pixel_spacing = 0.0
-        last_slice_normal = [0.0, 0.0, 0.0]
-
+        slices = []
+        orientations = []
+        positions = []
         for slice_index, slice in enumerate(series._sop_instances):
-            distance = 0.0
-            point = [0.0, 0.0, 0.0]
-            slice_normal = [0.0, 0.0, 0.0]
-            slice_position = None
-            cosines = None
-
             try:
-                image_orientation_patient_de = slice[0x0020, 0x0037]
-                if image_orientation_patient_de is not None:
-                    image_orientation_patient = image_orientation_patient_de.value
-                    cosines = image_orientation_patient
+                orientation = slice[0x0020, 0x0037].value
+                position = slice[0x0020, 0x0032].value
             except KeyError:
-                pass
-
-            try:
-                image_poisition_patient_de = slice[0x0020, 0x0032]
-                if image_poisition_patient_de is not None:
-                    image_poisition_patient = image_poisition_patient_de.value
-                    slice_position = image_poisition_patient
-            except KeyError:
-                pass
-
-            distance = 0.0
-
-            if (cosines is not None) and (slice_position is not None):
-                slice_normal[0] = cosines[1] * cosines[5] - cosines[2] * cosines[4]
-                slice_normal[1] = cosines[2] * cosines[3] - cosines[0] * cosines[5]
-                slice_normal[2] = cosines[0] * cosines[4] - cosines[1] * cosines[3]
-
-                last_slice_normal = copy.deepcopy(slice_normal)
-
-                i = 0
-                while i < 3:
-                    point[i] = slice_normal[i] * slice_position[i]
-                    i += 1
-
-                distance += point[0] + point[1] + point[2]
-
-                series._sop_instances[slice_index].distance = distance
-                series._sop_instances[slice_index].first_pixel_on_slice_normal = point
-            else:
-                print("going to removing slice ", slice_index)
-                slice_indices_to_be_removed.append(slice_index)
-
-        for sl_index, _ in enumerate(slice_indices_to_be_removed):
-            del series._sop_instances[sl_index]
-
-        series._sop_instances = sorted(series._sop_instances, key=lambda s: s.distance)
-        series.depth_direction_cosine = copy.deepcopy(last_slice_normal)
-
-        if len(series._sop_instances) > 1:
-            p1 = series._sop_instances[0].first_pixel_on_slice_normal
-            p2 = series._sop_instances[1].first_pixel_on_slice_normal
-            depth_pixel_spacing = (
-                (p1[0] - p2[0]) * (p1[0] - p2[0])
-                + (p1[1] - p2[1]) * (p1[1] - p2[1])
-                + (p1[2] - p2[2]) * (p1[2] - p2[2])
-            )
-            depth_pixel_spacing = math.sqrt(depth_pixel_spacing)
-            series.depth_pixel_spacing = depth_pixel_spacing
+                orientation = position = None
+            if orientation is None or position is None:
+                logging.warning(f"Removing slice {slice_index} without orientation or position.")
+                continue
+            slices.append(slice)
+            orientations.append(orientation)
+            positions.append(position)
+
+        if not slices:
+            raise ValueError("No slice in the series has both orientation and position.")
+
+        orientations = np.asarray(orientations, dtype=np.float64)
+        positions = np.asarray(positions, dtype=np.float64)
+        normals = np.cross(orientations[:, 0:3], orientations[:, 3:6])
+        distances = np.einsum("ij,ij->i", normals, positions)
+        points = normals * positions
+
+        if not np.allclose(
+            orientations, orientations[0], atol=DICOMSeriesToVolumeOperator.ORIENTATION_TOLERANCE
+        ):
+            logging.warning("Slices in the series do not have the same orientation.")
+
+        # A stable sort keeps the original order of slices at the same distance.
+        order = np.argsort(distances, kind="stable")
+        for index in order:
+            slices[index].distance = float(distances[index])
+            slices[index].first_pixel_on_slice_normal = points[index].tolist()
+        series._sop_instances = [slices[index] for index in order]
+        series.depth_direction_cosine = normals[-1].tolist()
+
+        if len(slices) > 1:
+            spacings = np.diff(distances[order])
+            series.depth_pixel_spacing = self._check_slice_spacings(spacings)
+        else:
+            series.depth_pixel_spacing = 1.0
 
         s_1 = series._sop_instances[0]
         s_n = series._sop_instances[-1]
         num_slices = len(series._sop_instances)
         self.compute_affine_transform(s_1, s_n, num_slices, series)
 
+    @staticmethod
+    def _check_slice_spacings(spacings: np.ndarray) -> float:
+        """Rejects coincident slices, reports gaps or other non-uniform spacing between sorted
+        slices, and returns the median spacing."""
+        tolerance = DICOMSeriesToVolumeOperator.SPACING_TOLERANCE
+        coincident = np.flatnonzero(spacings <= tolerance)
+        if coincident.size:
+            # Stacking them would repeat a position and make the affine transform wrong.
+            raise ValueError(
+                f"{coincident.size} slice(s) at the same position as another slice in the series, "
+                f"after sorted slice(s) {coincident.tolist()}."
+            )
+
+        median_spacing = float(np.median(spacings))
+        if np.allclose(spacings, median_spacing, rtol=tolerance, atol=tolerance):
+            return median_spacing
+        gaps = np.flatnonzero(spacings > 1.5 * median_spacing)
+        if gaps.size:
+            logging.warning(
+                f"Gaps in the series after sorted slice(s) {gaps.tolist()}, "
+                f"spacing up to {spacings.max():.4f} instead of {median_spacing:.4f}."
+            )
+        else:
+            logging.warning(
+                f"Non-uniform slice spacing in the series, from {spacings.min():.4f} "
+                f"to {spacings.max():.4f}."
+            )
+        return median_spacing
+
     def compute_affine_transform(self, s_1, s_n, n, series):
         """Computes the affine transform for this series. It does it in both DICOM Patient oriented
         coordinate system as well as the pne preferred by NIFTI standard. Accordingly, the two attributes
@@ -288,102 +332,35 @@ class DICOMSeriesToVolumeOperator(Operator):
             series: An instance of DICOMSeries.
         """
 
-        m1 = np.arange(1, 17, dtype=float).reshape(4, 4)
-        m2 = np.arange(1, 17, dtype=float).reshape(4, 4)
+        image_orientation_patient = np.asarray(s_1[0x0020, 0x0037].value, dtype=np.float64)
 
-        image_orientation_patient = None
-        try:
-            image_orientation_patient_de = s_1[0x0020, 0x0037]
-            if image_orientation_patient_de is not None:
-                image_orientation_patient = image_orientation_patient_de.value
-        except KeyError:
-            pass
-        rx = image_orientation_patient[0]
-        ry = image_orientation_patient[1]
-        rz = image_orientation_patient[2]
-        cx = image_orientation_patient[3]
-        cy = image_orientation_patient[4]
-        cz = image_orientation_patient[5]
-
-        vr = 0.0
-        vc = 0.0
+        pixel_spacing = np.zeros(2)
         try:
             pixel_spacing_de = s_1[0x0028, 0x0030]
             if pixel_spacing_de is not None:
-                vr = pixel_spacing_de.value[0]
-                vc = pixel_spacing_de.value[1]
+                pixel_spacing = np.asarray(pixel_spacing_de.value[0:2], dtype=np.float64)
         except KeyError:
             pass
 
-        x1 = 0.0
-        y1 = 0.0
-        z1 = 0.0
-
-        xn = 0.0
-        yn = 0.0
-        zn = 0.0
+        ip1 = np.asarray(s_1[0x0020, 0x0032].value, dtype=np.float64)
+        ipn = np.asarray(s_n[0x0020, 0x0032].value, dtype=np.float64)
 
-        ip1 = None
-
-        try:
-            ip1_de = s_1[0x0020, 0x0032]
-            ipn_de = s_n[0x0020, 0x0032]
-            ip1 = ip1_de.value
-            ipn = ipn_de.value
-
-        except KeyError:
-            pass
-
-        x1 = ip1[0]
-        y1 = ip1[1]
-        z1 = ip1[2]
-
-        xn = ipn[0]
-        yn = ipn[1]
-        zn = ipn[2]
-
-        m1[0, 0] = rx * vr
-        m1[0, 1] = cx * vc
-        m1[0, 2] = (xn - x1) / (n - 1)
-        m1[0, 3] = x1
-
-        m1[1, 0] = ry * vr
-        m1[1, 1] = cy * vc
-        m1[1, 2] = (yn - y1) / (n - 1)
-        m1[1, 3] = y1
-
-        m1[2, 0] = rz * vr
-        m1[2, 1] = cz * vc
-        m1[2, 2] = (zn - z1) / (n - 1)
-        m1[2, 3] = z1
-
-        m1[3, 0] = 0
-        m1[3, 1] = 0
-        m1[3, 2] = 0
-        m1[3, 3] = 1
+        # Columns are the row direction scaled by vr, the column direction scaled by vc, the step
+        # between slices and the position of the first voxel.
+        m1 = np.eye(4)
+        m1[0:3, 0] = image_orientation_patient[0:3] * pixel_spacing[0]
+        m1[0:3, 1] = image_orientation_patient[3:6] * pixel_spacing[1]
+        if n > 1:
+            m1[0:3, 2] = (ipn - ip1) / (n - 1)
+        else:
+            m1[0:3, 2] = np.cross(image_orientation_patient[0:3], image_orientation_patient[3:6])
+        m1[0:3, 3] = ip1
 
         series.dicom_affine_transform = m1
 
-        m2[0, 0] = -rx * vr
-        m2[0, 1] = -cx * vc
-        m2[0, 2] = -(xn - x1) / (n - 1)
-        m2[0, 3] = -x1
-
-        m2[1, 0] = -ry * vr
-        m2[1, 1] = -cy * vc
-        m2[1, 2] = -(yn - y1) / (n - 1)
-        m2[1, 3] = -y1
-
-        m2[2, 0] = rz * vr
-        m2[2, 1] = cz * vc
-        m2[2, 2] = (zn - z1) / (n - 1)
-        m2[2, 3] = z1
-
-        m2[3, 0] = 0
-        m2[3, 1] = 0
-        m2[3, 2] = 0
-        m2[3, 3] = 1
-
+        # NIFTI uses RAS+ whereas DICOM uses LPS+, so the x and y axes are flipped.
+        m2 = m1.copy()
+        m2[0:2] *= -1
         series.nifti_affine_transform = m2
 
     def create_metadata(self, series) -> Dict:
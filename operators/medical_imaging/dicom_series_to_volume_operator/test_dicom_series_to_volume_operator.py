@@ -0,0 +1,100 @@
+# SPDX-FileCopyrightText: Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian
+
+from operators.medical_imaging.core.domain import DICOMSeries
+from operators.medical_imaging.dicom_series_to_volume_operator import DICOMSeriesToVolumeOperator
+
+ROWS, COLUMNS = 4, 5
+
+
+def make_slice(position, pixels, orientation=(1.0, 0.0, 0.0, 0.0, 1.0, 0.0)):
+    """Creates an in-memory CT slice with 16 bit signed pixel data."""
+    ds = Dataset()
+    ds.file_meta = FileMetaDataset()
+    ds.file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+    ds.ImageOrientationPatient = list(orientation)
+    ds.ImagePositionPatient = list(position)
+    ds.PixelSpacing = [0.5, 0.5]
+    ds.Rows, ds.Columns = pixels.shape
+    ds.SamplesPerPixel = 1
+    ds.PhotometricInterpretation = "MONOCHROME2"
+    ds.BitsAllocated = 16
+    ds.BitsStored = 16
+    ds.HighBit = 15
+    ds.PixelRepresentation = 1
+    ds.PixelData = pixels.astype(np.int16).tobytes()
+    return ds
+
+
+def make_series(z_positions):
+    """Creates a series of axial slices at the given positions, each filled with its position."""
+    series = DICOMSeries("1.2.3")
+    for z in z_positions:
+        pixels = np.full((ROWS, COLUMNS), int(z * 10), dtype=np.int16)
+        series.add_sop_instance(make_slice((0.0, 0.0, z), pixels))
+    return series
+
+
+@pytest.mark.parametrize("num_workers", [1, 4])
+def test_generate_voxel_data_releases_decoded_slices(fragment, num_workers):
+    """Test that no slice keeps its decoded pixel array once copied into the volume."""
+    op = DICOMSeriesToVolumeOperator(fragment, num_workers=num_workers)
+    series = make_series([2.0, 0.0, 1.0, 3.0])
+    op.prepare_series(series)
+
+    vol_data = op.generate_voxel_data(series)
+
+    assert vol_data.shape == (4, ROWS, COLUMNS)
+    np.testing.assert_array_equal(vol_data[:, 0, 0], [0, 10, 20, 30])
+    for sop_instance in series.get_sop_instances():
+        assert sop_instance.get_native_sop_instance()._pixel_array is None
+        # the pixel data is still there, and decoded again on demand
+        assert sop_instance.get_pixel_array()[0, 0] == sop_instance.distance * 10
+
+
+def test_prepare_series_sorts_slices(fragment):
+    """Test that the slices are sorted along their normal with the spacing between them."""
+    op = DICOMSeriesToVolumeOperator(fragment)
+    series = make_series([3.0, 1.5, 0.0, 4.5])
+    op.prepare_series(series)
+
+    assert [s.distance for s in series.get_sop_instances()] == [0.0, 1.5, 3.0, 4.5]
+    assert series.depth_pixel_spacing == pytest.approx(1.5)
+    np.testing.assert_allclose(np.diag(series.dicom_affine_transform), [0.5, 0.5, 1.5, 1.0])
+
+
+def test_prepare_series_rejects_coincident_slices(fragment):
+    """Test that a series with duplicated slice positions is not stacked."""
+    op = DICOMSeriesToVolumeOperator(fragment)
+    series = make_series([0.0, 1.0, 1.0, 2.0])
+    with pytest.raises(ValueError, match="same position"):
+        op.prepare_series(series)
+
+
+def test_prepare_series_with_gap(fragment, caplog):
+    """Test that a gap is reported and the depth spacing is the median spacing."""
+    op = DICOMSeriesToVolumeOperator(fragment)
+    # the first spacing is the gap, and the other spacings are uniform
+    series = make_series([0.0, 5.0, 6.0, 7.0, 8.0])
+    op.prepare_series(series)
+
+    assert "Gaps in the series after sorted slice(s) [0]" in caplog.text
+    assert series.depth_pixel_spacing == pytest.approx(1.0)
+    assert np.linalg.det(series.dicom_affine_transform) != 0
@@ -13,14 +13,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
 import json
 import logging
 import os
 import pickle
-import tempfile
 import time
 import zipfile
 from copy import deepcopy
+from functools import lru_cache
 from pathlib import Path
 from threading import Lock
 from typing import Any, Dict, List, Optional, Tuple, Type, Union
@@ -35,6 +36,7 @@ from operators.medical_imaging.utils.importutil import optional_import
 MONAI_UTILS = "monai.utils"
 nibabel, _ = optional_import("nibabel", "3.2.1")
 torch, _ = optional_import("torch", "1.10.2")
+yaml, _ = optional_import("yaml")
 
 NdarrayOrTensor, _ = optional_import("monai.config", name="NdarrayOrTensor")
 MetaTensor, _ = optional_import("monai.data.meta_tensor", name="MetaTensor")
@@ -61,134 +63,176 @@ ConfigParser: Any = ConfigParser_
 __all__ = ["MonaiBundleInferenceOperator", "IOMapping", "BundleConfigNames"]
 
 
+# Folder of the on-disk cache of bundle configs, overridden by this environment variable.
+# Set it to an empty string to disable the on-disk cache.
+BUNDLE_CONFIG_CACHE_DIR_ENV = "HOLOHUB_BUNDLE_CONFIG_CACHE_DIR"
+DEFAULT_BUNDLE_CONFIG_CACHE_DIR = Path.home() / ".cache" / "holohub" / "monai_bundle_configs"
+# Version of the on-disk cache format, bump it when the format changes
+BUNDLE_CONFIG_CACHE_VERSION = 1
+
+BUNDLE_SUFFIXES = (".json", ".yaml", ".yml")  # The only supported file ext(s)
+BUNDLE_CONFIG_FOLDER = "extra"
+
+
 def get_bundle_config(bundle_path, config_names):
     """
     Gets the configuration parser from the specified Torchscript bundle file path.
-    """
 
-    bundle_suffixes = (".json", ".yaml", "yml")  # The only supported file ext(s)
-    config_folder = "extra"
+    The metadata and configs read from the bundle archive are cached on disk, keyed by the content
+    hash of the bundle, and in process, so that repeated uses of the same bundle skip the archive.
+    A new parser is returned on each call.
+    """
 
-    def _read_from_archive(archive, root_name: str, config_name: str, do_search=True):
-        """A helper function for reading the content of a config in the zip archive.
+    if isinstance(config_names, str):
+        config_names = [config_names]
 
-        Tries to read config content at the expected path in the archive, if error occurs,
-        search and read with alternative paths.
-        """
+    bundle_path = os.path.abspath(str(bundle_path))
+    stat = os.stat(bundle_path)
+    metadata, config = _load_bundle_configs(
+        bundle_path, stat.st_size, stat.st_mtime_ns, tuple(config_names)
+    )
 
-        content_text = None
-        config_name = config_name.split(".")[0]  # In case ext is present
-
-        # Try directly read with constructed and expected path into the archive
-        for suffix in bundle_suffixes:
-            path = Path(root_name, config_folder, config_name).with_suffix(suffix)
-            try:
-                logging.debug(f"Trying to read config {config_name!r} content from {path!r}.")
-                content_text = archive.read(str(path))
-                break
-            except Exception:
-                logging.debug(f"Error reading from {path}. Will try alternative ways.")
-                continue
-
-        # Try search for the name in the name list of the archive
-        if not content_text and do_search:
-            logging.debug(f"Trying to find the file in the archive for config {config_name!r}.")
-            name_list = archive.namelist()
-            for suffix in bundle_suffixes:
-                for n in name_list:
-                    if (f"{config_name}{suffix}").casefold in n.casefold():
-                        logging.debug(
-                            f"Trying to read content of config {config_name!r} from {n!r}."
-                        )
-                        content_text = archive.read(n)
-                        break
-
-        if not content_text:
-            raise IOError(
-                f"Cannot read config {config_name}{bundle_suffixes} or its content in the archive."
-            )
+    # The cached contents are copied as the parser may modify them.
+    parser = ConfigParser()
+    parser.read_meta(f=deepcopy(metadata))
+    parser.read_config(f=deepcopy(config))
+    parser.parse()
 
-        return content_text
+    return parser
 
-    def _extract_from_archive(
-        archive,
-        root_name: str,
-        config_names: List[str],
-        dest_folder: Union[str, Path],
-        do_search=True,
-    ):
-        """A helper function for extract files of configs from the archive to the destination folder
 
-        Tries to extract with the full paths from the archive file, if error occurs, tries to search for
-        and read from the file(s) if do_search is true.
-        """
+@lru_cache(maxsize=16)
+def _load_bundle_configs(
+    bundle_path: str, size: int, mtime_ns: int, config_names: Tuple[str, ...]
+) -> Tuple[Dict, Dict]:
+    """Loads the metadata and the merged configs of a bundle, from the on-disk cache if possible.
 
-        config_names = [cn.split(".")[0] for cn in config_names]  # In case the extension is present
-        file_list = []
-
-        # Try directly read first with path into the archive
-        for suffix in bundle_suffixes:
-            try:
-                logging.debug(f"Trying to extract {config_names} with ext {suffix}.")
-                file_list = [
-                    str(Path(root_name, config_folder, cn).with_suffix(suffix))
-                    for cn in config_names
-                ]
-                archive.extractall(members=file_list, path=dest_folder)
-                break
-            except Exception as ex:
-                file_list = []
-                logging.debug(
-                    f"Will try file search after error on extracting {config_names} with {file_list}: {ex}"
-                )
-                continue
-
-        # If files not extracted, try search for expected files in the name list of the archive
-        if (len(file_list) < 1) and do_search:
-            logging.debug(f"Trying to find the config files in the archive for {config_names}.")
-            name_list = archive.namelist()
-            leftovers = deepcopy(config_names)  # to track any that are not found.
-            for cn in config_names:
-                for suffix in bundle_suffixes:
-                    found = False
-                    for n in name_list:
-                        if (f"{cn}{suffix}").casefold() in n.casefold():
-                            found = True
-                            archive.extract(member=n, path=dest_folder)
-                            break
-                    if found:
-                        leftovers.remove(cn)
-                        break
-
-            if len(leftovers) > 0:
-                raise IOError(f"Failed to extract content for these config(s): {leftovers}.")
-
-        return file_list
-
-    # End of helper functions
+    The size and modification time of the bundle file are part of the in-process cache key, so that
+    a modified bundle is read again.
+    """
 
-    if isinstance(config_names, str):
-        config_names = [config_names]
+    cache_dir = os.environ.get(BUNDLE_CONFIG_CACHE_DIR_ENV, str(DEFAULT_BUNDLE_CONFIG_CACHE_DIR))
+    if not cache_dir:
+        return _read_bundle_configs(bundle_path, config_names)
+
+    bundle_hash = _get_bundle_hash(bundle_path, size, mtime_ns, cache_dir)
+    names_hash = hashlib.sha256("\n".join(config_names).encode()).hexdigest()[:16]
+    cache_file = os.path.join(cache_dir, f"{bundle_hash}_{names_hash}.json")
+    try:
+        with open(cache_file, "r") as file:
+            cached = json.load(file)
+        if cached.get("version") == BUNDLE_CONFIG_CACHE_VERSION:
+            logging.debug(f"Loaded the configs of bundle {bundle_path} from {cache_file}.")
+            return cached["metadata"], cached["config"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    metadata, config = _read_bundle_configs(bundle_path, config_names)
+    _write_json_atomically(
+        cache_file,
+        {"version": BUNDLE_CONFIG_CACHE_VERSION, "metadata": metadata, "config": config},
+    )
+    return metadata, config
+
+
+def _get_bundle_hash(bundle_path: str, size: int, mtime_ns: int, cache_dir: str) -> str:
+    """Gets the SHA-256 of the bundle file, reusing the hash recorded for the same file size and time."""
+
+    index_file = os.path.join(cache_dir, "bundle_hashes.json")
+    try:
+        with open(index_file, "r") as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        index = {}
+
+    entry = index.get(bundle_path)
+    if entry and entry.get("size") == size and entry.get("mtime_ns") == mtime_ns:
+        return entry["sha256"]
+
+    sha256 = hashlib.sha256()
+    with open(bundle_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            sha256.update(chunk)
+    bundle_hash = sha256.hexdigest()
+
+    index[bundle_path] = {"size": size, "mtime_ns": mtime_ns, "sha256": bundle_hash}
+    _write_json_atomically(index_file, index)
+    return bundle_hash
+
+
+def _write_json_atomically(file_path: str, content: Dict):
+    """Writes a cache file atomically, ignoring errors since it is only a cache.
+
+    Content which JSON does not read back as is, e.g. YAML configs with non-string keys, which
+    JSON turns into strings, is not written, so that a cached config never differs from the bundle.
+    """
+    try:
+        text = json.dumps(content)
+        if json.loads(text) != content:
+            logging.debug(f"Not writing cache file {file_path}, its content is not JSON as is.")
+            return
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_file = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as file:
+            file.write(text)
+        os.replace(tmp_file, file_path)
+    except (OSError, TypeError, ValueError) as ex:
+        logging.debug(f"Could not write cache file {file_path}: {ex}")
+
+
+def _read_bundle_configs(bundle_path: str, config_names: Tuple[str, ...]) -> Tuple[Dict, Dict]:
+    """Reads the metadata and the configs from the Torchscript bundle archive.
+
+    The configs are merged in order, like the parser does when reading multiple config files.
+    """
 
     name, _ = os.path.splitext(
         os.path.basename(bundle_path)
     )  # bundle file name same archive folder name
-    parser = ConfigParser()
-
-    # Parser to read the required metadata and extra config contents from the archive
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        with zipfile.ZipFile(bundle_path, "r") as archive:
-            metadata_config_name = "metadata"
-            metadata_text = _read_from_archive(archive, name, metadata_config_name)
-            parser.read_meta(f=json.loads(metadata_text))
 
-            # now get the other named configs
-            file_list = _extract_from_archive(archive, name, config_names, tmp_dir)
-            parser.read_config([Path(tmp_dir, f_path) for f_path in file_list])
-
-    parser.parse()
+    with zipfile.ZipFile(bundle_path, "r") as archive:
+        name_list = archive.namelist()
+        names = set(name_list)
+        casefolded_names = [n.casefold() for n in name_list]
+
+        def _find_member(config_name: str) -> Optional[str]:
+            """Finds the config at the expected path in the archive, else searches for its name."""
+            config_name = config_name.split(".")[0]  # In case ext is present
+            for suffix in BUNDLE_SUFFIXES:
+                path = f"{name}/{BUNDLE_CONFIG_FOLDER}/{config_name}{suffix}"
+                if path in names:
+                    return path
+            logging.debug(f"Trying to find the file in the archive for config {config_name!r}.")
+            for suffix in BUNDLE_SUFFIXES:
+                target = f"{config_name}{suffix}".casefold()
+                for n, casefolded in zip(name_list, casefolded_names):
+                    if target in casefolded:
+                        return n
+            return None
+
+        metadata_member = _find_member("metadata")
+        if not metadata_member:
+            raise IOError(
+                f"Cannot read config metadata{BUNDLE_SUFFIXES} or its content in the archive."
+            )
+        metadata = json.loads(archive.read(metadata_member))
+
+        members = [_find_member(cn) for cn in config_names]
+        leftovers = [cn for cn, member in zip(config_names, members) if not member]
+        if leftovers:
+            raise IOError(f"Failed to extract content for these config(s): {leftovers}.")
+
+        merged = ConfigParser(config={})
+        for member in members:
+            content_text = archive.read(member)
+            if member.casefold().endswith(".json"):
+                content = json.loads(content_text)
+            else:
+                content = yaml.safe_load(content_text)
+            for k, v in content.items():
+                merged[k] = v
 
-    return parser
+    return metadata, merged.get()
 
 
 DISALLOW_LOAD_SAVE = ["LoadImage", "SaveImage"]
@@ -316,6 +360,10 @@ class MonaiBundleInferenceOperator(InferenceOperator):
     In such cases, the I/O storage type can only be `IN_MEMORY` due to the restrictions imposed by the application executor.
 
     For the time being, the input and output to this operator are limited to in_memory object.
+
+    The metadata and configs read from the bundle are cached on disk, by default in
+    `~/.cache/holohub/monai_bundle_configs`. The folder can be changed with the
+    `HOLOHUB_BUNDLE_CONFIG_CACHE_DIR` environment variable, and an empty value disables the cache.
     """
 
     known_io_data_types = {
@@ -0,0 +1,86 @@
+# SPDX-FileCopyrightText: Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import zipfile
+
+import pytest
+
+pytest.importorskip("monai")
+
+from operators.medical_imaging.monai_bundle_inference_operator import (  # noqa: E402
+    monai_bundle_inference_operator as bundle_op,
+)
+
+METADATA = {"version": "0.1.0", "network_data_format": {"inputs": {}, "outputs": {}}}
+JSON_CONFIG = json.dumps({"labels": {"1": "spleen"}, "roi_size": [96, 96, 96]})
+YAML_CONFIG = """
+labels:
+  "1": spleen
+roi_size: [96, 96, 96]
+"""
+# YAML reads the keys of this config as integers, which JSON would turn into strings
+YAML_CONFIG_INT_KEYS = """
+labels:
+  1: spleen
+  2: liver
+roi_size: [96, 96, 96]
+"""
+
+
+def make_bundle(directory, config_file, config_text):
+    """Creates a bundle archive holding the metadata and the given inference config."""
+    bundle_path = os.path.join(directory, "model.ts")
+    with zipfile.ZipFile(bundle_path, "w") as archive:
+        archive.writestr("model/extra/metadata.json", json.dumps(METADATA))
+        archive.writestr(f"model/extra/{config_file}", config_text)
+    return bundle_path
+
+
+def load_bundle_configs(bundle_path):
+    """Loads the configs of the bundle, bypassing the in-process cache."""
+    bundle_op._load_bundle_configs.cache_clear()
+    stat = os.stat(bundle_path)
+    return bundle_op._load_bundle_configs(
+        bundle_path, stat.st_size, stat.st_mtime_ns, ("inference",)
+    )
+
+
+def cached_config_files(cache_dir):
+    return [name for name in os.listdir(cache_dir) if name != "bundle_hashes.json"]
+
+
+@pytest.mark.parametrize(
+    "config_file, config_text, is_cached",
+    [
+        ("inference.json", JSON_CONFIG, True),
+        ("inference.yaml", YAML_CONFIG, True),
+        ("inference.yaml", YAML_CONFIG_INT_KEYS, False),
+    ],
+)
+def test_cached_configs_equal_uncached(tmp_path, monkeypatch, config_file, config_text, is_cached):
+    """Test that the configs are the same with and without the on-disk cache."""
+    bundle_path = make_bundle(tmp_path, config_file, config_text)
+    monkeypatch.setenv(bundle_op.BUNDLE_CONFIG_CACHE_DIR_ENV, "")
+    uncached = load_bundle_configs(bundle_path)
+
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv(bundle_op.BUNDLE_CONFIG_CACHE_DIR_ENV, str(cache_dir))
+    assert load_bundle_configs(bundle_path) == uncached
+    assert len(cached_config_files(cache_dir)) == int(is_cached)
+    # read from the cache file, if it was written
+    assert load_bundle_configs(bundle_path) == uncached
+    bundle_op._load_bundle_configs.cache_clear()
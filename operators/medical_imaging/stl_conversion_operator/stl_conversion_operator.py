@@ -13,10 +13,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import io
 import logging
 import os
-import shutil
-import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, Optional, Union
 
@@ -27,6 +28,7 @@ from operators.medical_imaging.core import Image
 from operators.medical_imaging.utils.importutil import optional_import
 
 nib, _ = optional_import("nibabel")
+find_objects, _ = optional_import("scipy.ndimage", name="find_objects")
 sitk, _ = optional_import("SimpleITK")
 label, _ = optional_import("skimage.measure", name="label")
 measure, _ = optional_import("skimage", name="measure")
@@ -52,6 +54,7 @@ class STLConversionOperator(Operator):
 
     Named output:
         stl_bytes: Bytes of the surface mesh STL file. Optional, not requiring a downstram receiver.
+                   In batch mode, a dict of the bytes of the STL file of each label.
     """
 
     def __init__(
@@ -62,6 +65,8 @@ class STLConversionOperator(Operator):
         class_id=None,
         is_smooth=True,
         keep_largest_connected_component=True,
+        batch_labels=False,
+        num_workers=1,
         **kwargs,
     ) -> None:
         """Creates an object to generate a surface mesh and saves it as an STL file if the path is provided.
@@ -72,12 +77,19 @@ class STLConversionOperator(Operator):
             class_id (array, optional): Class label ids. Defaults to None.
             is_smooth (bool, optional): smoothing or not. Defaults to True.
             keep_largest_connected_component (bool, optional): Defaults to True.
+            batch_labels (bool, optional): Generates one mesh per label, see `STLConverter.convert_labels`.
+                                           The output is then a dict of STL bytes by label, and the output
+                                           file is a zip archive of the STL files. Defaults to False.
+            num_workers (int, optional): Number of processes generating the label meshes in batch mode.
+                                         Defaults to 1.
         """
 
         self._logger = logging.getLogger("{}.{}".format(__name__, type(self).__name__))
         self._class_id = class_id
         self._is_smooth = is_smooth
         self._keep_largest_connected_component = keep_largest_connected_component
+        self._batch_labels = batch_labels
+        self._num_workers = num_workers
         self._output_file = Path(output_file) if output_file and len(str(output_file)) > 0 else None
         self._converter = STLConverter(*args, **kwargs)
 
@@ -137,6 +149,19 @@ class STLConversionOperator(Operator):
         if isinstance(output_file, Path):
             output_file.parent.mkdir(exist_ok=True)
 
+        if self._batch_labels:
+            meshes = self._converter.convert_labels(
+                image=image,
+                class_ids=self._class_id,
+                is_smooth=self._is_smooth,
+                keep_largest_connected_component=self._keep_largest_connected_component,
+                num_workers=self._num_workers,
+            )
+            if output_file:
+                with open(str(output_file), "wb") as w_file:
+                    w_file.write(STLConverter.to_zip_bytes(meshes))
+            return meshes
+
         return self._converter.convert(
             image=image,
             output_file=output_file,
@@ -190,17 +215,7 @@ class STLConverter:
         if res is None:
             raise ValueError("Image spacing/resolution is missing.")
 
-        # In case image has been re-oriented from the original
-        affine = s_image.original_affine
-        if (
-            affine is not None
-            and s_image.affine is not None
-            and np.sum(np.abs(s_image.original_affine - s_image.affine)) > 1e-7
-        ):
-            codes = nib.orientations.axcodes2ornt(
-                nib.orientations.aff2axcodes(np.linalg.inv(affine))
-            )
-            nda = nib.orientations.apply_orientation(np.squeeze(nda), codes)
+        nda = STLConverter._reorient(s_image, nda)
 
         new_nda = np.zeros(shape=nda.shape, dtype=np.uint8)
         if class_ids is None:
@@ -227,39 +242,138 @@ class STLConverter:
 
         verts, faces, _, _ = measure.marching_cubes(new_nda, level=0.5, step_size=5)
 
-        for _j in range(3):
-            verts[:, _j] = (verts[:, _j] + 0.5) * float(nda.shape[_j]) / float(
-                new_nda.shape[_j]
-            ) - 0.5
-
-        itk_image = s_image.itk_image
-        for _j in range(verts.shape[0]):
-            vert = (float(verts[_j, 0]), float(verts[_j, 1]), float(verts[_j, 2]))
-            vert = itk_image.TransformContinuousIndexToPhysicalPoint(vert)
-            verts[_j, :] = np.array(vert)
-
-        # Write out the STL file, and then load into trimesh
-        try:
-            temp_folder = tempfile.mkdtemp()
-            raw_stl_filename = os.path.join(temp_folder, "temp.stl")
-            STLConverter.write_stl(verts, faces, raw_stl_filename)
-            mesh_data = trimesh.load(raw_stl_filename)
-
-            if is_smooth:
-                trimesh.smoothing.filter_taubin(mesh_data, iterations=20)
-
-            final_file_path = (
-                output_file if output_file else os.path.join(temp_folder, "surface_mesh.stl")
-            )
-            mesh_data.export(final_file_path)
-            with open(str(final_file_path), "rb") as r_file:
-                stl_bytes = r_file.read()
-        finally:
-            shutil.rmtree(temp_folder)
+        # Map the vertices back to the index space of the original volume, then to physical space
+        scale = np.asarray(nda.shape[:3], dtype=np.float64) / np.asarray(new_nda.shape[:3])
+        verts = (verts + 0.5) * scale - 0.5
+        verts = STLConverter.transform_index_to_physical_points(verts, s_image.itk_image)
+
+        # Build the mesh in memory, and export it to binary STL bytes
+        mesh_data = trimesh.Trimesh(vertices=verts, faces=faces)
+        if is_smooth:
+            trimesh.smoothing.filter_taubin(mesh_data, iterations=20)
+
+        stl_bytes = mesh_data.export(file_type="stl")
+        if output_file:
+            with open(str(output_file), "wb") as w_file:
+                w_file.write(stl_bytes)
 
         return stl_bytes
 
+    def convert_labels(
+        self,
+        image: Image,
+        class_ids=None,
+        is_smooth=True,
+        keep_largest_connected_component=True,
+        num_workers=1,
+    ) -> Dict[int, bytes]:
+        """Generates one surface mesh per label of a segmentation, e.g. with 100+ organs.
+
+        The bounding boxes of all the labels are found in one pass over the volume. Each label is
+        then cropped to its bounding box, and only the crop is resampled, has its largest connected
+        component kept, and goes through marching cubes and smoothing. The labels are processed in
+        a process pool if num_workers is more than 1.
+
+        Args:
+            image (Image): object with the image (ndarray of DHW index order) and its metadata dictionary.
+            class_ids (array, optional): Label ids to convert. Defaults to None for all the labels.
+            is_smooth (bool, optional): smoothing or not. Defaults to True.
+            keep_largest_connected_component (bool, optional): Defaults to True.
+            num_workers (int, optional): Number of processes. Defaults to 1.
+
+        Returns:
+            Dict of the bytes of the binary STL file by label id. Labels without surface are omitted.
+        """
+
+        if not image or not isinstance(image, Image):
+            raise ValueError("image is not a Image object.")
+
+        s_image = self.SpatialImage(image)
+        res = s_image.spacing
+        if res is None:
+            raise ValueError("Image spacing/resolution is missing.")
+
+        labels = STLConverter._reorient(s_image, s_image.image_array)
+        labels = np.rint(labels).astype(np.int32)
+        self._logger.info(f"Label ndarray shape:{labels.shape}")
+
+        if class_ids is None:
+            class_ids = range(1, labels.max() + 1)
+        elif not isinstance(class_ids, list):
+            class_ids = [class_ids]
+
+        index_to_physical, origin = STLConverter._index_to_physical_affine(s_image.itk_image)
+        bounding_boxes = find_objects(labels)
+        tasks = []
+        for class_id in class_ids:
+            class_id = int(class_id)
+            if (
+                class_id < 1
+                or class_id > len(bounding_boxes)
+                or bounding_boxes[class_id - 1] is None
+            ):
+                self._logger.info(f"Label {class_id} not found in the image.")
+                continue
+            # Crop with a margin of one voxel so that the surface is closed
+            crop = tuple(
+                slice(max(box.start - 1, 0), min(box.stop + 1, size))
+                for box, size in zip(bounding_boxes[class_id - 1], labels.shape)
+            )
+            offset = np.array([box.start for box in crop], dtype=np.float64)
+            sub_nda = (labels[crop] == class_id).astype(np.uint8)
+            tasks.append(
+                (
+                    class_id,
+                    sub_nda,
+                    offset,
+                    res,
+                    index_to_physical,
+                    origin,
+                    is_smooth,
+                    keep_largest_connected_component,
+                )
+            )
+        del labels
+
+        if num_workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                results = list(executor.map(_convert_label, tasks))
+        else:
+            results = [_convert_label(task) for task in tasks]
+
+        meshes = {}
+        for class_id, stl_bytes in results:
+            if stl_bytes is None:
+                self._logger.warning(f"No surface generated for label {class_id}.")
+            else:
+                meshes[class_id] = stl_bytes
+        return meshes
+
+    @staticmethod
+    def to_zip_bytes(meshes: Dict[int, bytes]) -> bytes:
+        """Packs the STL bytes by label into a zip archive, with a `label_<id>.stl` file per label."""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for class_id, stl_bytes in meshes.items():
+                archive.writestr(f"label_{class_id}.stl", stl_bytes)
+        return buffer.getvalue()
+
     # Helper functions
+    @staticmethod
+    def _reorient(s_image, nda):
+        """Re-orients the array in case image has been re-oriented from the original."""
+        affine = s_image.original_affine
+        if (
+            affine is not None
+            and s_image.affine is not None
+            and np.sum(np.abs(s_image.original_affine - s_image.affine)) > 1e-7
+        ):
+            codes = nib.orientations.axcodes2ornt(
+                nib.orientations.aff2axcodes(np.linalg.inv(affine))
+            )
+            nda = nib.orientations.apply_orientation(np.squeeze(nda), codes)
+        return nda
+
     @staticmethod
     def get_largest_cc(nda):
         logging.debug("ndarray shape: {}".format(nda.shape))
@@ -282,13 +396,36 @@ class STLConverter:
             anti_aliasing=anti_aliasing,
         )
 
+    @staticmethod
+    def transform_index_to_physical_points(verts, itk_image):
+        """Transforms continuous indices to physical points, like `TransformContinuousIndexToPhysicalPoint`.
+
+        The transform is applied to all the points at once, as the affine
+        `origin + direction * diag(spacing) * index`.
+
+        Args:
+            verts (ndarray): N x 3 array of continuous indices.
+            itk_image: The SimpleITK image defining the physical space.
+
+        Returns:
+            N x 3 array of physical points.
+        """
+        index_to_physical, origin = STLConverter._index_to_physical_affine(itk_image)
+        return verts @ index_to_physical.T + origin
+
+    @staticmethod
+    def _index_to_physical_affine(itk_image):
+        """Gets the linear part and the translation of the index to physical point transform."""
+        direction = np.asarray(itk_image.GetDirection(), dtype=np.float64).reshape(3, 3)
+        index_to_physical = direction * np.asarray(itk_image.GetSpacing(), dtype=np.float64)
+        origin = np.asarray(itk_image.GetOrigin(), dtype=np.float64)
+        return index_to_physical, origin
+
     @staticmethod
     def write_stl(verts, faces, filename):
         # Create the mesh
         cube = mesh.Mesh(np.zeros(faces.shape[0], dtype=mesh.Mesh.dtype))
-        for i, f in enumerate(faces):
-            for j in range(3):
-                cube.vectors[i][j] = verts[f[j], :]
+        cube.vectors[:] = verts[faces]
 
         cube.save(os.path.splitext(filename)[0] + ".stl")
 
@@ -454,6 +591,51 @@ class STLConverter:
             self._props["itk_image"] = itk_image
 
 
+def _convert_label(task):
+    """Generates the STL bytes of one cropped label, in a worker process of `convert_labels`.
+
+    Returns:
+        The label id and the STL bytes, or None if there is no surface.
+    """
+    (
+        class_id,
+        sub_nda,
+        offset,
+        res,
+        index_to_physical,
+        origin,
+        is_smooth,
+        keep_largest_connected_component,
+    ) = task
+
+    if keep_largest_connected_component:
+        sub_nda = STLConverter.get_largest_cc(sub_nda)
+
+    max_res = np.amin(res)
+    target_shape = [
+        max(int(np.round(float(sub_nda.shape[_j]) * res[_j] / max_res)), 2) for _j in range(3)
+    ]
+    new_nda = STLConverter.resize_volume(sub_nda, output_shape=target_shape)
+
+    try:
+        verts, faces, _, _ = measure.marching_cubes(new_nda, level=0.5, step_size=5)
+    except (ValueError, RuntimeError) as err:
+        logging.debug(f"Marching cubes failed for label {class_id}: {err}")
+        return class_id, None
+    if len(faces) == 0:
+        return class_id, None
+
+    # Map the vertices back to the index space of the whole volume, then to physical space
+    scale = np.asarray(sub_nda.shape, dtype=np.float64) / np.asarray(new_nda.shape)
+    verts = (verts + 0.5) * scale - 0.5 + offset
+    verts = verts @ index_to_physical.T + origin
+
+    mesh_data = trimesh.Trimesh(vertices=verts, faces=faces)
+    if is_smooth:
+        trimesh.smoothing.filter_taubin(mesh_data, iterations=20)
+    return class_id, mesh_data.export(file_type="stl")
+
+
 def test():
     from operators.medical_imaging.operators.dicom_data_loader_operator import (
         DICOMDataLoaderOperator,
@@ -0,0 +1,138 @@
+# SPDX-FileCopyrightText: Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+import pytest
+import SimpleITK as sitk
+import trimesh
+from skimage import measure
+
+from operators.medical_imaging.core import Image
+from operators.medical_imaging.stl_conversion_operator.stl_conversion_operator import STLConverter
+
+SHAPE = (40, 36, 32)
+SPACING = (0.8, 0.8, 1.2)
+# An oblique orientation, so that the direction is part of the index to physical transform
+COS, SIN = np.cos(np.pi / 6), np.sin(np.pi / 6)
+DIRECTION = np.array([[COS, SIN, 0.0], [-SIN, COS, 0.0], [0.0, 0.0, 1.0]])
+
+
+def make_labels():
+    """Creates a segmentation with a sphere (1), a box (2), and a small separate blob of 1."""
+    labels = np.zeros(SHAPE, dtype=np.uint8)
+    grid = np.indices(SHAPE)
+    center = np.array([14, 14, 12]).reshape(3, 1, 1, 1)
+    labels[np.sum((grid - center) ** 2, axis=0) <= 8**2] = 1
+    labels[26:36, 20:32, 14:28] = 2
+    labels[2:5, 30:33, 2:5] = 1
+    return labels
+
+
+def make_image(labels):
+    metadata = {
+        "row_pixel_spacing": SPACING[0],
+        "col_pixel_spacing": SPACING[1],
+        "depth_pixel_spacing": SPACING[2],
+        "row_direction_cosine": DIRECTION[0].tolist(),
+        "col_direction_cosine": DIRECTION[1].tolist(),
+        "depth_direction_cosine": DIRECTION[2].tolist(),
+        "nifti_affine_transform": np.eye(4),
+    }
+    return Image(labels, metadata)
+
+
+def convert_like_before(image):
+    """Generates the STL bytes the way `STLConverter.convert` did before it was vectorized, with
+    a transform per vertex and the mesh written to a temporary STL file and loaded back."""
+    s_image = STLConverter.SpatialImage(image)
+    nda = STLConverter.get_largest_cc(s_image.image_array)
+    res = s_image.spacing
+    target_shape = [int(np.round(float(nda.shape[j]) * res[j] / np.amin(res))) for j in range(3)]
+    new_nda = STLConverter.resize_volume(nda, output_shape=target_shape)
+    verts, faces, _, _ = measure.marching_cubes(new_nda, level=0.5, step_size=5)
+    for j in range(3):
+        verts[:, j] = (verts[:, j] + 0.5) * float(nda.shape[j]) / float(new_nda.shape[j]) - 0.5
+    for j in range(verts.shape[0]):
+        vert = (float(verts[j, 0]), float(verts[j, 1]), float(verts[j, 2]))
+        verts[j, :] = s_image.itk_image.TransformContinuousIndexToPhysicalPoint(vert)
+
+    with tempfile.TemporaryDirectory() as temp_folder:
+        raw_stl_filename = os.path.join(temp_folder, "temp.stl")
+        STLConverter.write_stl(verts, faces, raw_stl_filename)
+        mesh_data = trimesh.load(raw_stl_filename)
+        trimesh.smoothing.filter_taubin(mesh_data, iterations=20)
+        return mesh_data.export(file_type="stl")
+
+
+def load_mesh(stl_bytes):
+    return trimesh.load(io.BytesIO(stl_bytes), file_type="stl")
+
+
+def test_transform_index_to_physical_points():
+    """Test the vectorized transform against the SimpleITK transform of each point."""
+    itk_image = sitk.GetImageFromArray(np.zeros(SHAPE, dtype=np.float32))
+    itk_image.SetSpacing(SPACING)
+    itk_image.SetDirection(DIRECTION.ravel().tolist())
+    itk_image.SetOrigin((-10.0, 5.0, 2.5))
+    verts = np.random.default_rng(0).uniform(0, 30, size=(50, 3))
+
+    points = STLConverter.transform_index_to_physical_points(verts, itk_image)
+
+    expected = [itk_image.TransformContinuousIndexToPhysicalPoint(v.tolist()) for v in verts]
+    np.testing.assert_allclose(points, expected, atol=1e-9)
+
+
+@pytest.mark.parametrize("class_id", [1, 2])
+def test_convert_matches_previous_output(class_id):
+    """Test that the mesh built in memory is the one written and read back by the previous code."""
+    image = make_image((make_labels() == class_id).astype(np.uint8))
+
+    stl_bytes = STLConverter().convert(image)
+
+    mesh_data, expected = load_mesh(stl_bytes), load_mesh(convert_like_before(image))
+    assert len(mesh_data.faces) > 0
+    np.testing.assert_array_equal(mesh_data.faces, expected.faces)
+    np.testing.assert_allclose(mesh_data.vertices, expected.vertices, atol=1e-4)
+
+
+def test_convert_labels():
+    """Test one mesh per label, around the largest connected component of each label."""
+    labels = make_labels()
+    image = make_image(labels)
+    converter = STLConverter()
+
+    meshes = converter.convert_labels(image)
+
+    assert sorted(meshes) == [1, 2]
+    for class_id, stl_bytes in meshes.items():
+        mesh_data = load_mesh(stl_bytes)
+        expected = load_mesh(convert_like_before(make_image((labels == class_id).astype(np.uint8))))
+        # the crop shifts the marching cubes grid, which has a step of 5 voxels
+        np.testing.assert_allclose(mesh_data.bounds, expected.bounds, atol=5 * max(SPACING))
+
+    assert converter.convert_labels(image, class_ids=[2, 3]).keys() == {2}
+    assert converter.convert_labels(image, num_workers=2) == meshes
+
+
+def test_to_zip_bytes():
+    meshes = {1: b"solid one", 7: b"solid seven"}
+    with zipfile.ZipFile(io.BytesIO(STLConverter.to_zip_bytes(meshes))) as archive:
+        assert archive.namelist() == ["label_1.stl", "label_7.stl"]
+        assert archive.read("label_7.stl") == b"solid seven"
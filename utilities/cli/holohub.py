@@ -43,12 +43,31 @@ class HoloHubCLI:
     DEFAULT_BUILD_PARENT_DIR = HOLOHUB_ROOT / "build"
     DEFAULT_DATA_DIR = HOLOHUB_ROOT / "data"
     DEFAULT_SDK_DIR = "/opt/nvidia/holoscan/lib"
+    METADATA_CACHE_FILE = HOLOHUB_ROOT / ".cache" / "holohub_metadata_index.json"
 
     def __init__(self):
         self.script_name = os.environ.get("HOLOHUB_CMD_NAME", "./holohub")
         self.parser = self._create_parser()
         self._collect_metadata()
 
+    @property
+    def projects(self) -> list[dict]:
+        return self._projects
+
+    @projects.setter
+    def projects(self, projects: list[dict]) -> None:
+        self._projects = projects
+        self._projects_by_name = None
+
+    @property
+    def projects_by_name(self) -> dict[str, list[dict]]:
+        """Index of the projects by project name, built on first use"""
+        if self._projects_by_name is None:
+            self._projects_by_name = defaultdict(list)
+            for project in self._projects:
+                self._projects_by_name[project["project_name"]].append(project)
+        return self._projects_by_name
+
     def _create_parser(self) -> argparse.ArgumentParser:
         """Create the argument parser with all supported commands"""
         parser = argparse.ArgumentParser(
@@ -397,22 +416,29 @@ class HoloHubCLI:
             HoloHubCLI.HOLOHUB_ROOT / "pkg",
             HoloHubCLI.HOLOHUB_ROOT / "workflows",
         )
-        self.projects = metadata_util.gather_metadata(app_paths, exclude_paths=EXCLUDE_PATHS)
+        # READMEs are not needed by the CLI commands and are loaded on demand with
+        # metadata_util.load_readme. Parsed metadata.json files are cached on disk by path and
+        # modification time, so only new or modified files are parsed again.
+        self.projects = metadata_util.gather_metadata(
+            app_paths,
+            exclude_paths=EXCLUDE_PATHS,
+            include_readme=False,
+            cache_file=str(HoloHubCLI.METADATA_CACHE_FILE),
+        )
 
     def find_project(self, project_name: str, language: Optional[str] = None) -> dict:
         """Find a project by name"""
         normalized_language = holohub_cli_util.normalize_language(language) if language else None
 
         # First try exact match
-        for project in self.projects:
-            if project["project_name"] == project_name:
-                if (
-                    normalized_language
-                    and holohub_cli_util.normalize_language(project["metadata"]["language"])
-                    != normalized_language
-                ):
-                    continue
-                return project
+        for project in self.projects_by_name.get(project_name, []):
+            if (
+                normalized_language
+                and holohub_cli_util.normalize_language(project["metadata"]["language"])
+                != normalized_language
+            ):
+                continue
+            return project
         # If project not found, suggest similar names
         distances = [
             (
@@ -1588,6 +1614,11 @@ class HoloHubCLI:
                         print(f"  {Color.yellow('Would remove:')} {path}")
                     else:
                         shutil.rmtree(path)
+        if HoloHubCLI.METADATA_CACHE_FILE.is_file():
+            if args.dryrun:
+                print(f"  {Color.yellow('Would remove:')} {HoloHubCLI.METADATA_CACHE_FILE}")
+            else:
+                HoloHubCLI.METADATA_CACHE_FILE.unlink()
 
     def _add_to_cmakelists(self, project_name: str) -> None:
         """Add a new application to applications/CMakeLists.txt if it doesn't exist"""
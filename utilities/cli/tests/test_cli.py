@@ -17,6 +17,7 @@
 import os
 import subprocess
 import sys
+import tempfile
 import unittest
 from io import StringIO
 from pathlib import Path
@@ -243,6 +244,41 @@ class TestHoloHubCLI(unittest.TestCase):
                 self.assertIn("Project 'nonexistent' not found.", stderr_output)
                 self.assertNotIn("Did you mean", stderr_output)
 
+    def test_find_project_by_name(self):
+        """Test the exact match lookup, including after the projects are replaced"""
+        self.assertEqual(self.cli.find_project("hello_world")["metadata"]["language"], "cpp")
+        project = self.cli.find_project("hello_world_python", language="python")
+        self.assertEqual(project["project_name"], "hello_world_python")
+
+        self.cli.projects = [
+            {"project_name": "hello_world", "metadata": {"language": "cpp"}},
+            {"project_name": "hello_world", "metadata": {"language": "python"}},
+        ]
+        project = self.cli.find_project("hello_world", language="python")
+        self.assertEqual(project["metadata"]["language"], "python")
+        with patch("sys.stderr", new_callable=StringIO):
+            with self.assertRaises(SystemExit):
+                self.cli.find_project("hello_world_python")
+
+    def test_metadata_index_cache(self):
+        """Test that the metadata index cache gives the same projects as a full search"""
+        import utilities.metadata.gather_metadata as metadata_util
+
+        repo_paths = [HoloHubCLI.HOLOHUB_ROOT / "applications" / "holoviz"]
+        expected = metadata_util.gather_metadata(repo_paths)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_file = os.path.join(tmp_dir, "metadata_index.json")
+            for _ in range(2):  # build the index, then reuse it
+                projects = metadata_util.gather_metadata(
+                    repo_paths, include_readme=False, cache_file=cache_file
+                )
+                self.assertTrue(os.path.isfile(cache_file))
+                self.assertEqual(len(projects), len(expected))
+                for project, expected_project in zip(projects, expected):
+                    self.assertNotIn("readme", project)
+                    self.assertEqual(metadata_util.load_readme(project), expected_project["readme"])
+                    self.assertEqual(project, expected_project)
+
     @patch("utilities.cli.util.run_command")
     def test_lint_command(self, mock_run_command):
         """Test the lint command parsing"""
@@ -16,34 +16,136 @@
 """  # noqa: E501
 
 import argparse
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
+import numpy as np
 from gxf_entity_codec import EntityReader
 from PIL import Image
 
+IMAGE_FORMATS = {
+    "png": ("PNG", "png"),
+    "jpeg": ("JPEG", "jpg"),
+    "webp": ("WEBP", "webp"),
+    "npy": (None, "npy"),
+}
 
-def iter_output_frames(entity_iter):
-    for entity in entity_iter:
-        component = entity.components[0]  # assume only one component with a tensor
-        tensor = component.tensor
-        array = tensor.array
-        frame_bytes = array.tobytes()
-        yield frame_bytes
 
+def get_save_options(image_format, compress_level=None, quality=None):
+    """Get the keyword arguments for `Image.save` for the given image format."""
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format: {image_format}")
+    options = {}
+    if image_format == "png" and compress_level is not None:
+        options["compress_level"] = compress_level
+    if image_format in ("jpeg", "webp") and quality is not None:
+        options["quality"] = quality
+    return options
 
-def convert_gxf_entity_to_images(entity_dir, entity_basename, output_dir, output_name):
-    with EntityReader(directory=entity_dir, basename=entity_basename) as reader:
+
+def save_frame(array, path, image_format="png", save_options=None):
+    """Save a frame (height x width x channels) to `path` in the given image format."""
+    if image_format == "npy":
+        np.save(path, array)
+        return
+    if array.shape[-1] == 1:
+        array = array[..., 0]
+    Image.fromarray(array).save(path, IMAGE_FORMATS[image_format][0], **(save_options or {}))
+
+
+def export_frames(
+    entity_dir, entity_basename, indices, output_dir, output_name, image_format, save_options
+):
+    """Export the frames at `indices` of a recording to image files.
+
+    The recording is opened (memory-mapped) by this function, so it can run in a worker process.
+    Files are named after the frame index, starting at 1.
+
+    Returns:
+        The number of exported frames.
+    """
+    extension = IMAGE_FORMATS[image_format][1]
+    with EntityReader(directory=entity_dir, basename=entity_basename, use_mmap=True) as reader:
+        for index in indices:
+            path = os.path.join(output_dir, f"{output_name}{index + 1:04d}.{extension}")
+            save_frame(reader.get_frame(index), path, image_format, save_options)
+    return len(indices)
+
+
+def convert_gxf_entity_to_images(
+    entity_dir,
+    entity_basename,
+    output_dir,
+    output_name,
+    *,
+    image_format="png",
+    compress_level=None,
+    quality=None,
+    start=0,
+    stop=None,
+    stride=1,
+    num_workers=1,
+):
+    """Export the frames of a GXF recording to image files.
+
+    Args:
+        entity_dir: Directory of the recording.
+        entity_basename: Base name of the recording.
+        output_dir: Directory for the output images.
+        output_name: Prefix of the output file names.
+        image_format: One of "png", "jpeg", "webp" or "npy".
+        compress_level: PNG compression level (0-9).
+        quality: JPEG/WebP quality (0-100).
+        start: Index of the first frame to export.
+        stop: Index after the last frame to export (defaults to the end of the recording).
+        stride: Export every `stride`-th frame.
+        num_workers: Number of worker processes. Each worker opens its own reader on a slice
+            of the selected frames.
+
+    Returns:
+        The number of exported frames.
+    """
+    save_options = get_save_options(image_format, compress_level, quality)
+    with EntityReader(directory=entity_dir, basename=entity_basename, use_mmap=True) as reader:
         frame_shape = reader.get_frame(0).shape
         print(
             f"Frame array shape: {frame_shape[0]}x{frame_shape[1]}x{frame_shape[2]}"
             " (height x width x channels)",
             file=sys.stderr,
         )
+        indices = range(reader.num_entities)[start:stop:stride]
+
+    if num_workers <= 1 or len(indices) <= 1:
+        return export_frames(
+            entity_dir,
+            entity_basename,
+            indices,
+            output_dir,
+            output_name,
+            image_format,
+            save_options,
+        )
 
-        entities = reader.get_entities()
-        for i, frame_data in enumerate(iter_output_frames(entities)):
-            img = Image.frombytes("RGB", (frame_shape[1], frame_shape[0]), frame_data)
-            img.save(str(output_dir + "/" + output_name + "{:04d}.png").format(i + 1))
+    # Use a few slices per worker so that workers finishing early pick up remaining work
+    num_slices = min(len(indices), num_workers * 4)
+    slice_size = -(-len(indices) // num_slices)
+    slices = [indices[i : i + slice_size] for i in range(0, len(indices), slice_size)]
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = [
+            executor.submit(
+                export_frames,
+                entity_dir,
+                entity_basename,
+                frame_slice,
+                output_dir,
+                output_name,
+                image_format,
+                save_options,
+            )
+            for frame_slice in slices
+        ]
+        return sum(future.result() for future in futures)
 
 
 def main():
@@ -57,9 +159,34 @@ def main():
     parser.add_argument("--directory", default="./", help="Directory for gxf entities to read")
     parser.add_argument("--outputname", default="tensor", help="Output name for images")
     parser.add_argument("--outputdir", default="./", help="Directory for output images")
+    parser.add_argument(
+        "--format", default="png", choices=IMAGE_FORMATS.keys(), help="Output image format"
+    )
+    parser.add_argument(
+        "--compress_level", type=int, choices=range(10), help="PNG compression level (0-9)"
+    )
+    parser.add_argument("--quality", type=int, help="JPEG/WebP quality (0-100)")
+    parser.add_argument("--start", default=0, type=int, help="Index of the first frame")
+    parser.add_argument("--stop", default=None, type=int, help="Index after the last frame")
+    parser.add_argument("--stride", default=1, type=int, help="Export every n-th frame")
+    parser.add_argument(
+        "--workers", default=1, type=int, help="Number of worker processes for the export"
+    )
     args = parser.parse_args()
 
-    convert_gxf_entity_to_images(args.directory, args.basename, args.outputdir, args.outputname)
+    convert_gxf_entity_to_images(
+        args.directory,
+        args.basename,
+        args.outputdir,
+        args.outputname,
+        image_format=args.format,
+        compress_level=args.compress_level,
+        quality=args.quality,
+        start=args.start,
+        stop=args.stop,
+        stride=args.stride,
+        num_workers=args.workers,
+    )
 
 
 if __name__ == "__main__":
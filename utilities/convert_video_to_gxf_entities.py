@@ -14,8 +14,10 @@
 # limitations under the License.
 
 import os
+import queue
 import struct
 import sys
+import threading
 import time
 from enum import Enum
 from io import BufferedIOBase, BytesIO
@@ -48,6 +50,8 @@ class EntityIndex:
         "Q"  # data_offset => uint64_t
     )
     HEADER_SIZE = HEADER_STRUCT.size
+    # Structured dtype matching HEADER_STRUCT, for batching index records
+    DTYPE = np.dtype([("log_time", "=u8"), ("data_size", "=u8"), ("data_offset", "=u8")])
 
     def __init__(
         self,
@@ -887,7 +891,17 @@ def get_file_size(path_or_reader: Union[os.PathLike, BufferedIOBase]) -> int:
 
 
 class EntityRecorder:
-    """Write to the GXF recording format that EntityRecorder is using."""
+    """Write to the GXF recording format that EntityRecorder is using.
+
+    Frames are written straight from their memory (no `tobytes()` copy) behind a header
+    block that is serialized once per frame layout, and index records are accumulated in a
+    preallocated array and flushed in batches. With `background=True`, the file writes are
+    offloaded to a writer thread fed through a bounded queue.
+    """
+
+    # Offset of EntityHeader.sequence_number, the only header field that changes per frame
+    _SEQUENCE_NUMBER_OFFSET = struct.calcsize("=QI")
+    _SEQUENCE_NUMBER_STRUCT = struct.Struct("=Q")
 
     def __init__(
         self,
@@ -895,6 +909,9 @@ class EntityRecorder:
         basename: str = "tensor",
         *,
         framerate: Union[int, float] = 30,
+        index_batch_size: int = 256,
+        background: bool = False,
+        queue_size: int = 8,
     ) -> None:
         """Initialize the recorder.
 
@@ -902,50 +919,148 @@ class EntityRecorder:
             directory: Directory to write the recording to.
             basename: Base name of the recording.
             framerate: Framerate of the recording.
+            index_batch_size: Number of index records to accumulate before writing them out.
+            background: Write to the files from a background thread so that adding a frame
+                only enqueues it. Frames must not be modified after they were added.
+            queue_size: Maximum number of frames waiting for the background thread. Adding a
+                frame blocks while the queue is full.
         """
+        if index_batch_size <= 0:
+            raise ValueError("index_batch_size must be positive")
+        if queue_size <= 0:
+            raise ValueError("queue_size must be positive")
         self._directory = directory
         self._basename = basename
         self._framerate = framerate
+        self._index_batch_size = index_batch_size
+        self._background = background
+        self._queue_size = queue_size
         self._index_path = os.path.join(self._directory, f"{self._basename}.gxf_index")
         self._entities_path = os.path.join(self._directory, f"{self._basename}.gxf_entities")
         self._index_file = None
         self._entities_file = None
+        self._queue = None
+        self._thread = None
+        self._thread_error = None
         self._initialize()
 
     def __enter__(self):
         self.open()
         return self
 
-    def __exit__(self, type, value, traceback):
+    def __exit__(self, exception_type, exception_value, exception_traceback):
         self.close()
 
     def _initialize(self):
         self._index = 0
         self._start_timestemp = int(time.time() * 10**9)
+        self._entities_offset = 0
+        self._index_buffer = np.zeros(self._index_batch_size, dtype=EntityIndex.DTYPE)
+        self._index_count = 0
+        self._header_key = None
+        self._header_buffer = None
 
     def open(self):
         self.close()
         self._index_file = open(self._index_path, "wb")
         self._entities_file = open(self._entities_path, "wb")
         self._initialize()
+        if self._background:
+            self._queue = queue.Queue(maxsize=self._queue_size)
+            self._thread_error = None
+            self._thread = threading.Thread(target=self._run, name="EntityRecorder", daemon=True)
+            self._thread.start()
 
     def close(self):
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+            self._queue = None
         if self._index_file:
+            self._flush_index()
             self._index_file.close()
             self._index_file = None
         if self._entities_file:
             self._entities_file.close()
             self._entities_file = None
+        self._raise_thread_error()
+
+    def _raise_thread_error(self):
+        if self._thread_error:
+            error, self._thread_error = self._thread_error, None
+            raise RuntimeError("EntityRecorder background thread failed") from error
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._thread_error:
+                # keep draining the queue so that add() never blocks on a dead writer
+                continue
+            try:
+                self._write(*item)
+            except Exception as e:
+                self._thread_error = e
+
+    def _get_header_buffer(self, array: np.ndarray, name: bytes) -> bytearray:
+        """Get the serialized entity, component and tensor headers for a frame layout.
+
+        The headers only depend on the frame layout and name, so they are serialized once and
+        only the sequence number is patched for each frame.
+        """
+        key = (array.shape, array.strides, array.dtype, name)
+        if key != self._header_key:
+            writer = BytesIO()
+            EntityHeader(data=(0, 0, 0, 0, 1, 0)).serialize(writer=writer, whence=os.SEEK_CUR)
+            ComponentHeader(data=(0, *TensorType, len(name))).serialize(
+                writer=writer, whence=os.SEEK_CUR
+            )
+            writer.write(name)
+            TensorHeader(
+                data=(
+                    MemoryStorageType.kDevice,
+                    PrimitiveType.kUnsigned8,
+                    array.dtype.itemsize,
+                    array.ndim,
+                    array.shape,
+                    array.strides,
+                )
+            ).serialize(writer=writer, whence=os.SEEK_CUR)
+            self._header_key = key
+            self._header_buffer = bytearray(writer.getvalue())
+        return self._header_buffer
+
+    def _write(self, array: np.ndarray, name: bytes, sequence_number: int, timestamp: int):
+        header_buffer = self._get_header_buffer(array, name)
+        self._SEQUENCE_NUMBER_STRUCT.pack_into(
+            header_buffer, self._SEQUENCE_NUMBER_OFFSET, sequence_number
+        )
+        self._entities_file.write(header_buffer)
+        self._entities_file.write(memoryview(array).cast("B"))
 
-    def add(self, array: ArrayLike, *, name: str = "") -> Entity:
-        """Add a new entity to the recording.
+        entity_size = len(header_buffer) + array.nbytes
+        self._index_buffer[self._index_count] = (timestamp, entity_size, self._entities_offset)
+        self._index_count += 1
+        self._entities_offset += entity_size
+        if self._index_count == self._index_batch_size:
+            self._flush_index()
+
+    def _flush_index(self):
+        if self._index_count:
+            self._index_file.write(self._index_buffer[: self._index_count])
+            self._index_count = 0
+
+    def append(self, array: ArrayLike, *, name: str = "") -> int:
+        """Append a new entity to the recording without building any Entity objects.
 
         Args:
             array: The array to be added to the recording.
             name: The name of the entity.
 
         Returns:
-            The entity that was added.
+            The sequence number of the entity that was added.
         """
         if not self._index_file:
             raise ValueError("Recorder is not open")
@@ -963,8 +1078,35 @@ class EntityRecorder:
             raise TypeError("Array must have 1 or 3 channels, but got {}", array.shape[2])
         if not isinstance(name, str):
             raise TypeError("name must be a string")
+        self._raise_thread_error()
+
+        array = np.ascontiguousarray(array)
+        sequence_number = self._index
+        timestamp = self._start_timestemp + int(sequence_number * 10**9 / self._framerate)
+        item = (array, name.encode("utf-8"), sequence_number, timestamp)
+        if self._thread:
+            self._queue.put(item)
+        else:
+            self._write(*item)
+
+        self._index += 1
+
+        return sequence_number
+
+    def add(self, array: ArrayLike, *, name: str = "") -> Entity:
+        """Add a new entity to the recording.
 
-        entity_header = EntityHeader(data=(0, 0, self._index, 0, 1, 0))
+        Args:
+            array: The array to be added to the recording.
+            name: The name of the entity.
+
+        Returns:
+            The entity that was added.
+        """
+        sequence_number = self.append(array, name=name)
+
+        array = np.ascontiguousarray(array)
+        entity_header = EntityHeader(data=(0, 0, sequence_number, 0, 1, 0))
         component_header = ComponentHeader(data=(0, *TensorType, 0))
         tensor_header = TensorHeader(
             data=(
@@ -978,18 +1120,7 @@ class EntityRecorder:
         )
         tensor = Tensor(data=(tensor_header, array))
         component = Component(data=(component_header, name, tensor))
-        entity = Entity(data=(entity_header, [component]))
-
-        timestamp = self._start_timestemp + int(self._index * 10**9 / self._framerate)
-        offset = self._entities_file.tell()
-        entity_index = EntityIndex(data=(timestamp, entity.size_in_bytes, offset))
-
-        entity_index.write(writer=self._index_file, whence=os.SEEK_CUR)
-        entity.write(writer=self._entities_file, whence=os.SEEK_CUR)
-
-        self._index += 1
-
-        return entity
+        return Entity(data=(entity_header, [component]))
 
 
 def iter_input_frames(f, width, height, channels):
@@ -1018,10 +1149,25 @@ def main():
     parser.add_argument("--framerate", default=30, type=int, help="Output frame rate")
     parser.add_argument("--basename", default="tensor", help="Basename for gxf entities")
     parser.add_argument("--directory", default="./", help="Directory for gxf entities")
+    parser.add_argument(
+        "--background",
+        action="store_true",
+        help="Write the gxf entities from a background thread while reading the input",
+    )
+    parser.add_argument(
+        "--queue-size",
+        default=8,
+        type=int,
+        help="Maximum number of frames waiting to be written in background mode",
+    )
     args = parser.parse_args()
 
     with EntityRecorder(
-        directory=args.directory, basename=args.basename, framerate=args.framerate
+        directory=args.directory,
+        basename=args.basename,
+        framerate=args.framerate,
+        background=args.background,
+        queue_size=args.queue_size,
     ) as recorder:
         for frame in iter_input_frames(
             sys.stdin.buffer,
@@ -1029,7 +1175,7 @@ def main():
             height=args.height,
             channels=args.channels,
         ):
-            recorder.add(frame)
+            recorder.append(frame)
 
 
 if __name__ == "__main__":
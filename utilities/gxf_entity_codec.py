@@ -15,8 +15,11 @@
  limitations under the License.
 """  # noqa: E501
 
+import mmap
 import os
+import queue
 import struct
+import threading
 import time
 from enum import Enum
 from io import BufferedIOBase, BytesIO
@@ -49,6 +52,8 @@ class EntityIndex:
         "Q"  # data_offset => uint64_t
     )
     HEADER_SIZE = HEADER_STRUCT.size
+    # Structured dtype matching HEADER_STRUCT, for loading a whole .gxf_index file at once
+    DTYPE = np.dtype([("log_time", "=u8"), ("data_size", "=u8"), ("data_offset", "=u8")])
 
     def __init__(
         self,
@@ -83,6 +88,11 @@ class EntityIndex:
             f"data_offset={self.data_offset})"
         )
 
+    @classmethod
+    def unpack_from(cls, buffer: ReadableBuffer, offset: int = 0) -> "EntityIndex":
+        """Deserialize the index from `buffer` at `offset` without copying the buffer."""
+        return cls(data=cls.HEADER_STRUCT.unpack_from(buffer, offset))
+
     def read(
         self,
         *,
@@ -204,6 +214,11 @@ class EntityHeader:
     def __repr__(self) -> str:
         return f"EntityHeader(serialized_size={self.serialized_size}, checksum={self.checksum}, sequence_number={self.sequence_number}, flags={self.flags}, component_count={self.component_count}, reserved={self.reserved})"  # noqa
 
+    @classmethod
+    def unpack_from(cls, buffer: ReadableBuffer, offset: int = 0) -> "EntityHeader":
+        """Deserialize the header from `buffer` at `offset` without copying the buffer."""
+        return cls(data=cls.HEADER_STRUCT.unpack_from(buffer, offset))
+
     def deserialize(
         self,
         *,
@@ -332,6 +347,11 @@ class ComponentHeader:
     def __repr__(self) -> str:
         return f"ComponentHeader(serialized_size={self.serialized_size}, tid={self.tid}, name_size={self.name_size})"  # noqa
 
+    @classmethod
+    def unpack_from(cls, buffer: ReadableBuffer, offset: int = 0) -> "ComponentHeader":
+        """Deserialize the header from `buffer` at `offset` without copying the buffer."""
+        return cls(data=cls.HEADER_STRUCT.unpack_from(buffer, offset))
+
     def deserialize(
         self,
         *,
@@ -500,6 +520,22 @@ class TensorHeader:
     def __repr__(self) -> str:
         return f"TensorHeader(storage_type={self.storage_type}, element_type={self.element_type}, bytes_per_element={self.bytes_per_element}, rank={self.rank}, dims={self.dims}, strides={self.strides})"  # noqa
 
+    @classmethod
+    def unpack_from(cls, buffer: ReadableBuffer, offset: int = 0) -> "TensorHeader":
+        """Deserialize the header from `buffer` at `offset` without copying the buffer."""
+        header_data = cls.HEADER_STRUCT.unpack_from(buffer, offset)
+        rank = header_data[3]
+        return cls(
+            data=(
+                MemoryStorageType(header_data[0]),
+                PrimitiveType(header_data[1]),
+                header_data[2],
+                rank,
+                header_data[4 : 4 + rank],
+                header_data[4 + Shape.kMaxRank : 4 + Shape.kMaxRank + rank],
+            )
+        )
+
     def deserialize(
         self,
         *,
@@ -607,6 +643,23 @@ class Tensor:
     def __repr__(self) -> str:
         return f"Tensor(header={self.header}, array={self.array})"
 
+    @classmethod
+    def from_buffer(cls, buffer: ReadableBuffer, offset: int = 0) -> "Tensor":
+        """Create a tensor whose array is a view into `buffer` at `offset`.
+
+        No tensor data is copied. The array is read-only if `buffer` is read-only (e.g. a
+        read-only `mmap.mmap`) and keeps `buffer` alive for as long as it is referenced.
+        """
+        header = TensorHeader.unpack_from(buffer, offset)
+        array = np.ndarray(
+            header.dims[: header.rank],
+            dtype=header.dtype,
+            strides=header.strides[: header.rank],
+            buffer=buffer,
+            offset=offset + header.HEADER_SIZE,
+        )
+        return cls(data=(header, array))
+
     def read(
         self,
         *,
@@ -703,6 +756,18 @@ class Entity:
     def __repr__(self) -> str:
         return f"Entity(EntityHeader={self.header}, components={self.components})"
 
+    @classmethod
+    def from_buffer(cls, buffer: ReadableBuffer, offset: int = 0) -> "Entity":
+        """Create an entity from `buffer` at `offset` without copying any tensor data."""
+        header = EntityHeader.unpack_from(buffer, offset)
+        curr_offset = offset + header.HEADER_SIZE
+        components = []
+        for _ in range(header.component_count):
+            component = Component.from_buffer(buffer, curr_offset)
+            curr_offset += component.size_in_bytes
+            components.append(component)
+        return cls(data=(header, components))
+
     @staticmethod
     def create(sequence_number: int, array: ArrayLike) -> None:
         entity_header = EntityHeader(data=(0, 0, sequence_number, 0, 1, 0))
@@ -819,6 +884,16 @@ class Component:
     def __repr__(self) -> str:
         return f"Component(ComponentHeader={self.header}, name={self.name}, tensor={self.tensor})"
 
+    @classmethod
+    def from_buffer(cls, buffer: ReadableBuffer, offset: int = 0) -> "Component":
+        """Create a component from `buffer` at `offset` without copying any tensor data."""
+        header = ComponentHeader.unpack_from(buffer, offset)
+        curr_offset = offset + header.HEADER_SIZE
+        name = str(buffer[curr_offset : curr_offset + header.name_size], "utf-8")
+        curr_offset += header.name_size
+        tensor = Tensor.from_buffer(buffer, curr_offset)
+        return cls(data=(header, name, tensor))
+
     def read(
         self,
         *,
@@ -890,19 +965,32 @@ def get_file_size(path_or_reader: Union[os.PathLike, BufferedIOBase]) -> int:
 class EntityReader:
     """Read from the GXF recording format that EntityReplayer is using."""
 
-    def __init__(self, directory: os.PathLike = "./", basename: str = "tensor") -> None:
+    def __init__(
+        self,
+        directory: os.PathLike = "./",
+        basename: str = "tensor",
+        *,
+        use_mmap: bool = False,
+    ) -> None:
         """Initialize the reader.
 
         Args:
             directory: Directory to read the recording from.
             basename: Base name of the recording.
+            use_mmap: Memory-map the recording instead of reading it through file handles.
+                Entities returned in this mode are zero-copy: `Tensor.array` is a read-only
+                view into the mapping, so no payload bytes are copied when accessing frames.
         """
         self._directory = directory
         self._basename = basename
+        self._use_mmap = use_mmap
         self._index_path = os.path.join(self._directory, f"{self._basename}.gxf_index")
         self._entities_path = os.path.join(self._directory, f"{self._basename}.gxf_entities")
         self._index_file = None
         self._entities_file = None
+        self._index_mmap = None
+        self._entities_mmap = None
+        self._index_array = None
 
     def __enter__(self):
         self.open()
@@ -911,13 +999,28 @@ class EntityReader:
     def __exit__(self, exception_type, exception_value, exception_traceback):
         self.close()
 
+    @staticmethod
+    def _map_file(file: BufferedIOBase) -> ReadableBuffer:
+        # mmap refuses to map empty files; an empty recording is simply an empty buffer
+        if os.fstat(file.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
     def open(self) -> None:  # noqa: A003
         """Open the recording."""
         self._index_file = open(self._index_path, "rb")  # noqa: SIM115
         self._entities_file = open(self._entities_path, "rb")  # noqa: SIM115
+        if self._use_mmap:
+            self._index_mmap = self._map_file(self._index_file)
+            self._entities_mmap = self._map_file(self._entities_file)
 
     def close(self) -> None:
         """Close the recording."""
+        # The mappings are not closed explicitly: arrays returned by get_entity() keep a
+        # reference to them and the memory is unmapped once the last of them is released.
+        self._index_mmap = None
+        self._entities_mmap = None
+        self._index_array = None
         self._index_file.close()
         self._entities_file.close()
 
@@ -931,6 +1034,8 @@ class EntityReader:
             The entity index.
         """
         offset = index * EntityIndex.HEADER_SIZE
+        if self._use_mmap:
+            return EntityIndex.unpack_from(self._index_mmap, offset)
         return EntityIndex(reader=self._index_file, offset=offset)
 
     def get_entity(self, index: int) -> Entity:
@@ -942,10 +1047,97 @@ class EntityReader:
         Returns:
             The entity.
         """
-        offset = index * EntityIndex.HEADER_SIZE
-        entity_index = EntityIndex(reader=self._index_file, offset=offset)
+        entity_index = self.get_entity_index(index)
+        if self._use_mmap:
+            return Entity.from_buffer(self._entities_mmap, entity_index.data_offset)
         return Entity(reader=self._entities_file, offset=entity_index.data_offset)
 
+    @property
+    def index_array(self) -> np.ndarray:
+        """Get the whole entity index as a structured array.
+
+        The `.gxf_index` file is loaded once (or viewed in place when memory-mapped) into an
+        array of `EntityIndex.DTYPE` with the fields `log_time`, `data_size` and `data_offset`.
+
+        Returns:
+            The entity index array.
+        """
+        if self._index_array is None:
+            count = self.num_entities
+            if self._use_mmap:
+                self._index_array = np.frombuffer(
+                    self._index_mmap, dtype=EntityIndex.DTYPE, count=count
+                )
+            else:
+                self._index_file.seek(0)
+                buffer = self._index_file.read(count * EntityIndex.HEADER_SIZE)
+                self._index_array = np.frombuffer(buffer, dtype=EntityIndex.DTYPE, count=count)
+        return self._index_array
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Get the log time (in nanoseconds) of every entity in the recording."""
+        return self.index_array["log_time"]
+
+    def find_entity(self, timestamp: int) -> int:
+        """Find the entity that was logged at or most recently before `timestamp`.
+
+        Log times are expected to be monotonically increasing, as written by EntityRecorder.
+
+        Args:
+            timestamp: Log time in nanoseconds.
+
+        Returns:
+            The index of the entity. Timestamps before the first entity map to index 0.
+        """
+        timestamps = self.timestamps
+        if timestamp < 0:
+            return 0
+        index = int(np.searchsorted(timestamps, timestamps.dtype.type(timestamp), side="right")) - 1
+        return max(index, 0)
+
+    def get_entity_range(self, start_time: int, end_time: int) -> range:
+        """Get the indices of the entities logged in the time range [start_time, end_time).
+
+        Args:
+            start_time: Start of the time range in nanoseconds (inclusive).
+            end_time: End of the time range in nanoseconds (exclusive).
+
+        Returns:
+            The range of entity indices.
+        """
+        timestamps = self.timestamps
+        # search with the dtype of the log times: mixing uint64 and int64 promotes to float64,
+        # which cannot represent nanosecond timestamps exactly
+        bounds = np.array([max(start_time, 0), max(end_time, 0)], dtype=timestamps.dtype)
+        start, end = np.searchsorted(timestamps, bounds, side="left")
+        return range(int(start), int(end))
+
+    def get_frame_statistics(self) -> dict:
+        """Get timing statistics over all frames of the recording.
+
+        Returns:
+            A dictionary with the number of frames, the duration (ns), the framerate (as
+            returned by `get_framerate`), and the mean, median, min, max and standard deviation
+            (jitter) of the frame intervals (ns).
+        """
+        timestamps = self.timestamps
+        if len(timestamps) < 2:
+            raise ValueError("Not enough entities to compute frame statistics")
+
+        intervals = np.diff(timestamps.astype(np.int64))
+        duration = int(timestamps[-1]) - int(timestamps[0])
+        return {
+            "num_frames": len(timestamps),
+            "duration": duration,
+            "framerate": self.get_framerate(),
+            "interval_mean": float(intervals.mean()),
+            "interval_median": float(np.median(intervals)),
+            "interval_min": int(intervals.min()),
+            "interval_max": int(intervals.max()),
+            "jitter": float(intervals.std()),
+        }
+
     @property
     def num_entities(self) -> int:
         """Get the number of entities in the recording.
@@ -953,6 +1145,8 @@ class EntityReader:
         Returns:
             The number of entities.
         """
+        if self._use_mmap:
+            return len(self._index_mmap) // EntityIndex.HEADER_SIZE
         return get_file_size(self._index_file) // EntityIndex.HEADER_SIZE
 
     def get_entities(self) -> Generator[Entity, None, None]:
@@ -978,11 +1172,10 @@ class EntityReader:
         if num_entities < 2:
             raise ValueError("Not enough entities to guess framerate")
 
-        first_entity_index = self.get_entity_index(0)
-        first_timestamp = first_entity_index.log_time
-        last_entity_index = self.get_entity_index(num_entities - 1)
-        last_timestamp = last_entity_index.log_time
-        duration = last_timestamp - first_timestamp
+        timestamps = self.timestamps
+        duration = int(timestamps[-1]) - int(timestamps[0])
+        if duration == 0:
+            return float("inf")
         return num_entities * 10**9 / duration
 
     def get_frame(self, index: int) -> np.ndarray:
@@ -999,7 +1192,17 @@ class EntityReader:
 
 
 class EntityWriter:
-    """Write to the GXF recording format that EntityRecorder is using."""
+    """Write to the GXF recording format that EntityRecorder is using.
+
+    Frames are written straight from their memory (no `tobytes()` copy) behind a header
+    block that is serialized once per frame layout, and index records are accumulated in a
+    preallocated array and flushed in batches. With `background=True`, the file writes are
+    offloaded to a writer thread fed through a bounded queue.
+    """
+
+    # Offset of EntityHeader.sequence_number, the only header field that changes per frame
+    _SEQUENCE_NUMBER_OFFSET = struct.calcsize("=QI")
+    _SEQUENCE_NUMBER_STRUCT = struct.Struct("=Q")
 
     def __init__(
         self,
@@ -1007,6 +1210,9 @@ class EntityWriter:
         basename: str = "tensor",
         *,
         framerate: Union[int, float] = 30,
+        index_batch_size: int = 256,
+        background: bool = False,
+        queue_size: int = 8,
     ) -> None:
         """Initialize the writer.
 
@@ -1014,14 +1220,29 @@ class EntityWriter:
             directory: Directory to write the recording to.
             basename: Base name of the recording.
             framerate: Framerate of the recording.
+            index_batch_size: Number of index records to accumulate before writing them out.
+            background: Write to the files from a background thread so that adding a frame
+                only enqueues it. Frames must not be modified after they were added.
+            queue_size: Maximum number of frames waiting for the background thread. Adding a
+                frame blocks while the queue is full.
         """
+        if index_batch_size <= 0:
+            raise ValueError("index_batch_size must be positive")
+        if queue_size <= 0:
+            raise ValueError("queue_size must be positive")
         self._directory = directory
         self._basename = basename
         self._framerate = framerate
+        self._index_batch_size = index_batch_size
+        self._background = background
+        self._queue_size = queue_size
         self._index_path = os.path.join(self._directory, f"{self._basename}.gxf_index")
         self._entities_path = os.path.join(self._directory, f"{self._basename}.gxf_entities")
         self._index_file = None
         self._entities_file = None
+        self._queue = None
+        self._thread = None
+        self._thread_error = None
         self._initialize()
 
     def __enter__(self):
@@ -1034,30 +1255,113 @@ class EntityWriter:
     def _initialize(self):
         self._index = 0
         self._start_timestemp = int(time.time() * 10**9)
+        self._entities_offset = 0
+        self._index_buffer = np.zeros(self._index_batch_size, dtype=EntityIndex.DTYPE)
+        self._index_count = 0
+        self._header_key = None
+        self._header_buffer = None
 
     def open(self):  # noqa: A003
         self.close()
         self._index_file = open(self._index_path, "wb")  # noqa: SIM115
         self._entities_file = open(self._entities_path, "wb")  # noqa: SIM115
         self._initialize()
+        if self._background:
+            self._queue = queue.Queue(maxsize=self._queue_size)
+            self._thread_error = None
+            self._thread = threading.Thread(target=self._run, name="EntityWriter", daemon=True)
+            self._thread.start()
 
     def close(self):
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+            self._queue = None
         if self._index_file:
+            self._flush_index()
             self._index_file.close()
             self._index_file = None
         if self._entities_file:
             self._entities_file.close()
             self._entities_file = None
+        self._raise_thread_error()
+
+    def _raise_thread_error(self):
+        if self._thread_error:
+            error, self._thread_error = self._thread_error, None
+            raise RuntimeError("EntityWriter background thread failed") from error
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._thread_error:
+                # keep draining the queue so that add() never blocks on a dead writer
+                continue
+            try:
+                self._write(*item)
+            except Exception as e:
+                self._thread_error = e
+
+    def _get_header_buffer(self, array: np.ndarray, name: bytes) -> bytearray:
+        """Get the serialized entity, component and tensor headers for a frame layout.
+
+        The headers only depend on the frame layout and name, so they are serialized once and
+        only the sequence number is patched for each frame.
+        """
+        key = (array.shape, array.strides, array.dtype, name)
+        if key != self._header_key:
+            writer = BytesIO()
+            EntityHeader(data=(0, 0, 0, 0, 1, 0)).serialize(writer=writer, whence=os.SEEK_CUR)
+            ComponentHeader(data=(0, *TensorType, len(name))).serialize(
+                writer=writer, whence=os.SEEK_CUR
+            )
+            writer.write(name)
+            TensorHeader(
+                data=(
+                    MemoryStorageType.kDevice,
+                    PrimitiveType.kUnsigned8,
+                    array.dtype.itemsize,
+                    array.ndim,
+                    array.shape,
+                    array.strides,
+                )
+            ).serialize(writer=writer, whence=os.SEEK_CUR)
+            self._header_key = key
+            self._header_buffer = bytearray(writer.getvalue())
+        return self._header_buffer
+
+    def _write(self, array: np.ndarray, name: bytes, sequence_number: int, timestamp: int):
+        header_buffer = self._get_header_buffer(array, name)
+        self._SEQUENCE_NUMBER_STRUCT.pack_into(
+            header_buffer, self._SEQUENCE_NUMBER_OFFSET, sequence_number
+        )
+        self._entities_file.write(header_buffer)
+        self._entities_file.write(memoryview(array).cast("B"))
 
-    def add(self, array: ArrayLike, *, name: str = "") -> Entity:
-        """Add a new entity to the writer.
+        entity_size = len(header_buffer) + array.nbytes
+        self._index_buffer[self._index_count] = (timestamp, entity_size, self._entities_offset)
+        self._index_count += 1
+        self._entities_offset += entity_size
+        if self._index_count == self._index_batch_size:
+            self._flush_index()
+
+    def _flush_index(self):
+        if self._index_count:
+            self._index_file.write(self._index_buffer[: self._index_count])
+            self._index_count = 0
+
+    def append(self, array: ArrayLike, *, name: str = "") -> int:
+        """Append a new entity to the writer without building any Entity objects.
 
         Args:
             array: The array to be added to the writer.
             name: The name of the entity.
 
         Returns:
-            The entity that was added.
+            The sequence number of the entity that was added.
         """
         if not self._index_file:
             raise ValueError("Recorder is not open")
@@ -1075,8 +1379,35 @@ class EntityWriter:
             raise TypeError("Array must have 1 or 3 channels, but got {}", array.shape[2])
         if not isinstance(name, str):
             raise TypeError("name must be a string")
+        self._raise_thread_error()
+
+        array = np.ascontiguousarray(array)
+        sequence_number = self._index
+        timestamp = self._start_timestemp + int(sequence_number * 10**9 / self._framerate)
+        item = (array, name.encode("utf-8"), sequence_number, timestamp)
+        if self._thread:
+            self._queue.put(item)
+        else:
+            self._write(*item)
+
+        self._index += 1
 
-        entity_header = EntityHeader(data=(0, 0, self._index, 0, 1, 0))
+        return sequence_number
+
+    def add(self, array: ArrayLike, *, name: str = "") -> Entity:
+        """Add a new entity to the writer.
+
+        Args:
+            array: The array to be added to the writer.
+            name: The name of the entity.
+
+        Returns:
+            The entity that was added.
+        """
+        sequence_number = self.append(array, name=name)
+
+        array = np.ascontiguousarray(array)
+        entity_header = EntityHeader(data=(0, 0, sequence_number, 0, 1, 0))
         component_header = ComponentHeader(data=(0, *TensorType, 0))
         tensor_header = TensorHeader(
             data=(
@@ -1090,15 +1421,4 @@ class EntityWriter:
         )
         tensor = Tensor(data=(tensor_header, array))
         component = Component(data=(component_header, name, tensor))
-        entity = Entity(data=(entity_header, [component]))
-
-        timestamp = self._start_timestemp + int(self._index * 10**9 / self._framerate)
-        offset = self._entities_file.tell()
-        entity_index = EntityIndex(data=(timestamp, entity.size_in_bytes, offset))
-
-        entity_index.write(writer=self._index_file, whence=os.SEEK_CUR)
-        entity.write(writer=self._entities_file, whence=os.SEEK_CUR)
-
-        self._index += 1
-
-        return entity
+        return Entity(data=(entity_header, [component]))
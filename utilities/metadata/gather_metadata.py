@@ -17,10 +17,12 @@
 
 import argparse
 import codecs
+import copy
 import json
 import logging
 import os
 from pathlib import Path
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -38,6 +40,77 @@ def find_metadata_files(repo_paths):
     return metadata_files
 
 
+# Version of the on-disk metadata index format, bump it when the format changes
+METADATA_INDEX_VERSION = 1
+
+
+def find_metadata_files_indexed(repo_paths, directory_index):
+    """Search for metadata.json files, reusing a directory index from a previous search.
+
+    `directory_index` maps directory paths to their modification time, subdirectories and whether
+    they contain a metadata.json file. A directory's modification time changes when entries are
+    added to or removed from it, so unchanged directories are only stat'ed instead of listed.
+
+    Returns the metadata files (in `os.walk` order) and the updated directory index.
+    """
+    metadata_files = []
+    new_directory_index = {}
+
+    for repo_path in repo_paths:
+        stack = [str(repo_path)]
+        while stack:
+            directory = stack.pop()
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            entry = directory_index.get(directory)
+            if entry is None or entry["mtime"] != mtime:
+                subdirs = []
+                has_metadata = False
+                try:
+                    with os.scandir(directory) as it:
+                        for dir_entry in it:
+                            # like os.walk, don't follow symbolic links to directories
+                            if dir_entry.is_dir() and not dir_entry.is_symlink():
+                                subdirs.append(dir_entry.name)
+                            elif dir_entry.name == "metadata.json":
+                                has_metadata = True
+                except OSError:
+                    continue
+                entry = {"mtime": mtime, "subdirs": subdirs, "metadata": has_metadata}
+            new_directory_index[directory] = entry
+            if entry["metadata"]:
+                metadata_files.append(os.path.join(directory, "metadata.json"))
+            stack.extend(os.path.join(directory, subdir) for subdir in reversed(entry["subdirs"]))
+
+    return metadata_files, new_directory_index
+
+
+def load_metadata_index(cache_file) -> dict:
+    """Load the metadata index written by `save_metadata_index`, or an empty index"""
+    try:
+        with open(cache_file, "r") as file:
+            index = json.load(file)
+        if index.get("version") == METADATA_INDEX_VERSION:
+            return index
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {"version": METADATA_INDEX_VERSION, "directories": {}, "files": {}}
+
+
+def save_metadata_index(cache_file, index: dict) -> None:
+    """Atomically write the metadata index, ignoring errors since it is only a cache"""
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as file:
+            json.dump(index, file)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.debug('Could not write metadata index "%s": %s', cache_file, e)
+
+
 def extract_readme(file_path):
     """Check for the README.md file in the current directory"""
     readme_path = os.path.join(os.path.dirname(file_path), "README.md")
@@ -86,19 +159,17 @@ def generate_build_and_run_command(metadata: dict) -> str:
         return f'./dev_container build_and_run {metadata["application_name"]}'
 
 
-def gather_metadata(repo_paths: list[str], exclude_paths: list[str] = None) -> list[dict]:
-    """
-    Collect project metadata from JSON files into a single dictionary
+def load_readme(project: dict) -> str:
+    """Load the README of a project collected with `include_readme=False`"""
+    if "readme" not in project:
+        project["readme"] = extract_readme(os.path.join(project["source_folder"], "metadata.json"))
+    return project["readme"]
 
-    This function will return a list of dictionaries, each containing metadata for a project.
 
-    :input:
-        repo_path: str
-            The path to the repository to collect metadata from.
-        exclude_files: list
-            A list of files to exclude from metadata collection.
-    :return:
-        A list of dictionaries, each containing metadata for a project.
+def parse_metadata_file(file_path: str) -> tuple[list[dict], bool]:
+    """Parse the project entries of a metadata.json file, without their README.
+
+    Returns the valid project entries and whether the whole file was valid.
     """
     SCHEMA_TYPES = [
         "application",
@@ -110,45 +181,110 @@ def gather_metadata(repo_paths: list[str], exclude_paths: list[str] = None) -> l
         "workflow",
     ]
 
-    metadata_files = find_metadata_files(repo_paths)
+    with open(file_path, "r") as file:
+        try:
+            entries = json.load(file)
+        except json.decoder.JSONDecodeError as e:
+            logger.error('Error parsing JSON file "%s": %s', file_path, e)
+            return [], False
+    entries = entries if type(entries) is list else [entries]
+
+    metadata = []
+    is_valid = True
+    for data in entries:
+        try:
+            schema_type = next(key for key in data.keys() if key in SCHEMA_TYPES)
+        except StopIteration:
+            logger.error(
+                'No valid schema type found in metadata file "%s". Available keys: %s',
+                file_path,
+                ", ".join(data.keys()),
+            )
+            is_valid = False
+            continue
+
+        data["project_type"] = schema_type
+        data["metadata"] = data.pop(schema_type)
+        data["project_name"] = extract_project_name(file_path)
+        metadata.append(data)
+    return metadata, is_valid
+
+
+def gather_metadata(
+    repo_paths: list[str],
+    exclude_paths: list[str] = None,
+    include_readme: bool = True,
+    cache_file: Optional[str] = None,
+) -> list[dict]:
+    """
+    Collect project metadata from JSON files into a single dictionary
+
+    This function will return a list of dictionaries, each containing metadata for a project.
+
+    :input:
+        repo_path: str
+            The path to the repository to collect metadata from.
+        exclude_files: list
+            A list of files to exclude from metadata collection.
+        include_readme: bool
+            Whether to read the README of every project. Otherwise, use `load_readme` to read
+            the README of a project when it is needed.
+        cache_file: str
+            Optional path of an on-disk index of the parsed metadata files, keyed by file path
+            and modification time. Only new or modified metadata files are parsed again.
+    :return:
+        A list of dictionaries, each containing metadata for a project.
+    """
+    if cache_file:
+        index = load_metadata_index(cache_file)
+        metadata_files, directory_index = find_metadata_files_indexed(
+            repo_paths, index["directories"]
+        )
+    else:
+        metadata_files = find_metadata_files(repo_paths)
     metadata = []
     exclude_paths = exclude_paths or []
+    file_index = {}
 
     # Iterate over the found metadata files
     for file_path in metadata_files:
         if any(exclude_path in file_path for exclude_path in exclude_paths):
             continue
-        with open(file_path, "r") as file:
+        entries = None
+        if cache_file:
             try:
-                entries = json.load(file)
-                entries = entries if type(entries) is list else [entries]
-
-                for data in entries:
-                    try:
-                        schema_type = next(key for key in data.keys() if key in SCHEMA_TYPES)
-                    except StopIteration:
-                        logger.error(
-                            'No valid schema type found in metadata file "%s". Available keys: %s',
-                            file_path,
-                            ", ".join(data.keys()),
-                        )
-                        continue
-
-                    data["project_type"] = schema_type
-                    data["metadata"] = data.pop(schema_type)
-
-                    readme = extract_readme(file_path)
-                    project_name = extract_project_name(file_path)
-                    source_folder = Path(file_path).parent
-                    data["readme"] = readme
-                    data["project_name"] = project_name
-                    data["source_folder"] = source_folder
-                    if source_folder in ["applications", "benchmarks", "workflows"]:
-                        data["build_and_run"] = generate_build_and_run_command(data)
-                    metadata.append(data)
-            except json.decoder.JSONDecodeError as e:
-                logger.error('Error parsing JSON file "%s": %s', file_path, e)
+                mtime = os.stat(file_path).st_mtime_ns
+            except OSError:
                 continue
+            cached = index["files"].get(file_path)
+            if cached and cached["mtime"] == mtime:
+                entries = cached["entries"]
+        if entries is None:
+            entries, is_valid = parse_metadata_file(file_path)
+            if cache_file and is_valid:
+                # invalid files are not cached so that their errors are reported on every run
+                file_index[file_path] = {"mtime": mtime, "entries": copy.deepcopy(entries)}
+        elif cache_file:
+            file_index[file_path] = cached
+            entries = copy.deepcopy(entries)
+
+        source_folder = Path(file_path).parent
+        for data in entries:
+            if include_readme:
+                data["readme"] = extract_readme(file_path)
+            data["source_folder"] = source_folder
+            if source_folder in ["applications", "benchmarks", "workflows"]:
+                data["build_and_run"] = generate_build_and_run_command(data)
+            metadata.append(data)
+
+    if cache_file:
+        new_index = {
+            "version": METADATA_INDEX_VERSION,
+            "directories": directory_index,
+            "files": file_index,
+        }
+        if new_index != index:
+            save_metadata_index(cache_file, new_index)
 
     return metadata
 
@@ -0,0 +1,78 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from convert_gxf_entities_to_images import convert_gxf_entity_to_images  # noqa: E402
+from gxf_entity_codec import EntityWriter  # noqa: E402
+from PIL import Image  # noqa: E402
+
+NUM_FRAMES = 11
+
+
+class TestConvertGxfEntitiesToImages(unittest.TestCase):
+    """Test cases for the export of GXF recordings to images"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.tmp_dir.name
+        rng = np.random.default_rng(0)
+        self.frames = [rng.integers(0, 256, (8, 6, 3), dtype=np.uint8) for _ in range(NUM_FRAMES)]
+        with EntityWriter(self.directory, "tensor") as writer:
+            for frame in self.frames:
+                writer.add(frame)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _export(self, name, **kwargs):
+        output_dir = os.path.join(self.directory, name)
+        os.makedirs(output_dir)
+        count = convert_gxf_entity_to_images(
+            self.directory, "tensor", output_dir, "frame", **kwargs
+        )
+        files = {}
+        for file_name in sorted(os.listdir(output_dir)):
+            with open(os.path.join(output_dir, file_name), "rb") as f:
+                files[file_name] = f.read()
+        return count, files
+
+    def test_parallel_matches_sequential(self):
+        for kwargs in ({}, {"image_format": "npy"}, {"start": 1, "stop": 10, "stride": 3}):
+            with self.subTest(**kwargs):
+                name = "_".join(f"{k}{v}" for k, v in kwargs.items())
+                sequential = self._export(name + "_sequential", num_workers=1, **kwargs)
+                parallel = self._export(name + "_parallel", num_workers=3, **kwargs)
+                self.assertEqual(parallel, sequential)
+                self.assertEqual(sequential[0], len(sequential[1]))
+
+    def test_exported_frames(self):
+        count, files = self._export("png")
+        self.assertEqual(count, NUM_FRAMES)
+        self.assertEqual(list(files), [f"frame{i:04d}.png" for i in range(1, NUM_FRAMES + 1)])
+        for index, frame in enumerate(self.frames):
+            path = os.path.join(self.directory, "png", f"frame{index + 1:04d}.png")
+            np.testing.assert_array_equal(np.asarray(Image.open(path)), frame)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,291 @@
+# SPDX-FileCopyrightText: Copyright (c) 2024 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gxf_entity_codec import (  # noqa: E402
+    Component,
+    ComponentHeader,
+    Entity,
+    EntityHeader,
+    EntityIndex,
+    EntityReader,
+    EntityWriter,
+    MemoryStorageType,
+    PrimitiveType,
+    Tensor,
+    TensorHeader,
+    TensorType,
+)
+
+NUM_FRAMES = 12
+FRAMERATE = 30
+START_TIME = 1700000000.0
+
+
+def make_frames(num_frames=NUM_FRAMES, shape=(6, 5, 3), seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(num_frames)]
+
+
+class TestEntityReader(unittest.TestCase):
+    """Round trip tests of the GXF entity reader, with and without memory mapping"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.tmp_dir.name
+        self.frames = make_frames()
+        with EntityWriter(self.directory, "tensor", framerate=FRAMERATE) as writer:
+            for frame in self.frames:
+                writer.add(frame)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _reader(self, use_mmap):
+        return EntityReader(self.directory, "tensor", use_mmap=use_mmap)
+
+    def test_round_trip(self):
+        for use_mmap in (False, True):
+            with self.subTest(use_mmap=use_mmap), self._reader(use_mmap) as reader:
+                self.assertEqual(reader.num_entities, NUM_FRAMES)
+                for index, frame in enumerate(self.frames):
+                    np.testing.assert_array_equal(reader.get_frame(index), frame)
+                entities = list(reader.get_entities())
+                self.assertEqual(
+                    [entity.header.sequence_number for entity in entities],
+                    list(range(NUM_FRAMES)),
+                )
+
+    def test_mmap_matches_file_reads(self):
+        with self._reader(False) as file_reader, self._reader(True) as mmap_reader:
+            np.testing.assert_array_equal(file_reader.index_array, mmap_reader.index_array)
+            for index in range(NUM_FRAMES):
+                self.assertEqual(
+                    repr(file_reader.get_entity_index(index)),
+                    repr(mmap_reader.get_entity_index(index)),
+                )
+                self.assertEqual(
+                    file_reader.get_entity(index).size_in_bytes,
+                    mmap_reader.get_entity(index).size_in_bytes,
+                )
+
+    def test_mmap_frames_are_read_only_views(self):
+        with self._reader(True) as reader:
+            frame = reader.get_frame(0)
+            self.assertFalse(frame.flags.writeable)
+        # frames stay valid after the reader is closed
+        np.testing.assert_array_equal(frame, self.frames[0])
+
+    def test_empty_recording(self):
+        with EntityWriter(self.directory, "empty"):
+            pass
+        for use_mmap in (False, True):
+            reader = EntityReader(self.directory, "empty", use_mmap=use_mmap)
+            with self.subTest(use_mmap=use_mmap), reader:
+                self.assertEqual(reader.num_entities, 0)
+                self.assertEqual(list(reader.get_entities()), [])
+
+    def test_framerate(self):
+        for use_mmap in (False, True):
+            with self.subTest(use_mmap=use_mmap), self._reader(use_mmap) as reader:
+                framerate = reader.get_framerate()
+                timestamps = reader.timestamps
+                duration = int(timestamps[-1]) - int(timestamps[0])
+                self.assertAlmostEqual(framerate, NUM_FRAMES * 10**9 / duration)
+                statistics = reader.get_frame_statistics()
+                self.assertEqual(statistics["framerate"], framerate)
+                self.assertEqual(statistics["num_frames"], NUM_FRAMES)
+                self.assertEqual(statistics["duration"], duration)
+                self.assertAlmostEqual(statistics["interval_mean"], 10**9 / FRAMERATE, delta=1)
+
+
+class TestEntityIndexLookups(unittest.TestCase):
+    """Test cases for the bulk entity index and the timestamp lookups"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.tmp_dir.name
+        with EntityWriter(self.directory, "tensor", framerate=FRAMERATE) as writer:
+            for frame in make_frames():
+                writer.add(frame)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_index_array_matches_entity_indices(self):
+        for use_mmap in (False, True):
+            reader = EntityReader(self.directory, "tensor", use_mmap=use_mmap)
+            with self.subTest(use_mmap=use_mmap), reader:
+                index_array = reader.index_array
+                self.assertEqual(len(index_array), NUM_FRAMES)
+                for index in range(NUM_FRAMES):
+                    entity_index = reader.get_entity_index(index)
+                    self.assertEqual(index_array["log_time"][index], entity_index.log_time)
+                    self.assertEqual(index_array["data_size"][index], entity_index.data_size)
+                    self.assertEqual(index_array["data_offset"][index], entity_index.data_offset)
+                self.assertTrue(np.all(np.diff(reader.timestamps.astype(np.int64)) > 0))
+
+    def test_find_entity(self):
+        with EntityReader(self.directory, "tensor", use_mmap=True) as reader:
+            timestamps = [int(t) for t in reader.timestamps]
+            for index, timestamp in enumerate(timestamps):
+                self.assertEqual(reader.find_entity(timestamp), index)
+                # timestamps between two entities map to the earlier one
+                self.assertEqual(reader.find_entity(timestamp + 1), index)
+            self.assertEqual(reader.find_entity(timestamps[0] - 1), 0)
+            self.assertEqual(reader.find_entity(timestamps[-1] + 10**9), NUM_FRAMES - 1)
+
+    def test_get_entity_range(self):
+        with EntityReader(self.directory, "tensor") as reader:
+            timestamps = [int(t) for t in reader.timestamps]
+            self.assertEqual(reader.get_entity_range(timestamps[2], timestamps[5]), range(2, 5))
+            self.assertEqual(
+                reader.get_entity_range(timestamps[2] + 1, timestamps[5] + 1), range(3, 6)
+            )
+            self.assertEqual(
+                reader.get_entity_range(timestamps[0] - 10, timestamps[-1] + 10),
+                range(0, NUM_FRAMES),
+            )
+            self.assertEqual(len(reader.get_entity_range(timestamps[3], timestamps[3])), 0)
+
+
+def write_reference_recording(directory, basename, frames, framerate=FRAMERATE):
+    """Write a recording one serialized Entity and EntityIndex object at a time, the way
+    EntityWriter.add wrote it before it serialized headers once and batched the index"""
+    start_timestamp = int(START_TIME * 10**9)
+    with open(os.path.join(directory, f"{basename}.gxf_index"), "wb") as index_file, open(
+        os.path.join(directory, f"{basename}.gxf_entities"), "wb"
+    ) as entities_file:
+        for sequence_number, array in enumerate(frames):
+            tensor_header = TensorHeader(
+                data=(
+                    MemoryStorageType.kDevice,
+                    PrimitiveType.kUnsigned8,
+                    array.dtype.itemsize,
+                    array.ndim,
+                    array.shape,
+                    array.strides,
+                )
+            )
+            component = Component(
+                data=(
+                    ComponentHeader(data=(0, *TensorType, 0)),
+                    "",
+                    Tensor(data=(tensor_header, array)),
+                )
+            )
+            entity = Entity(data=(EntityHeader(data=(0, 0, sequence_number, 0, 1, 0)), [component]))
+            timestamp = start_timestamp + int(sequence_number * 10**9 / framerate)
+            offset = entities_file.tell()
+            EntityIndex(data=(timestamp, entity.size_in_bytes, offset)).write(
+                writer=index_file, whence=os.SEEK_CUR
+            )
+            entity.write(writer=entities_file, whence=os.SEEK_CUR)
+
+
+def read_recording_bytes(directory, basename):
+    with open(os.path.join(directory, f"{basename}.gxf_index"), "rb") as f:
+        index_bytes = f.read()
+    with open(os.path.join(directory, f"{basename}.gxf_entities"), "rb") as f:
+        entities_bytes = f.read()
+    return index_bytes, entities_bytes
+
+
+class TestEntityWriter(unittest.TestCase):
+    """Test cases for the batched and background GXF entity writer"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.tmp_dir.name
+        # frames of two layouts, so that the cached headers are rebuilt when the layout changes
+        self.frames = make_frames(7) + make_frames(6, shape=(4, 3, 1), seed=1)
+        write_reference_recording(self.directory, "reference", self.frames)
+        self.reference = read_recording_bytes(self.directory, "reference")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write(self, basename, use_append=False, **kwargs):
+        # the start time of the recording is taken when the writer is opened
+        with mock.patch("gxf_entity_codec.time.time", return_value=START_TIME), EntityWriter(
+            self.directory, basename, framerate=FRAMERATE, **kwargs
+        ) as writer:
+            for frame in self.frames:
+                if use_append:
+                    writer.append(frame)
+                else:
+                    writer.add(frame)
+        return read_recording_bytes(self.directory, basename)
+
+    def test_byte_identical_to_reference(self):
+        configurations = {
+            "default": {},
+            "append": {"use_append": True},
+            "unbatched_index": {"index_batch_size": 1},
+            "partial_index_batch": {"index_batch_size": 5},
+            "background": {"background": True, "queue_size": 2},
+            "background_append": {"background": True, "use_append": True},
+        }
+        for basename, kwargs in configurations.items():
+            with self.subTest(basename):
+                index_bytes, entities_bytes = self._write(basename, **kwargs)
+                self.assertEqual(index_bytes, self.reference[0])
+                self.assertEqual(entities_bytes, self.reference[1])
+
+    def test_round_trip(self):
+        self._write("background", background=True)
+        for use_mmap in (False, True):
+            reader = EntityReader(self.directory, "background", use_mmap=use_mmap)
+            with self.subTest(use_mmap=use_mmap), reader:
+                self.assertEqual(reader.num_entities, len(self.frames))
+                for index, frame in enumerate(self.frames):
+                    np.testing.assert_array_equal(reader.get_frame(index), frame)
+
+    def test_non_contiguous_frames(self):
+        # strided frames are recorded as their contiguous copy
+        frames = [frame[:, ::-1] for frame in make_frames(3)]
+        write_reference_recording(
+            self.directory, "reference", [np.ascontiguousarray(f) for f in frames]
+        )
+        self.frames = frames
+        self.assertEqual(self._write("strided"), read_recording_bytes(self.directory, "reference"))
+
+    def test_background_error_is_raised(self):
+        writer = EntityWriter(self.directory, "failing", background=True)
+        writer.open()
+        writer._entities_file.close()
+        writer.append(self.frames[0])
+        with self.assertRaises(RuntimeError):
+            writer.close()
+
+    def test_invalid_frames(self):
+        with EntityWriter(self.directory, "invalid") as writer:
+            with self.assertRaises(TypeError):
+                writer.append(self.frames[0].astype(np.float32))
+            with self.assertRaises(TypeError):
+                writer.append(self.frames[0][..., 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+# SPDX-FileCopyrightText: Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import contextlib
+import io
+import os
+import re
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video_validation import compare_frame, validate_frames  # noqa: E402
+
+SHAPE = (12, 10, 3)
+
+
+class TestCompareFrame(unittest.TestCase):
+    """Test cases for the metrics of a frame comparison"""
+
+    def setUp(self):
+        self.src = np.random.default_rng(0).integers(0, 56, SHAPE, dtype=np.uint8)
+
+    def test_identical_frames(self):
+        metrics = compare_frame(self.src, self.src.copy())
+        self.assertEqual(metrics["mae"], 0)
+        self.assertEqual(metrics["psnr"], float("inf"))
+        self.assertAlmostEqual(metrics["ssim"], 1.0)
+        self.assertEqual(metrics["max_diff"], 0)
+
+    def test_max_diff_location(self):
+        val = self.src.copy()
+        val[7, 3, 2] += 200
+        # a smaller difference the other way round, where src is greater than val
+        val[1, 1, 0] = 0
+        src = self.src.copy()
+        src[1, 1, 0] = 50
+
+        metrics = compare_frame(src, val)
+
+        self.assertEqual(metrics["max_diff"], 200)
+        self.assertEqual(tuple(int(i) for i in metrics["max_diff_location"]), (7, 3, 2))
+        self.assertAlmostEqual(metrics["mae"], 250 / self.src.size)
+        self.assertAlmostEqual(
+            metrics["psnr"], 10 * np.log10(255.0**2 * self.src.size / (200**2 + 50**2)), 4
+        )
+
+
+class TestValidateFrames(unittest.TestCase):
+    """Test cases for the validation of a stream of frames"""
+
+    def _frame_pairs(self, num_frames, failing_frames=(), shape_mismatch_frame=None):
+        """Yield frame pairs numbered from 1, where the failing frames differ by 100 in all values,
+        and record the number of pairs read in self.num_read."""
+        self.num_read = 0
+        rng = np.random.default_rng(0)
+        for count in range(1, num_frames + 1):
+            self.num_read = count
+            src = rng.integers(0, 100, SHAPE, dtype=np.uint8)
+            val = src + 100 if count in failing_frames else src.copy()
+            if count == shape_mismatch_frame:
+                val = val[:-1]
+            yield src, val
+
+    def _validate(self, frame_pairs, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            is_valid = validate_frames(frame_pairs, **kwargs)
+        output = stdout.getvalue()
+        checked = [int(count) for count in re.findall(r"Checking frame\((\d+)\)", output)]
+        return is_valid, checked, output
+
+    def test_valid_frames(self):
+        is_valid, checked, output = self._validate(self._frame_pairs(20), num_workers=3)
+        self.assertTrue(is_valid)
+        self.assertEqual(checked, list(range(1, 21)))
+        self.assertIn("End of available frames", output)
+
+    def test_fail_fast(self):
+        is_valid, checked, output = self._validate(
+            self._frame_pairs(30, failing_frames=(5, 12)), num_workers=2
+        )
+        self.assertFalse(is_valid)
+        self.assertEqual(checked, [1, 2, 3, 4, 5])
+        # no more frames are read than the ones in flight when frame 5 fails
+        self.assertLessEqual(self.num_read, 5 + 2 * 2)
+        self.assertNotIn("End of available frames", output)
+
+    def test_fail_fast_after_last_frame_is_read(self):
+        # 8 frames in flight: frame 6 fails after the 12 frames are read
+        is_valid, checked, output = self._validate(
+            self._frame_pairs(12, failing_frames=(6,)), num_workers=4
+        )
+        self.assertFalse(is_valid)
+        self.assertEqual(self.num_read, 12)
+        self.assertEqual(checked, [1, 2, 3, 4, 5, 6])
+        self.assertNotIn("End of available frames", output)
+
+    def test_check_all_frames(self):
+        with tempfile.TemporaryDirectory() as failed_frames_dir:
+            is_valid, checked, output = self._validate(
+                self._frame_pairs(20, failing_frames=(5, 12)),
+                num_workers=2,
+                fail_fast=False,
+                failed_frames_dir=failed_frames_dir,
+            )
+            saved_frames = sorted(os.listdir(failed_frames_dir))
+        self.assertFalse(is_valid)
+        self.assertEqual(checked, list(range(1, 21)))
+        self.assertIn("End of available frames", output)
+        self.assertEqual(saved_frames, ["source0005.png", "source0012.png"])
+
+    def test_shape_mismatch(self):
+        is_valid, checked, output = self._validate(
+            self._frame_pairs(20, shape_mismatch_frame=3), fail_fast=False
+        )
+        self.assertFalse(is_valid)
+        self.assertIn("Frames are a different size", output)
+        self.assertEqual(self.num_read, 3)
+        self.assertEqual(checked, [1, 2])
+
+    def test_too_few_frames(self):
+        is_valid, checked, _ = self._validate(self._frame_pairs(9))
+        self.assertFalse(is_valid)
+        self.assertEqual(checked, list(range(1, 10)))
+        is_valid, _, _ = self._validate(self._frame_pairs(10))
+        self.assertTrue(is_valid)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -16,58 +16,165 @@
 """  # noqa: E501
 
 import argparse
+import collections
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
-from convert_gxf_entities_to_images import convert_gxf_entity_to_images
+from gxf_entity_codec import EntityReader
 from PIL import Image
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
 
 
-def check_frames(src_dir, val_dir):
-    is_valid = True
-    count = 0
+def iter_recording_frames(directory, basename):
+    """Yield the frames of a GXF recording as read-only views (no copy)."""
+    with EntityReader(directory=directory, basename=basename, use_mmap=True) as reader:
+        for index in range(reader.num_entities):
+            yield reader.get_frame(index)
+
 
+def iter_image_frames(prefix):
+    """Yield the frames stored as `<prefix>0001.png`, `<prefix>0002.png`, ..."""
+    count = 1
     while True:
+        img_path = prefix + str(count).zfill(4) + ".png"
+        if not os.path.exists(img_path):
+            return
+        yield np.asarray(Image.open(img_path))
         count += 1
 
-        src_img_path = src_dir + str(count).zfill(4) + ".png"
-        val_img_path = val_dir + str(count).zfill(4) + ".png"
 
-        if not (os.path.exists(src_img_path) and os.path.exists(val_img_path)):
-            print("End of available frames")
-            break
+def compare_frame(src, val):
+    """Compare two uint8 frames of the same shape.
+
+    Returns:
+        A dictionary with the mean absolute error (`mae`), `psnr` (dB), a global single-window
+        SSIM (`ssim`), the maximum absolute difference (`max_diff`) and its location
+        (`max_diff_location`).
+    """
+    # |src - val| without widening: the difference of max and min cannot overflow uint8
+    diff = np.maximum(src, val)
+    diff -= np.minimum(src, val)
+    num_values = diff.size
+
+    mae = float(diff.sum(dtype=np.uint64)) / num_values
+    flat_diff = diff.ravel().astype(np.float32)
+    mse = float(np.dot(flat_diff, flat_diff)) / num_values
+    psnr = float("inf") if mse == 0 else 10 * np.log10(255.0**2 / mse)
+    max_index = int(diff.argmax())
+
+    # centre the data before the products so that large frames do not lose the variance to
+    # cancellation
+    x = src.ravel().astype(np.float64)
+    y = val.ravel().astype(np.float64)
+    mu_x = x.mean()
+    mu_y = y.mean()
+    x -= mu_x
+    y -= mu_y
+    var_x = float(np.dot(x, x)) / num_values
+    var_y = float(np.dot(y, y)) / num_values
+    cov = float(np.dot(x, y)) / num_values
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+    ssim = ((2 * mu_x * mu_y + c1) * (2 * cov + c2)) / (
+        (mu_x**2 + mu_y**2 + c1) * (var_x + var_y + c2)
+    )
+
+    return {
+        "mae": mae,
+        "psnr": psnr,
+        "ssim": float(ssim),
+        "max_diff": int(diff.flat[max_index]),
+        "max_diff_location": np.unravel_index(max_index, diff.shape),
+    }
+
 
-        src_img_arr = np.asarray(Image.open(src_img_path)).astype(int)
-        val_img_arr = np.asarray(Image.open(val_img_path)).astype(int)
+def save_source_frame(output_dir, count, src):
+    """Save a source frame as `<output_dir>/source<count>.png`, as done by
+    `convert_gxf_entities_to_images`."""
+    os.makedirs(output_dir, exist_ok=True)
+    Image.fromarray(src).save(os.path.join(output_dir, "source" + str(count).zfill(4) + ".png"))
 
-        if src_img_arr.shape != val_img_arr.shape:
-            print("Frames are a different size")
-            is_valid = False
-            break
 
-        img_diff = np.sum(np.abs(src_img_arr - val_img_arr))
+def validate_frames(
+    frame_pairs, threshold=0.05, num_workers=1, fail_fast=True, failed_frames_dir=None
+):
+    """Validate a stream of (source, validation) frame pairs.
 
-        max_diff = 255 * len(src_img_arr) * len(src_img_arr[0]) * len(src_img_arr[0][0])
+    Frame pairs are compared on a thread pool with at most `2 * num_workers` pairs in flight,
+    and results are reported in frame order.
 
-        threshold = (
-            max_diff * 0.05
-        )  # creates a 5% pixel difference threshold for the frames to match
+    Args:
+        frame_pairs: Iterable of (source, validation) uint8 frames.
+        threshold: Maximum mean absolute difference, as a fraction of 255, for frames to match.
+        num_workers: Number of threads comparing frames.
+        fail_fast: Stop at the first frame that does not match.
+        failed_frames_dir: Directory where the source frames that do not match are saved, or
+            None to not save them.
 
-        print(f"Checking frame({count}) difference: {100 * img_diff / max_diff:.3f}%")
+    Returns:
+        Whether the frames are valid. Fewer than 10 frames are considered invalid.
+    """
+    is_valid = True
+    # whether every frame pair was compared, which a failure with fail_fast prevents
+    all_checked = False
+    count = 0
+    pending = collections.deque()
 
-        if img_diff > threshold:
+    def report(count, src, future):
+        metrics = future.result()
+        print(
+            f"Checking frame({count}) difference: {100 * metrics['mae'] / 255:.3f}% "
+            f"(MAE: {metrics['mae']:.3f}, PSNR: {metrics['psnr']:.2f} dB, "
+            f"SSIM: {metrics['ssim']:.4f}, max diff: {metrics['max_diff']} "
+            f"at {tuple(int(i) for i in metrics['max_diff_location'])})"
+        )
+        if metrics["mae"] > 255 * threshold:
             print("Frames exceed threshold for difference")
-            is_valid = False
+            if failed_frames_dir is not None:
+                save_source_frame(failed_frames_dir, count, src)
+            return False
+        return True
 
-    if count <= 10:
+    with ThreadPoolExecutor(max_workers=max(num_workers, 1)) as executor:
+        for src, val in frame_pairs:
+            count += 1
+            if src.shape != val.shape:
+                print("Frames are a different size")
+                is_valid = False
+                break
+            pending.append((count, src, executor.submit(compare_frame, src, val)))
+            if len(pending) >= 2 * max(num_workers, 1) and not report(*pending.popleft()):
+                is_valid = False
+                if fail_fast:
+                    break
+        else:
+            all_checked = True
+
+        while pending:
+            frame_count, src, future = pending.popleft()
+            if not is_valid and fail_fast:
+                future.cancel()
+                all_checked = False
+                continue
+            if not report(frame_count, src, future):
+                is_valid = False
+
+    if all_checked:
+        print("End of available frames")
+
+    if count < 10:
         is_valid = False
 
     return is_valid
 
 
+def check_frames(src_dir, val_dir):
+    return validate_frames(zip(iter_image_frames(src_dir), iter_image_frames(val_dir)))
+
+
 def main():
     parser = argparse.ArgumentParser(
         description=("Command line utility for comparing raw video frames between GXF Tensors")
@@ -85,27 +192,61 @@ def main():
     parser.add_argument(
         "--output_dir",
         default="./recording_output/",
-        help="Directory for the output source frames to be stored",
+        help="Directory where the source frames that do not match are stored",
     )
     parser.add_argument(
         "--validation_frames_dir",
         default="./",
         help="Directory for the validation frames to compare",
     )
+    parser.add_argument(
+        "--validation_video_dir",
+        default=None,
+        help="Directory for validation GXF files to compare against instead of frames",
+    )
+    parser.add_argument(
+        "--validation_video_basename",
+        default="validation",
+        help="Basename for the validation GXF files to compare against",
+    )
+    parser.add_argument(
+        "--threshold",
+        default=0.05,
+        type=float,
+        help="Maximum mean pixel difference (fraction of 255) for frames to match",
+    )
+    parser.add_argument(
+        "--workers", default=os.cpu_count(), type=int, help="Number of comparison threads"
+    )
+    parser.add_argument(
+        "--check_all_frames",
+        action="store_true",
+        help="Keep checking the remaining frames after the first invalid frame",
+    )
     args = parser.parse_args()
 
     # clean existing frames from output dir
-    for f in os.listdir(args.output_dir):
-        if re.search("source[0-9]{4}.png", f):
-            print("Removing", f)
-            os.remove(os.path.join(args.output_dir, f))
-
-    # source to frames
-    convert_gxf_entity_to_images(
-        args.source_video_dir, args.source_video_basename, args.output_dir, "source"
-    )
+    if os.path.isdir(args.output_dir):
+        for f in os.listdir(args.output_dir):
+            if re.search("source[0-9]{4}.png", f):
+                print("Removing", f)
+                os.remove(os.path.join(args.output_dir, f))
+
+    source_frames = iter_recording_frames(args.source_video_dir, args.source_video_basename)
+    if args.validation_video_dir:
+        validation_frames = iter_recording_frames(
+            args.validation_video_dir, args.validation_video_basename
+        )
+    else:
+        validation_frames = iter_image_frames(args.validation_frames_dir)
 
-    valid_output = check_frames(args.output_dir + "/source", args.validation_frames_dir)
+    valid_output = validate_frames(
+        zip(source_frames, validation_frames),
+        threshold=args.threshold,
+        num_workers=args.workers,
+        fail_fast=not args.check_all_frames,
+        failed_frames_dir=args.output_dir,
+    )
 
     if valid_output:
         print("Valid video output!")